@@ -0,0 +1,60 @@
+"""缓存键生成微基准
+
+对比旧实现(排序字典 + json.dumps + md5)与 make_cache_key 在典型目标配置上的耗时:
+
+    python benchmarks/cache_key_bench.py
+"""
+import os
+import sys
+import json
+import hashlib
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cache_manager import make_cache_key
+
+def legacy_cache_key(data):
+    """旧版 CacheManager._get_cache_key"""
+    if isinstance(data, dict):
+        sorted_data = {k: data[k] for k in sorted(data.keys())}
+        data_str = json.dumps(sorted_data, sort_keys=True)
+    else:
+        data_str = str(data)
+    return hashlib.md5(data_str.encode()).hexdigest()
+
+def build_targets(count: int = 1000) -> list:
+    """构造与导入目标时相同结构的目标配置"""
+    return [{
+        'url': f"http://shop{i % 50}.example.com/product.php?id={i}&cat={i % 7}",
+        'method': 'GET' if i % 3 else 'POST',
+        'headers': "User-Agent: Mozilla/5.0\nAccept: text/html\nX-Request-Id: %d" % i,
+        'cookie': f"PHPSESSID={i:032x}; lang=zh-CN"
+    } for i in range(count)]
+
+def bench(func, targets, repeat: int = 5, number: int = 20) -> float:
+    """返回每个键的最短平均耗时(微秒)"""
+    timer = timeit.Timer(lambda: [func(target) for target in targets])
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / (number * len(targets)) * 1e6
+
+def main():
+    targets = build_targets()
+    urls = [target['url'] for target in targets]
+    
+    results = [
+        ("目标字典 - 旧实现", bench(legacy_cache_key, targets)),
+        ("目标字典 - make_cache_key", bench(make_cache_key, targets)),
+        ("URL字符串 - 旧实现", bench(legacy_cache_key, urls)),
+        ("URL字符串 - make_cache_key", bench(make_cache_key, urls)),
+    ]
+    for name, cost in results:
+        print(f"{name:<28} {cost:8.3f} us/键")
+        
+    dict_speedup = results[0][1] / results[1][1]
+    str_speedup = results[2][1] / results[3][1]
+    print(f"目标字典加速比: {dict_speedup:.2f}x, URL字符串加速比: {str_speedup:.2f}x")
+    return 0 if dict_speedup > 1 and str_speedup > 1 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
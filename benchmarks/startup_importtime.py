@@ -0,0 +1,85 @@
+"""界面启动导入耗时检查
+
+在子进程中以 python -X importtime 导入 src.main, 统计导入总耗时和最慢的模块,
+并检查只应在打开对话框时才加载的模块是否被提前导入:
+
+    python benchmarks/startup_importtime.py [--budget-ms 800] [--top 15]
+
+超出预算或提前导入了重量级模块时返回非零退出码, 可用于回归检查
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应加载的模块: 对话框及其依赖只在首次使用时导入
+DEFERRED_MODULES = [
+    'matplotlib',
+    'requests',
+    'socks',
+    'PyQt5.QtChart',
+    'src.gui.task_dialog',
+    'src.gui.analysis_dialog',
+    'src.gui.proxy_dialog',
+    'src.gui.performance_monitor_dialog',
+    'src.gui.target_config',
+    'src.gui.config_dialog',
+    'src.utils.proxy_tester',
+]
+
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def measure(module: str = 'src.main'):
+    """返回 [(模块名, 自身耗时us, 累计耗时us, 层级)] 以及子进程的错误输出"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    records = []
+    errors = []
+    for line in proc.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+        elif not line.startswith('import time:'):
+            errors.append(line)
+    return records, proc.returncode, '\n'.join(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description="检查界面启动时的导入耗时")
+    parser.add_argument('--budget-ms', type=float, default=800, help="src.main 的导入耗时预算(毫秒)")
+    parser.add_argument('--top', type=int, default=15, help="列出最慢的模块数")
+    parser.add_argument('--module', default='src.main', help="要导入的模块")
+    args = parser.parse_args()
+    
+    records, returncode, errors = measure(args.module)
+    if returncode != 0:
+        print(f"导入 {args.module} 失败:\n{errors}")
+        return 2
+        
+    total_ms = next(cumulative for name, _, cumulative, _ in records if name == args.module) / 1000
+    print(f"{args.module} 导入耗时: {total_ms:.1f} ms (预算 {args.budget_ms:.0f} ms)")
+    
+    print(f"\n最慢的 {args.top} 个模块(累计耗时):")
+    slowest = sorted(records, key=lambda record: record[2], reverse=True)[:args.top]
+    for name, self_us, cumulative_us, _ in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms  {name}")
+        
+    loaded = {name for name, _, _, _ in records}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        print(f"\n启动时提前导入了应延迟加载的模块: {', '.join(eager)}")
+        
+    over_budget = total_ms > args.budget_ms
+    if over_budget:
+        print(f"\n导入耗时超出预算 {total_ms - args.budget_ms:.1f} ms")
+    return 1 if eager or over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
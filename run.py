@@ -22,15 +22,13 @@ def init_directories():
         os.makedirs(dir_name, exist_ok=True)
 
 def check_dependencies():
-    """检查依赖"""
-    try:
-        import PyQt5
-        import requests
-        import psutil
-        return True
-    except ImportError as e:
-        print(f"缺少依赖: {e}")
-        return False
+    """检查依赖(只查找模块, 不在启动时导入)"""
+    from importlib.util import find_spec
+    for name in ('PyQt5', 'requests', 'psutil'):
+        if find_spec(name) is None:
+            print(f"缺少依赖: {name}")
+            return False
+    return True
 
 def check_sqlmap():
     """检查SQLMap"""
@@ -0,0 +1,233 @@
+"""无界面的批量扫描入口
+
+与图形界面共用 SQLMapWrapper / TaskManager / ConfigTemplateManager, 不导入 Qt,
+进度以 JSON Lines 输出到标准输出:
+
+    python -m src.cli run --targets targets.txt --template 快速扫描
+    python -m src.cli run --url "http://example.com/item.php?id=1"
+    python -m src.cli resume [--batch 12]
+
+退出码: 0 全部完成, 1 有任务失败或被停止, 2 参数或输入错误,
+3 发现漏洞(需指定 --fail-on-vuln), 130 被中断(未完成的任务可用 resume 继续)
+"""
+import sys
+import json
+import time
+import queue
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_VULNERABLE = 3
+EXIT_INTERRUPTED = 130
+
+SUMMARY_CHUNK = 500  # 按ID批量读取任务摘要时每批的数量
+
+def emit(event: str, **fields):
+    """输出一行JSON事件"""
+    fields['event'] = event
+    fields['time'] = round(time.time(), 3)
+    sys.stdout.write(json.dumps(fields, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+
+def load_template(name: str) -> Optional[Dict]:
+    """加载配置模板(只在指定模板时导入模板管理器)"""
+    from src.core.config_template_manager import ConfigTemplateManager
+    return ConfigTemplateManager().find_template(name)
+
+def apply_template(target: Dict, template: Optional[Dict]) -> Dict:
+    """以模板中的目标配置为默认值, 目标自身的字段优先"""
+    if not template:
+        return target
+    merged = dict(template.get('target_config') or {})
+    merged.update({key: value for key, value in target.items() if value})
+    headers = merged.get('headers')
+    if isinstance(headers, dict):
+        # 快捷配置中的 headers 为字典, sqlmap 需要 "名称: 值" 的多行文本
+        merged['headers'] = '\n'.join(f"{key}: {value}" for key, value in headers.items())
+    return merged
+
+def read_targets(args) -> List[Dict]:
+    """读取命令行和目标文件中的目标"""
+    from src.utils.target_import import iter_target_chunks, is_valid_url
+    
+    targets = []
+    for url in args.url or []:
+        if not is_valid_url(url):
+            raise ValueError(f"无效的URL: {url}")
+        targets.append({'url': url, 'method': 'GET'})
+    if args.targets:
+        for chunk, _ in iter_target_chunks(args.targets):
+            targets.extend(chunk)
+    return targets
+
+class BatchRunner:
+    """提交任务并等待完成, 期间输出每个任务的状态变化"""
+    
+    TERMINAL = ('COMPLETED', 'FAILED', 'STOPPED')
+    
+    def __init__(self, args):
+        # 延迟导入, 参数错误时不需要初始化数据库和调度器
+        from src.core.task_manager import TaskManager
+        from src.core.sqlmap_wrapper import SQLMapWrapper
+        
+        self.args = args
+        self.task_manager = TaskManager(db_path=args.db)
+        self.changes = queue.Queue()
+        self.task_manager.subscribe(self._on_change)
+        self.sqlmap = SQLMapWrapper(
+            sqlmap_path=args.sqlmap,
+            max_workers=args.workers,
+            task_manager=self.task_manager,
+            per_host_limit=args.per_host
+        )
+        self.task_ids = set()
+        self.finished: Dict[int, str] = {}
+        self.vulnerable = 0
+        
+    def _on_change(self, task_id: int, change: str):
+        """在存储层写线程中调用, 只入队, 由主线程读取任务状态"""
+        if change == 'updated':
+            self.changes.put(task_id)
+            
+    def track(self, task_ids: Iterable[int]):
+        self.task_ids.update(task_ids)
+        
+    def _refresh(self, task_ids: List[int]):
+        """读取任务摘要并输出新结束的任务"""
+        task_ids = [task_id for task_id in task_ids
+                    if task_id in self.task_ids and task_id not in self.finished]
+        for start in range(0, len(task_ids), SUMMARY_CHUNK):
+            summaries = self.task_manager.get_task_summaries(task_ids[start:start + SUMMARY_CHUNK])
+            for task in summaries:
+                status = task.status.name
+                if status not in self.TERMINAL:
+                    continue
+                self.finished[task.id] = status
+                self.vulnerable += 1 if task.vulnerable else 0
+                emit('task', id=task.id, url=task.url, status=status.lower(),
+                     vulnerable=task.vulnerable, dbms=task.dbms)
+                emit('progress', done=len(self.finished), total=len(self.task_ids))
+                
+    def _drain(self, timeout: float) -> List[int]:
+        """取出队列中积累的变更"""
+        task_ids = []
+        try:
+            task_ids.append(self.changes.get(timeout=timeout))
+            while True:
+                task_ids.append(self.changes.get_nowait())
+        except queue.Empty:
+            pass
+        return task_ids
+        
+    def wait(self) -> int:
+        """等待调度器空闲, 返回退出码"""
+        scheduler = self.sqlmap.scheduler
+        try:
+            while scheduler.pending_count() or scheduler.running_count():
+                self._refresh(self._drain(0.5))
+        except KeyboardInterrupt:
+            # 停止调度, 被中断的任务保持等待状态, 之后可以 resume
+            self.sqlmap.shutdown()
+            self.task_manager.flush()
+            emit('interrupted', done=len(self.finished), total=len(self.task_ids))
+            return EXIT_INTERRUPTED
+            
+        # 调度器空闲后所有任务都已结束, 补齐可能尚未收到的通知
+        self.task_manager.flush()
+        self._drain(0)
+        self._refresh(sorted(self.task_ids))
+        self.sqlmap.shutdown()
+        
+        failed = sum(1 for status in self.finished.values() if status != 'COMPLETED')
+        emit('finished', total=len(self.task_ids), failed=failed, vulnerable=self.vulnerable)
+        if failed:
+            return EXIT_FAILED
+        if self.vulnerable and self.args.fail_on_vuln:
+            return EXIT_VULNERABLE
+        return EXIT_OK
+        
+    def close(self):
+        self.task_manager.unsubscribe(self._on_change)
+
+def cmd_run(args) -> int:
+    """提交新的扫描"""
+    template = None
+    try:
+        if args.template:
+            template = load_template(args.template)
+            if template is None:
+                emit('error', message=f"未找到配置模板: {args.template}")
+                return EXIT_USAGE
+        targets = [apply_template(target, template) for target in read_targets(args)]
+    except (OSError, ValueError) as e:
+        emit('error', message=str(e))
+        return EXIT_USAGE
+    if not targets:
+        emit('error', message="没有有效的目标")
+        return EXIT_USAGE
+        
+    runner = BatchRunner(args)
+    try:
+        config = targets[0] if len(targets) == 1 else {'targets': targets}
+        task_ids = runner.sqlmap.start_scan(
+            config,
+            scan_options=(template or {}).get('scan_options'),
+            priority=args.priority
+        )
+        runner.track(task_ids)
+        emit('submitted', tasks=len(task_ids))
+        return runner.wait()
+    finally:
+        runner.close()
+
+def cmd_resume(args) -> int:
+    """恢复未完成的任务, 或只恢复指定批量任务中未完成的目标"""
+    runner = BatchRunner(args)
+    try:
+        if args.batch is not None:
+            count = runner.sqlmap.resume_batch(args.batch)
+        else:
+            count = runner.sqlmap.resume_pending()
+        runner.track(runner.sqlmap.scheduler.active_ids())
+        emit('resumed', tasks=count)
+        return runner.wait()
+    finally:
+        runner.close()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description="SQLMap GUI 无界面批量扫描")
+    parser.add_argument('--db', default='sqlmap_gui.db', help="任务数据库路径")
+    parser.add_argument('--sqlmap', default='sqlmap', help="sqlmap 可执行文件")
+    parser.add_argument('--workers', type=int, default=3, help="最大并发 sqlmap 进程数")
+    parser.add_argument('--per-host', type=int, default=0, help="每个主机的最大并发数(0 表示不限制)")
+    parser.add_argument('--fail-on-vuln', action='store_true', help="发现漏洞时以退出码3结束")
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    run = sub.add_parser('run', help="提交新的扫描")
+    run.add_argument('--targets', help="目标文件(.txt/.csv/.json/.jsonl)")
+    run.add_argument('--url', action='append', help="单个目标URL, 可重复指定")
+    run.add_argument('--template', help="配置模板名称")
+    run.add_argument('--priority', type=int, default=0, help="任务优先级")
+    run.set_defaults(func=cmd_run)
+    
+    resume = sub.add_parser('resume', help="恢复未完成的任务")
+    resume.add_argument('--batch', type=int, help="只恢复指定批量任务中未完成的目标")
+    resume.set_defaults(func=cmd_resume)
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    if args.command == 'run' and not (args.targets or args.url):
+        parser.print_usage(sys.stderr)
+        return EXIT_USAGE
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,17 @@
 import os
 import json
 import shutil
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import xml.etree.ElementTree as ET
 from src.core.config_version_manager import ConfigVersionManager
 from src.core.config_validator import ConfigValidator
 
+if TYPE_CHECKING:
+    # 只用于返回值注解
+    from src.core.config_version_manager import ConfigVersion
+
 @dataclass
 class ConfigTemplate:
     name: str
@@ -124,6 +128,19 @@ class ConfigTemplateManager:
                 data['last_used'] = datetime.fromisoformat(data['last_used'])
             return ConfigTemplate(**data)
             
+    def find_template(self, name: str) -> Optional[Dict]:
+        """按名称或文件名查找模板和快捷配置, 返回原始配置数据"""
+        for directory in (self.templates_dir, self.quick_configs_dir):
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(directory, filename)
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if name in (data.get('name'), filename, filename[:-5]):
+                    return data
+        return None
+        
     def get_all_templates(self) -> List[ConfigTemplate]:
         """获取所有配置模板"""
         templates = []
@@ -285,7 +302,7 @@ class ConfigTemplateManager:
             
         return ConfigTemplate(**template_data) 
         
-    def get_template_versions(self, template_name: str) -> List[ConfigVersion]:
+    def get_template_versions(self, template_name: str) -> List['ConfigVersion']:
         """获取模板的所有版本"""
         return self.version_manager.get_versions(template_name)
         
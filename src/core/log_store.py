@@ -0,0 +1,216 @@
+import os
+import zlib
+import shutil
+import struct
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+# 索引记录: 块在数据文件中的偏移, 压缩后长度, 块内行数
+INDEX_RECORD = struct.Struct('<QII')
+
+class TaskLog:
+    """单个任务的日志文件
+
+    日志按行追加, 每 block_lines 行压缩成一个块写入 log.dat, 同时在 log.idx
+    中记录块的位置和行数。读取任意行只需二分查找索引并解压对应的块,
+    内存中最多只保留一个未写出的块和一个解压缓存块。
+    """
+    
+    def __init__(self, log_dir: str, block_lines: int = 4096,
+                 block_bytes: int = 1024 * 1024):
+        self.log_dir = log_dir
+        self.block_lines = block_lines
+        self.block_bytes = block_bytes
+        self.data_path = os.path.join(log_dir, 'log.dat')
+        self.index_path = os.path.join(log_dir, 'log.idx')
+        
+        self._blocks: List[tuple] = []  # (偏移, 长度, 行数)
+        self._starts: List[int] = []  # 每个块第一行的行号
+        self._flushed_lines = 0
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._cache_block = -1
+        self._cache_lines: List[str] = []
+        self._data_file = None
+        self._index_file = None
+        self.lock = threading.Lock()
+        
+        self._load_index()
+        
+    def _load_index(self):
+        """加载索引, 丢弃数据文件中未被索引的残缺块"""
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        if not os.path.exists(self.index_path):
+            return
+            
+        with open(self.index_path, 'rb') as f:
+            raw = f.read()
+            
+        usable = len(raw) - len(raw) % INDEX_RECORD.size
+        for offset, length, count in INDEX_RECORD.iter_unpack(raw[:usable]):
+            if offset + length > data_size:
+                break
+            self._blocks.append((offset, length, count))
+            self._starts.append(self._flushed_lines)
+            self._flushed_lines += count
+            
+    def _open_for_append(self):
+        """首次写入时打开文件, 并截断上次异常退出留下的残缺数据"""
+        if self._data_file:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        
+        data_end = 0
+        if self._blocks:
+            offset, length, _ = self._blocks[-1]
+            data_end = offset + length
+            
+        self._data_file = open(self.data_path, 'ab')
+        self._data_file.truncate(data_end)
+        self._data_file.seek(data_end)
+        self._index_file = open(self.index_path, 'ab')
+        self._index_file.truncate(len(self._blocks) * INDEX_RECORD.size)
+        self._index_file.seek(0, os.SEEK_END)
+        
+    @property
+    def line_count(self) -> int:
+        """总行数(含尚未写出的行)"""
+        with self.lock:
+            return self._flushed_lines + len(self._pending)
+            
+    def append(self, lines: Iterable[str]):
+        """追加日志行"""
+        with self.lock:
+            for line in lines:
+                if '\n' in line:
+                    line = line.replace('\n', ' ')  # 保证一条记录只占一行
+                self._pending.append(line)
+                self._pending_bytes += len(line) + 1
+                if (len(self._pending) >= self.block_lines or
+                        self._pending_bytes >= self.block_bytes):
+                    self._write_block()
+                    
+    def flush(self):
+        """将未写出的行压缩成块写入磁盘"""
+        with self.lock:
+            if self._pending:
+                self._write_block()
+                
+    def _write_block(self):
+        """压缩并写出当前块(调用方需持有锁)"""
+        self._open_for_append()
+        
+        data = zlib.compress('\n'.join(self._pending).encode('utf-8'), 6)
+        offset = self._data_file.tell()
+        self._data_file.write(data)
+        self._data_file.flush()
+        
+        # 先写数据再写索引, 异常退出时最多丢失一个未索引的块
+        count = len(self._pending)
+        self._index_file.write(INDEX_RECORD.pack(offset, len(data), count))
+        self._index_file.flush()
+        
+        self._blocks.append((offset, len(data), count))
+        self._starts.append(self._flushed_lines)
+        self._flushed_lines += count
+        self._pending = []
+        self._pending_bytes = 0
+        
+    def _read_block(self, block: int) -> List[str]:
+        """读取并解压指定块(调用方需持有锁)"""
+        if block == self._cache_block:
+            return self._cache_lines
+            
+        offset, length, _ = self._blocks[block]
+        with open(self.data_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+            
+        self._cache_lines = zlib.decompress(data).decode('utf-8').split('\n')
+        self._cache_block = block
+        return self._cache_lines
+        
+    def read_lines(self, start: int, count: int) -> List[str]:
+        """读取从第start行(从0开始)起的count行"""
+        result = []
+        with self.lock:
+            start = max(0, start)
+            end = min(start + count, self._flushed_lines + len(self._pending))
+            line = start
+            while line < end:
+                if line >= self._flushed_lines:
+                    pending_start = line - self._flushed_lines
+                    result.extend(self._pending[pending_start:pending_start + end - line])
+                    break
+                    
+                block = bisect_right(self._starts, line) - 1
+                block_lines = self._read_block(block)
+                offset = line - self._starts[block]
+                chunk = block_lines[offset:offset + end - line]
+                result.extend(chunk)
+                line += len(chunk)
+        return result
+        
+    def close(self):
+        """写出剩余行并关闭文件"""
+        self.flush()
+        with self.lock:
+            for f in (self._data_file, self._index_file):
+                if f:
+                    f.close()
+            self._data_file = self._index_file = None
+
+class TaskLogStore:
+    """按任务ID组织的日志存储, 每个任务一个目录"""
+    
+    def __init__(self, root_dir: str = "logs/tasks", block_lines: int = 4096):
+        self.root_dir = root_dir
+        self.block_lines = block_lines
+        self._open_logs: Dict[int, TaskLog] = {}
+        self.lock = threading.Lock()
+        
+    def _log_dir(self, task_id: int) -> str:
+        return os.path.join(self.root_dir, str(task_id))
+        
+    def open(self, task_id: int) -> TaskLog:
+        """打开任务日志用于写入, 同一任务在进程内共享一个对象"""
+        with self.lock:
+            log = self._open_logs.get(task_id)
+            if log is None:
+                log = TaskLog(self._log_dir(task_id), self.block_lines)
+                self._open_logs[task_id] = log
+            return log
+            
+    def close(self, task_id: int):
+        """关闭任务日志"""
+        with self.lock:
+            log = self._open_logs.pop(task_id, None)
+        if log:
+            log.close()
+            
+    def reader(self, task_id: int) -> Optional[TaskLog]:
+        """获取用于分页读取的日志对象, 任务正在写入时返回同一对象以便看到最新输出"""
+        with self.lock:
+            log = self._open_logs.get(task_id)
+        if log:
+            return log
+        if not os.path.exists(self._log_dir(task_id)):
+            return None
+        return TaskLog(self._log_dir(task_id), self.block_lines)
+        
+    def exists(self, task_id: int) -> bool:
+        """任务是否有日志"""
+        return task_id in self._open_logs or os.path.exists(self._log_dir(task_id))
+        
+    def delete(self, task_id: int):
+        """删除任务日志"""
+        self.close(task_id)
+        shutil.rmtree(self._log_dir(task_id), ignore_errors=True)
+        
+    def close_all(self):
+        """关闭所有打开的日志"""
+        with self.lock:
+            task_ids = list(self._open_logs.keys())
+        for task_id in task_ids:
+            self.close(task_id)
@@ -0,0 +1,321 @@
+import os
+import time
+import queue
+import logging
+import selectors
+import threading
+import subprocess
+from typing import Callable, Dict, List, Tuple
+
+# 回调参数: [(流名称, 行文本), ...], 流名称为 'stdout' 或 'stderr'
+LineBatch = List[Tuple[str, str]]
+LineCallback = Callable[[LineBatch], None]
+
+class _Stream:
+    __slots__ = ('task_id', 'name', 'pipe', 'fd', 'buffer')
+    
+    def __init__(self, task_id: int, name: str, pipe):
+        self.task_id = task_id
+        self.name = name
+        self.pipe = pipe
+        self.fd = pipe.fileno()
+        self.buffer = bytearray()
+
+class _Task:
+    __slots__ = ('task_id', 'callback', 'done', 'open_streams', 'pending', 'first_pending')
+    
+    def __init__(self, task_id: int, callback: LineCallback, stream_count: int):
+        self.task_id = task_id
+        self.callback = callback
+        self.done = threading.Event()
+        self.open_streams = stream_count
+        self.pending: LineBatch = []
+        self.first_pending = 0.0
+
+class OutputPump:
+    """子进程输出泵
+
+    由一个事件循环线程通过 selectors 同时读取所有子进程的 stdout/stderr,
+    两个管道都会被持续读空, 子进程不会因 stderr 写满而卡死。读到的行按任务
+    合并成批次(达到 batch_size 行或超过 flush_interval 秒), 交给独立的投递线程
+    调用回调。投递队列有上限, 回调处理不过来时读取线程会暂停读取, 由操作系统
+    管道把压力反馈给子进程, 内存占用不会无限增长。
+
+    Windows 上 select 不支持管道, 退化为每个流一个读取线程, 批处理与投递逻辑不变。
+    """
+    
+    def __init__(self, batch_size: int = 200, flush_interval: float = 0.05,
+                 max_pending_batches: int = 1000, max_line_length: int = 65536):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_line_length = max_line_length
+        self.use_selector = os.name == 'posix'
+        
+        self._tasks: Dict[int, _Task] = {}
+        self._attach_queue = queue.Queue()
+        self._delivery_queue = queue.Queue(maxsize=max_pending_batches)
+        self._lock = threading.Lock()
+        self._selector = None
+        self._wakeup_r = self._wakeup_w = None
+        
+        self.running = False
+        self.pump_thread = None
+        self.delivery_thread = None
+        self.logger = logging.getLogger('output_pump')
+        
+    def start(self):
+        """启动读取线程与投递线程"""
+        if self.running:
+            return
+        self.running = True
+        
+        if self.use_selector:
+            self._selector = selectors.DefaultSelector()
+            self._wakeup_r, self._wakeup_w = os.pipe()
+            os.set_blocking(self._wakeup_r, False)
+            self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+            self.pump_thread = threading.Thread(
+                target=self._pump_loop,
+                daemon=True,
+                name="OutputPump"
+            )
+            self.pump_thread.start()
+            
+        self.delivery_thread = threading.Thread(
+            target=self._delivery_loop,
+            daemon=True,
+            name="OutputDelivery"
+        )
+        self.delivery_thread.start()
+        
+    def stop(self):
+        """停止输出泵, 所有未完成任务的完成事件都会被置位"""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup()
+        try:
+            self._delivery_queue.put_nowait(None)
+        except queue.Full:
+            pass
+            
+        if self.pump_thread:
+            self.pump_thread.join(timeout=1.0)
+        if self.delivery_thread:
+            self.delivery_thread.join(timeout=1.0)
+            
+        with self._lock:
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+        for task in tasks:
+            task.done.set()
+            
+        if self._selector:
+            self._selector.close()
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+            self._selector = None
+            
+    def attach(self, task_id: int, process: subprocess.Popen,
+               callback: LineCallback) -> threading.Event:
+        """接管子进程的输出管道(需以二进制模式打开)
+
+        返回的事件在两个管道都读到EOF且所有行都已投递给回调后置位
+        """
+        streams = [(name, pipe) for name, pipe in
+                   (('stdout', process.stdout), ('stderr', process.stderr)) if pipe]
+        task = _Task(task_id, callback, len(streams))
+        with self._lock:
+            self._tasks[task_id] = task
+            
+        if not streams:
+            self._finish(task)
+            return task.done
+            
+        if self.use_selector:
+            self._attach_queue.put([_Stream(task_id, name, pipe) for name, pipe in streams])
+            self._wakeup()
+        else:
+            for name, pipe in streams:
+                threading.Thread(
+                    target=self._read_blocking,
+                    args=(_Stream(task_id, name, pipe),),
+                    daemon=True,
+                    name=f"OutputReader-{task_id}-{name}"
+                ).start()
+        return task.done
+        
+    def _wakeup(self):
+        """唤醒阻塞在select上的读取线程"""
+        if self._wakeup_w is not None:
+            try:
+                os.write(self._wakeup_w, b'\0')
+            except OSError:
+                pass
+                
+    def _pump_loop(self):
+        """事件循环: 多路读取所有已接管的管道"""
+        while self.running:
+            try:
+                events = self._selector.select(timeout=self.flush_interval)
+            except OSError as e:
+                self.logger.error(f"输出泵select失败: {e}")
+                break
+                
+            for key, _ in events:
+                stream = key.data
+                if stream is None:
+                    self._drain_wakeup()
+                    continue
+                try:
+                    data = os.read(stream.fd, 65536)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b''
+                    
+                if data:
+                    self._feed(stream, data)
+                else:
+                    self._selector.unregister(stream.fd)
+                    self._close_stream(stream)
+                    
+            self._flush_due()
+            
+    def _drain_wakeup(self):
+        """处理唤醒信号并注册新接管的管道"""
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+            
+        while True:
+            try:
+                streams = self._attach_queue.get_nowait()
+            except queue.Empty:
+                break
+            for stream in streams:
+                os.set_blocking(stream.fd, False)
+                self._selector.register(stream.fd, selectors.EVENT_READ, stream)
+                
+    def _read_blocking(self, stream: _Stream):
+        """阻塞读取(Windows退化模式)"""
+        while True:
+            try:
+                data = os.read(stream.fd, 65536)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            self._feed(stream, data)
+            self._flush_due()
+        self._close_stream(stream)
+        
+    def _feed(self, stream: _Stream, data: bytes):
+        """按行切分读到的数据, 不完整的行留在缓冲区"""
+        stream.buffer += data
+        lines = stream.buffer.split(b'\n')
+        stream.buffer = bytearray(lines.pop())
+        
+        # 超长且无换行的数据强制作为一行输出, 防止缓冲区无限增长
+        if len(stream.buffer) > self.max_line_length:
+            lines.append(bytes(stream.buffer))
+            stream.buffer = bytearray()
+            
+        if lines:
+            self._add_lines(stream, lines)
+            
+    def _add_lines(self, stream: _Stream, lines: List[bytes]):
+        """将行加入任务的待投递批次"""
+        with self._lock:
+            task = self._tasks.get(stream.task_id)
+            if task is None:
+                return
+            if not task.pending:
+                task.first_pending = time.time()
+            for line in lines:
+                text = line.decode('utf-8', errors='replace').rstrip('\r')
+                if text:
+                    task.pending.append((stream.name, text))
+            full = len(task.pending) >= self.batch_size
+            batch = self._take_batch(task) if full else None
+            
+        if batch:
+            self._deliver(task, batch)
+            
+    def _take_batch(self, task: _Task) -> LineBatch:
+        """取出任务的待投递批次(调用方需持有锁)"""
+        batch, task.pending = task.pending, []
+        return batch
+        
+    def _flush_due(self):
+        """投递等待时间超过flush_interval的批次"""
+        now = time.time()
+        due = []
+        with self._lock:
+            for task in self._tasks.values():
+                if task.pending and now - task.first_pending >= self.flush_interval:
+                    due.append((task, self._take_batch(task)))
+        for task, batch in due:
+            self._deliver(task, batch)
+            
+    def _close_stream(self, stream: _Stream):
+        """管道读到EOF"""
+        try:
+            stream.pipe.close()
+        except OSError:
+            pass
+            
+        if stream.buffer:
+            self._add_lines(stream, [bytes(stream.buffer)])
+            stream.buffer = bytearray()
+            
+        with self._lock:
+            task = self._tasks.get(stream.task_id)
+            if task is None:
+                return
+            task.open_streams -= 1
+            if task.open_streams > 0:
+                return
+            del self._tasks[stream.task_id]
+            batch = self._take_batch(task)
+            
+        if batch:
+            self._deliver(task, batch)
+        self._finish(task)
+        
+    def _deliver(self, task: _Task, batch: LineBatch) -> bool:
+        """放入投递队列, 队列已满时阻塞(背压)"""
+        while self.running:
+            try:
+                self._delivery_queue.put((task, batch), timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+        
+    def _finish(self, task: _Task):
+        """所有输出投递完后置位完成事件"""
+        if not self._deliver(task, None):
+            task.done.set()
+            
+    def _delivery_loop(self):
+        """投递线程: 依次调用各任务的回调"""
+        while True:
+            try:
+                item = self._delivery_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not self.running:
+                    break
+                continue
+            if item is None:
+                break
+            task, batch = item
+            if batch is None:
+                task.done.set()
+                continue
+            try:
+                task.callback(batch)
+            except Exception as e:
+                self.logger.error(f"任务 {task.task_id} 输出回调错误: {e}")
@@ -0,0 +1,178 @@
+import subprocess
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+import psutil
+
+class ProcessRegistry:
+    """按任务ID管理sqlmap子进程
+
+    每个任务拥有独立的进程句柄, 停止、强制结束和资源采样都只作用于对应任务,
+    结束时连同其子进程一起清理。注销时通过 Popen.poll() 回收本注册表启动的进程,
+    不会等待其他代码创建的子进程(否则会取走它们的退出码)。
+    """
+    
+    def __init__(self, kill_timeout: float = 5.0):
+        self.kill_timeout = kill_timeout
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._handles: Dict[int, psutil.Process] = {}
+        self._stats: Dict[int, Dict] = {}
+        self._stopped = set()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('process_registry')
+        
+    def register(self, task_id: int, process: subprocess.Popen):
+        """登记任务进程, 登记前已请求停止的任务立即停止"""
+        with self.lock:
+            self._processes[task_id] = process
+            self._stats[task_id] = {'cpu_usage': 0.0, 'memory_usage': 0.0, 'max_memory': 0.0}
+            stop_requested = task_id in self._stopped
+            try:
+                handle = psutil.Process(process.pid)
+                handle.cpu_percent()  # 首次调用只建立基准
+                self._handles[task_id] = handle
+            except psutil.Error:
+                pass
+        if stop_requested:
+            self.stop(task_id)
+            
+    def request_stop(self, task_id: int):
+        """标记尚未登记进程的任务为已停止, 进程登记时会被立即停止"""
+        with self.lock:
+            self._stopped.add(task_id)
+            
+    def clear_stopped(self, task_id: int):
+        """任务结束后清除停止标记"""
+        with self.lock:
+            self._stopped.discard(task_id)
+            
+    def unregister(self, task_id: int) -> Dict:
+        """注销任务进程, 返回该任务最后一次采样的资源数据"""
+        with self.lock:
+            process = self._processes.pop(task_id, None)
+            self._handles.pop(task_id, None)
+            stats = self._stats.pop(task_id, {})
+        if process is not None:
+            process.poll()  # 已退出但未被等待时回收, 退出码仍保存在 Popen 中
+        return stats
+        
+    def get(self, task_id: int) -> Optional[subprocess.Popen]:
+        """获取任务进程"""
+        with self.lock:
+            return self._processes.get(task_id)
+            
+    def task_ids(self) -> List[int]:
+        """所有已登记的任务ID"""
+        with self.lock:
+            return list(self._processes.keys())
+            
+    def is_running(self, task_id: int = None) -> bool:
+        """指定任务(或任意任务)是否仍在运行"""
+        with self.lock:
+            if task_id is not None:
+                process = self._processes.get(task_id)
+                return process is not None and process.poll() is None
+            return any(p.poll() is None for p in self._processes.values())
+            
+    def was_stopped(self, task_id: int) -> bool:
+        """任务是否是被主动停止的"""
+        with self.lock:
+            return task_id in self._stopped
+            
+    def stop(self, task_id: int, kill: bool = False, wait: bool = False) -> bool:
+        """停止任务进程及其子进程, 任务没有登记的进程时返回 False"""
+        return bool(self.stop_tasks([task_id], kill, wait))
+        
+    def stop_all(self, kill: bool = False, wait: bool = False):
+        """停止所有任务进程"""
+        self.stop_tasks(self.task_ids(), kill, wait)
+        
+    def stop_tasks(self, task_ids: Iterable[int], kill: bool = False,
+                   wait: bool = False) -> List[int]:
+        """停止多个任务的进程及其子进程, 返回有登记进程的任务ID
+
+        先向所有进程发送terminate, 再统一等待, 超过kill_timeout仍未退出则强制kill;
+        kill为True时直接强制结束. 等待在后台线程中进行, wait为True时在当前线程等待
+        """
+        stopped = []
+        pids = []
+        with self.lock:
+            for task_id in task_ids:
+                process = self._processes.get(task_id)
+                if process is None:
+                    continue
+                self._stopped.add(task_id)
+                stopped.append(task_id)
+                if process.poll() is None:
+                    pids.append(process.pid)
+                    
+        procs = [proc for pid in pids for proc in self._process_tree(pid)]
+        for proc in procs:
+            try:
+                if kill:
+                    proc.kill()
+                else:
+                    proc.terminate()
+            except psutil.Error:
+                pass
+                
+        if procs and not kill:
+            if wait:
+                self._kill_remaining(procs)
+            else:
+                threading.Thread(
+                    target=self._kill_remaining,
+                    args=(procs,),
+                    daemon=True,
+                    name="ProcessKiller"
+                ).start()
+                
+        if stopped:
+            self.logger.info(f"已停止任务进程: {stopped}")
+        return stopped
+        
+    @staticmethod
+    def _process_tree(pid: int) -> List[psutil.Process]:
+        """进程及其所有子进程"""
+        try:
+            parent = psutil.Process(pid)
+            return parent.children(recursive=True) + [parent]
+        except psutil.Error:
+            return []
+            
+    def _kill_remaining(self, procs: List[psutil.Process]):
+        """对所有进程只等待一次 kill_timeout, 之后强制结束仍未退出的进程"""
+        _, alive = psutil.wait_procs(procs, timeout=self.kill_timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+                
+    def sample(self, task_id: int) -> Dict:
+        """采样任务进程(含子进程)的CPU与内存占用"""
+        with self.lock:
+            handle = self._handles.get(task_id)
+            stats = self._stats.get(task_id)
+        if handle is None or stats is None:
+            return stats or {}
+            
+        try:
+            cpu = handle.cpu_percent()
+            memory = handle.memory_info().rss
+            for child in handle.children(recursive=True):
+                try:
+                    memory += child.memory_info().rss
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            return stats
+            
+        stats['cpu_usage'] = cpu
+        stats['memory_usage'] = memory / 1024 / 1024  # MB
+        stats['max_memory'] = max(stats['max_memory'], stats['memory_usage'])
+        return stats
+        
+    def sample_all(self) -> Dict[int, Dict]:
+        """采样所有任务进程"""
+        return {task_id: self.sample(task_id) for task_id in self.task_ids()}
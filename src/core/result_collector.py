@@ -0,0 +1,281 @@
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# sqlmap 注入技术标题 -> 漏洞类型(与 VulnerabilityAnalyzer 的规则对应)
+TECHNIQUE_TYPES = [
+    ('boolean-based blind', 'blind_sql_injection'),
+    ('time-based blind', 'blind_sql_injection'),
+    ('error-based', 'error_based'),
+]
+
+PARAMETER_PATTERN = re.compile(r'^Parameter: (.+?) \((.+)\)$')
+DBMS_PATTERN = re.compile(r'^(.+?)(?:\s+((?:[<>=!]+\s*)?\d.*))?$')
+TABLE_COUNT_PATTERN = re.compile(r'^\[\d+ tables?\]$')
+TABLE_ROW_PATTERN = re.compile(r'^\|\s*(.+?)\s*\|$')
+
+def technique_type(technique: str) -> str:
+    """把 sqlmap 的注入技术映射为漏洞类型"""
+    lower = technique.lower()
+    for keyword, vuln_type in TECHNIQUE_TYPES:
+        if keyword in lower:
+            return vuln_type
+    return 'sql_injection'
+
+class _TailReader:
+    """增量读取正在写入的文本文件, 只返回完整的行"""
+    __slots__ = ('path', 'offset')
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        
+    def read_lines(self) -> List[str]:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            self.offset = 0  # 文件被截断或重建
+        if size == self.offset:
+            return []
+            
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b'\n')
+        if end < 0:
+            return []
+        self.offset += end + 1
+        return data[:end].decode('utf-8', errors='replace').splitlines()
+
+class _LogParser:
+    """解析 sqlmap 的 log 文件(注入点、指纹信息和枚举结果)"""
+    
+    def __init__(self, result: Dict):
+        self.result = result
+        self.parameter = None
+        self.place = None
+        self.point: Optional[Dict] = None
+        self.list_key = None  # 正在读取的 [*] 列表
+        self.database = None  # 正在读取表名的数据库
+        self.pending_database = None  # "Database:" 之后还需确认是表名列表而不是导出数据
+        self.seen = {(p['parameter'], p['place'], p['technique'])
+                     for p in result['injection_points']}
+                     
+    def feed(self, lines: List[str]) -> bool:
+        """处理新增的行, 返回结果是否发生变化"""
+        changed = False
+        for line in lines:
+            changed |= self._feed_line(line.rstrip())
+        return changed
+        
+    def _feed_line(self, line: str) -> bool:
+        stripped = line.strip()
+        
+        match = PARAMETER_PATTERN.match(stripped)
+        if match:
+            self.parameter, self.place = match.groups()
+            self.point = None
+            return False
+            
+        if self.parameter and line.startswith((' ', '\t')):
+            return self._feed_point(stripped)
+        if stripped == '---':
+            self.parameter = self.point = None
+            return False
+            
+        if self.list_key:
+            if stripped.startswith('[*] '):
+                self.result[self.list_key].append(stripped[4:])
+                return True
+            self.list_key = None
+            
+        if self.pending_database:
+            database, self.pending_database = self.pending_database, None
+            if TABLE_COUNT_PATTERN.match(stripped):
+                self.database = database
+                self.result['tables'][database] = []
+                return True
+                
+        if self.database:
+            match = TABLE_ROW_PATTERN.match(stripped)
+            if match:
+                self.result['tables'].setdefault(self.database, []).append(match.group(1))
+                return True
+            if not stripped.startswith(('+', '[')):
+                self.database = None
+                
+        if stripped.startswith('back-end DBMS: '):
+            dbms, version = DBMS_PATTERN.match(stripped[15:].strip()).groups()
+            database = {'type': dbms, 'version': version}
+            if self.result.get('database') == database:
+                return False
+            self.result['database'] = database
+            for point in self.result['injection_points']:
+                point['dbms'] = dbms
+            return True
+        if stripped.startswith('web server operating system: '):
+            return self._set('os', stripped[29:].strip())
+        if stripped.startswith('web application technology: '):
+            return self._set('technology', stripped[28:].strip())
+        if stripped.startswith('available databases ['):
+            self.list_key = 'databases'
+            self.result['databases'] = []
+            return False
+        if stripped.startswith('Database: '):
+            self.pending_database = stripped[10:].strip()
+            return False
+        return False
+        
+    def _set(self, key: str, value: str) -> bool:
+        if self.result.get(key) == value:
+            return False
+        self.result[key] = value
+        return True
+        
+    def _feed_point(self, stripped: str) -> bool:
+        """注入点块内的 Type/Title/Payload 行"""
+        key, _, value = stripped.partition(': ')
+        if key == 'Type':
+            self.point = {
+                'parameter': self.parameter,
+                'place': self.place,
+                'technique': value,
+                'type': technique_type(value)
+            }
+        elif self.point is not None and key == 'Title':
+            self.point['title'] = value
+        elif self.point is not None and key == 'Payload':
+            self.point['payload'] = value
+            point, self.point = self.point, None
+            
+            # 恢复会话时 sqlmap 会重复输出已发现的注入点
+            signature = (point['parameter'], point['place'], point['technique'])
+            if signature in self.seen:
+                return False
+            self.seen.add(signature)
+            point['details'] = f"{point['place']} 参数 {point['parameter']}: {point.get('title', '')}"
+            database = self.result.get('database')
+            if database:
+                point['dbms'] = database['type']
+            self.result['injection_points'].append(point)
+            return True
+        return False
+
+class ResultCollector:
+    """从任务输出目录中增量收集 sqlmap 结果
+
+    sqlmap 在输出目录下为每个主机建立子目录, 其中 log 记录注入点与指纹信息,
+    target.txt 记录目标, dump/<数据库>/<表>.csv 为导出的数据。每次 poll()
+    只读取文件中新增的部分, 扫描进行中即可得到阶段性结果。
+    """
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.result: Dict = {
+            'injection_points': [],
+            'databases': [],
+            'tables': {},
+            'dumps': []
+        }
+        self._logs: Dict[str, Tuple[_TailReader, _LogParser]] = {}
+        self._dumps: Dict[str, Tuple[_TailReader, Dict]] = {}
+        self._targets: Dict[str, float] = {}
+        self.logger = logging.getLogger('result_collector')
+        
+    def poll(self) -> bool:
+        """读取新增的输出, 返回结果是否发生变化"""
+        changed = False
+        try:
+            hosts = [entry.path for entry in os.scandir(self.output_dir) if entry.is_dir()]
+        except OSError:
+            return False
+            
+        for host_dir in hosts:
+            try:
+                changed |= self._poll_target(host_dir)
+                changed |= self._poll_log(host_dir)
+                changed |= self._poll_dumps(host_dir)
+            except OSError as e:
+                self.logger.warning(f"读取 {host_dir} 失败: {e}")
+        return changed
+        
+    def _poll_log(self, host_dir: str) -> bool:
+        path = os.path.join(host_dir, 'log')
+        if path not in self._logs:
+            if not os.path.exists(path):
+                return False
+            self._logs[path] = (_TailReader(path), _LogParser(self.result))
+        reader, parser = self._logs[path]
+        return parser.feed(reader.read_lines())
+        
+    def _poll_target(self, host_dir: str) -> bool:
+        """target.txt 很小, 修改后整体重新读取"""
+        path = os.path.join(host_dir, 'target.txt')
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        if self._targets.get(path) == mtime:
+            return False
+        self._targets[path] = mtime
+        
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        if not lines:
+            return False
+        # 第一行: "<URL> (<方法>)  # <命令行>", 第二行为可选的POST数据
+        head = lines[0].split('  #', 1)[0].strip()
+        url, _, method = head.rpartition(' (')
+        target = {'url': url or head, 'method': method.rstrip(')') if url else 'GET'}
+        if len(lines) > 1 and not lines[1].startswith('#'):
+            target['data'] = lines[1]
+        self.result['target'] = target
+        return True
+        
+    def _poll_dumps(self, host_dir: str) -> bool:
+        """统计导出的CSV文件行数(不含表头)"""
+        dump_dir = os.path.join(host_dir, 'dump')
+        if not os.path.isdir(dump_dir):
+            return False
+            
+        changed = False
+        for database in os.scandir(dump_dir):
+            if not database.is_dir():
+                continue
+            for table in os.scandir(database.path):
+                if not table.name.endswith('.csv'):
+                    continue
+                if table.path not in self._dumps:
+                    dump = {
+                        'database': database.name,
+                        'table': table.name[:-4],
+                        'file': table.path,
+                        'rows': 0
+                    }
+                    self.result['dumps'].append(dump)
+                    self._dumps[table.path] = (_TailReader(table.path), dump)
+                    changed = True
+                reader, dump = self._dumps[table.path]
+                lines = reader.read_lines()
+                if lines:
+                    if 'columns' not in dump:
+                        dump['columns'] = lines.pop(0).split(',')
+                    dump['rows'] += len(lines)
+                    changed = True
+        return changed
+        
+    def snapshot(self) -> Dict:
+        """当前结果的副本(可安全地交给其他线程保存)"""
+        result = dict(self.result)
+        if 'database' in result:
+            result['database'] = dict(result['database'])
+        if 'target' in result:
+            result['target'] = dict(result['target'])
+        result['injection_points'] = [dict(point) for point in self.result['injection_points']]
+        result['databases'] = list(self.result['databases'])
+        result['tables'] = {db: list(tables) for db, tables in self.result['tables'].items()}
+        result['dumps'] = [dict(dump) for dump in self.result['dumps']]
+        return result
@@ -0,0 +1,110 @@
+import os
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+class ResultBlobStore:
+    """扫描结果存储
+
+    结果序列化为JSON后按内容的sha256寻址, zlib压缩保存为独立文件
+    (root_dir/哈希前两位/哈希), 任务表只保存哈希。内容相同的结果只保存一份,
+    写入时边序列化边压缩, 不会在内存中额外保留整份JSON文本。
+
+    结果可能被多个任务共享: put(pin=True) 写入的结果在 unpin() 之前不会被 delete()
+    删除, 用于覆盖"已写入结果文件但引用它的任务行尚未提交"的时间窗口。
+    同一目录在进程内应通过 ResultBlobStore.shared() 共享一个实例。
+    """
+    
+    _instances: Dict[str, 'ResultBlobStore'] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, root_dir: str = "task_results", level: int = 6):
+        self.root_dir = root_dir
+        self.level = level
+        self._pins = Counter()  # 哈希 -> 尚未提交引用的写入次数
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def shared(cls, root_dir: str) -> 'ResultBlobStore':
+        """获取目录对应的共享实例"""
+        key = os.path.abspath(root_dir)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls._instances[key] = cls(root_dir)
+            return store
+            
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], digest)
+        
+    def put(self, result: Dict, pin: bool = False) -> str:
+        """保存结果并返回内容哈希, pin为True时固定该结果直到 unpin()"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        hasher = hashlib.sha256()
+        compressor = zlib.compressobj(self.level)
+        
+        # 先写入临时文件, 计算出哈希后再原子地移动到最终位置
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                encoder = json.JSONEncoder(sort_keys=True, ensure_ascii=False)
+                for chunk in encoder.iterencode(result):
+                    data = chunk.encode('utf-8')
+                    hasher.update(data)
+                    f.write(compressor.compress(data))
+                f.write(compressor.flush())
+                
+            digest = hasher.hexdigest()
+            path = self._path(digest)
+            # 与 delete() 互斥: 已存在的文件在固定之前不会被删除
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(tmp_path)  # 相同内容已存在
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                if pin:
+                    self._pins[digest] += 1
+            return digest
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+            
+    def get(self, digest: str) -> Optional[Dict]:
+        """按哈希读取结果"""
+        path = self._path(digest)
+        if not os.path.exists(path):
+            return None
+            
+        with open(path, 'rb') as f:
+            data = zlib.decompress(f.read())
+        return json.loads(data.decode('utf-8'))
+        
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+        
+    def unpin(self, digest: str):
+        """解除一次 put(pin=True) 的固定"""
+        with self._lock:
+            self._pins[digest] -= 1
+            if self._pins[digest] <= 0:
+                del self._pins[digest]
+                
+    def delete(self, digest: str, referenced: Callable[[str], bool] = None) -> bool:
+        """删除结果文件, 返回是否已删除
+
+        结果仍被固定, 或 referenced(digest) 返回 True(仍有任务引用)时保留
+        """
+        with self._lock:
+            if self._pins[digest] or (referenced and referenced(digest)):
+                return False
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+            return True
@@ -0,0 +1,288 @@
+import heapq
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from src.core.task_manager import TaskManager, TaskStatus, ScanTask
+
+@dataclass(order=True)
+class ScheduledTask:
+    sort_key: Tuple[int, int]
+    task_id: int = field(compare=False)
+    host: str = field(compare=False, default='')
+
+# 执行器签名: runner(task, log_callback) -> 结果字典; 抛出异常表示扫描失败
+TaskRunner = Callable[[ScanTask, Optional[Callable]], Optional[Dict]]
+
+class ScanCancelled(Exception):
+    """任务在运行中被停止"""
+
+class ScanScheduler:
+    """基于 scan_tasks 表的持久化优先级调度器
+
+    - 固定数量的进程槽位, 任何时刻运行中的 sqlmap 进程数不超过 max_slots
+    - 优先级高的任务先执行, 同优先级按提交顺序执行
+    - 每个主机的并发数不超过 per_host_limit(0 表示不限制)
+    - 所有排队任务都以 PENDING 状态写入数据库, 重启后可通过 recover() 恢复
+    - 批量扫描的每个目标是一行子任务, 中断后可通过 resume_batch() 只恢复未完成的目标
+    """
+    
+    def __init__(self, task_manager: TaskManager, runner: TaskRunner,
+                 max_slots: int = 3, per_host_limit: int = 0):
+        self.task_manager = task_manager
+        self.runner = runner
+        self.max_slots = max(1, max_slots)
+        self.per_host_limit = max(0, per_host_limit)
+        
+        self._heap: List[ScheduledTask] = []
+        self._blocked: Dict[str, List[ScheduledTask]] = {}  # 因主机并发上限而暂缓的任务(每个主机一个堆)
+        self._queued_ids = set()
+        self._host_running: Dict[str, int] = {}
+        self._running_ids = set()
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        
+        self.running = False
+        self.dispatch_thread = None
+        self.executor = None
+        self.callbacks: Dict[int, Tuple] = {}
+        self.logger = logging.getLogger('scheduler')
+        
+    def start(self):
+        """启动调度线程"""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_slots,
+            thread_name_prefix="ScanSlot"
+        )
+        self.dispatch_thread = threading.Thread(
+            target=self._dispatch_loop,
+            daemon=True,
+            name="ScanScheduler"
+        )
+        self.dispatch_thread.start()
+        
+    def stop(self, wait: bool = False):
+        """停止调度(尚未开始的任务保持 PENDING 状态)"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+            
+        if self.dispatch_thread:
+            self.dispatch_thread.join(timeout=1.0)
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+            
+    def submit(self, name: str, target_config: Dict, scan_options: Dict = None,
+               priority: int = 0, callbacks: Tuple = None) -> int:
+        """提交新任务, 先持久化为 PENDING 再入队"""
+        task = self.task_manager.create_task(
+            name=name,
+            target_config=target_config,
+            scan_options=scan_options,
+            priority=priority
+        )
+        self.enqueue(task.id, task.priority, task.host or '', callbacks)
+        return task.id
+        
+    def submit_batch(self, name: str, targets: Iterable[Dict], scan_options: Dict = None,
+                     priority: int = 0, callbacks: Tuple = None) -> Tuple[int, List[int]]:
+        """提交批量任务, 返回父任务ID和子任务ID列表"""
+        parent_id, children = self.task_manager.create_batch(
+            name=name,
+            targets=targets,
+            scan_options=scan_options,
+            priority=priority
+        )
+        for task_id, host in children:
+            self.enqueue(task_id, priority, host or '', callbacks)
+        return parent_id, [task_id for task_id, _ in children]
+        
+    def resume_batch(self, parent_id: int, callbacks: Tuple = None) -> int:
+        """重新入队批量任务中未完成的子任务, 返回入队的任务数"""
+        with self._cond:
+            running = set(self._running_ids)
+        count = 0
+        for task_id, priority, host in self.task_manager.resume_batch(parent_id, running):
+            self.enqueue(task_id, priority, host, callbacks)
+            count += 1
+        return count
+        
+    def enqueue(self, task_id: int, priority: int = 0, host: str = '',
+                callbacks: Tuple = None):
+        """将数据库中已存在的任务加入调度队列"""
+        with self._cond:
+            if task_id in self._queued_ids or task_id in self._running_ids:
+                return
+            if callbacks:
+                self.callbacks[task_id] = callbacks
+            entry = ScheduledTask((-priority, next(self._counter)), task_id, host)
+            heapq.heappush(self._heap, entry)
+            self._queued_ids.add(task_id)
+            self._cond.notify()
+            
+    def recover(self) -> int:
+        """恢复数据库中未完成的任务, 返回恢复的任务数
+        
+        上次退出或崩溃时仍处于运行中的任务会重新置为等待中,
+        sqlmap 会复用输出目录中的会话文件继续扫描
+        """
+        with self._cond:
+            running = set(self._running_ids)
+        for task_id, _, _ in self.task_manager.get_queue_entries([TaskStatus.RUNNING]):
+            if task_id not in running:
+                self.task_manager.update_task_status(task_id, TaskStatus.PENDING)
+        self.task_manager.flush()
+        
+        count = 0
+        for task_id, priority, host in self.task_manager.get_queue_entries([TaskStatus.PENDING]):
+            self.enqueue(task_id, priority, host)
+            count += 1
+        return count
+        
+    def cancel(self, task_id: int) -> bool:
+        """取消排队中的任务, 已在运行的任务需由进程管理方停止"""
+        with self._cond:
+            if task_id not in self._queued_ids:
+                return False
+            # 惰性删除: 出队时跳过不在 _queued_ids 中的条目
+            self._queued_ids.discard(task_id)
+            self.callbacks.pop(task_id, None)
+            
+        self.task_manager.update_task_status(task_id, TaskStatus.STOPPED)
+        return True
+        
+    def cancel_all(self) -> int:
+        """取消所有排队中的任务"""
+        with self._cond:
+            task_ids = list(self._queued_ids)
+        return sum(1 for task_id in task_ids if self.cancel(task_id))
+        
+    def pending_count(self) -> int:
+        """排队中的任务数"""
+        with self._cond:
+            return len(self._queued_ids)
+            
+    def running_count(self) -> int:
+        """运行中的任务数"""
+        with self._cond:
+            return len(self._running_ids)
+            
+    def active_ids(self) -> set:
+        """排队中和运行中的任务ID"""
+        with self._cond:
+            return self._queued_ids | self._running_ids
+            
+    def _dispatch_loop(self):
+        """调度循环: 有空闲槽位时取出优先级最高且主机未满的任务"""
+        while True:
+            with self._cond:
+                entry = None
+                while self.running:
+                    if len(self._running_ids) < self.max_slots:
+                        entry = self._pop_eligible()
+                        if entry:
+                            break
+                    self._cond.wait()
+                    
+                if not self.running:
+                    return
+                    
+                self._queued_ids.discard(entry.task_id)
+                self._running_ids.add(entry.task_id)
+                self._host_running[entry.host] = self._host_running.get(entry.host, 0) + 1
+                
+            try:
+                self.executor.submit(self._run_task, entry)
+            except RuntimeError:
+                # stop() 已关闭执行器, 任务放回队列并保持等待状态
+                self._requeue(entry)
+                return
+                
+    def _requeue(self, entry: ScheduledTask):
+        """将已取出但未能执行的任务放回队列"""
+        self._release(entry)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            self._queued_ids.add(entry.task_id)
+            
+    def _pop_eligible(self) -> Optional[ScheduledTask]:
+        """取出下一个可执行的任务(调用方需持有锁)"""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry.task_id not in self._queued_ids:
+                continue  # 已取消
+            if self.per_host_limit and self._host_running.get(entry.host, 0) >= self.per_host_limit:
+                heapq.heappush(self._blocked.setdefault(entry.host, []), entry)
+                continue
+            return entry
+        return None
+        
+    def _release(self, entry: ScheduledTask):
+        """释放槽位, 并将该主机暂缓的任务中优先级最高的一个放回队列
+        
+        每次释放只空出一个主机槽位, 只需放回一个任务; 其余任务留在主机自己的堆中,
+        单主机的批量任务每个条目只会被暂缓和放回一次
+        """
+        with self._cond:
+            self._running_ids.discard(entry.task_id)
+            remaining = self._host_running.get(entry.host, 1) - 1
+            if remaining > 0:
+                self._host_running[entry.host] = remaining
+            else:
+                self._host_running.pop(entry.host, None)
+                
+            blocked = self._blocked.get(entry.host)
+            while blocked:
+                head = heapq.heappop(blocked)
+                if head.task_id in self._queued_ids:  # 跳过已取消的任务
+                    heapq.heappush(self._heap, head)
+                    break
+            if not blocked:
+                self._blocked.pop(entry.host, None)
+            self._cond.notify()
+            
+    def _run_task(self, entry: ScheduledTask):
+        """在槽位线程中执行任务
+        
+        完成/失败回调在释放槽位之后调用, 回调中读取 active_ids() 时不再包含本任务
+        """
+        callbacks = self.callbacks.pop(entry.task_id, None) or (None, None, None)
+        log_callback, complete_callback, error_callback = callbacks
+        task = None
+        outcome = None  # (回调, 参数)
+        try:
+            task = self.task_manager.get_task(entry.task_id)
+            if not task or not self.task_manager.start_task(task.id):
+                return  # 任务已被删除或停止
+                
+            result = self.runner(task, log_callback)
+            self.task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result=result)
+            outcome = (complete_callback, result)
+                
+        except ScanCancelled:
+            # 调度器关闭导致的中断保持等待状态, 下次启动时继续
+            status = TaskStatus.STOPPED if self.running else TaskStatus.PENDING
+            self.task_manager.update_task_status(entry.task_id, status)
+            
+        except Exception as e:
+            self.logger.error(f"任务 {entry.task_id} 执行失败: {str(e)}")
+            self.task_manager.update_task_status(entry.task_id, TaskStatus.FAILED, error=str(e))
+            outcome = (error_callback, str(e))
+                
+        finally:
+            self._release(entry)
+            if task and task.parent_id:
+                self.task_manager.refresh_batch(task.parent_id)
+                
+        if outcome and outcome[0]:
+            try:
+                outcome[0](outcome[1])
+            except Exception as e:
+                self.logger.error(f"任务 {entry.task_id} 回调失败: {str(e)}")
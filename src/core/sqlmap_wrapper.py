@@ -1,25 +1,45 @@
 import subprocess
 import json
 import os
+import re
 import threading
 from typing import Dict, List, Optional
 import psutil
 import time
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
 import logging
-from src.utils.proxy_switcher import ProxySwitcher
-from src.utils.proxy_pool import ProxyPool
+from src.core.task_manager import TaskManager, TaskStatus, ScanTask
+from src.core.scan_scheduler import ScanScheduler, ScanCancelled
+from src.core.process_registry import ProcessRegistry
+from src.core.output_pump import OutputPump
+from src.core.log_store import TaskLogStore
+from src.core.result_collector import ResultCollector
+
+# sqlmap 因代理本身出错(无法连接、握手失败、407 需要认证)而退出时输出的错误行
+PROXY_ERROR_PATTERN = re.compile(r"\[CRITICAL\].*(proxy|407)", re.IGNORECASE)
+
+class ProxyConnectionError(RuntimeError):
+    """扫描因代理出错而失败"""
 
 class SQLMapWrapper:
-    def __init__(self, sqlmap_path: str = "sqlmap", max_workers: int = 3):
+    def __init__(self, sqlmap_path: str = "sqlmap", max_workers: int = 3,
+                 task_manager: TaskManager = None, per_host_limit: int = 0):
         self.sqlmap_path = sqlmap_path
-        self.process = None
-        self.output_dir = "sqlmap_results"
+        self.processes = ProcessRegistry()  # 按任务ID登记的子进程
+        self.output_pump = OutputPump()  # 单线程读取所有子进程输出
+        self.output_pump.start()
+        self.log_store = TaskLogStore()  # 每个任务的输出写入独立的磁盘日志
+        self.output_dir = "sqlmap_results"  # 每个任务使用其下的 task_<ID> 子目录
         self.max_workers = max_workers
-        self.task_queue = Queue()
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.running_tasks = []
+        self.task_manager = task_manager or TaskManager()
+        
+        # 调度器: 进程槽位数即最大并发sqlmap进程数
+        self.scheduler = ScanScheduler(
+            self.task_manager,
+            self._run_task,
+            max_slots=max_workers,
+            per_host_limit=per_host_limit
+        )
+        self.scheduler.start()
         
         # 性能监控
         self.performance_stats = {
@@ -37,9 +57,16 @@ class SQLMapWrapper:
         )
         
         self.proxy_switcher = None
+        self.proxy_pool = None  # 设置后每个任务从代理池中取一个代理
+        self.proxy_wait_timeout = 60  # 代理都在使用中时等待空闲代理的最长时间(秒)
         self.current_proxy = None
         
-    def build_command(self, target_config: Dict, options: Dict = None) -> List[str]:
+    def task_output_dir(self, task_id: int) -> str:
+        """任务独立的输出目录, 并发扫描之间互不覆盖, 恢复任务时复用其中的会话文件"""
+        return os.path.join(self.output_dir, f"task_{task_id}")
+        
+    def build_command(self, target_config: Dict, options: Dict = None,
+                      output_dir: str = None) -> List[str]:
         """构建sqlmap命令"""
         cmd = [self.sqlmap_path]
         
@@ -105,76 +132,70 @@ class SQLMapWrapper:
                     cmd.append("--batch")
                     
         # 添加输出目录
-        cmd.extend(["--output-dir", self.output_dir])
+        cmd.extend(["--output-dir", output_dir or self.output_dir])
         
         return cmd
         
     def start_scan(self, target_config: Dict, log_callback=None,
-                  complete_callback=None, error_callback=None):
-        """开始扫描"""
-        if 'targets' in target_config:
-            # 批量扫描使用线程池
-            targets = target_config['targets']
-            for target in targets:
-                self.task_queue.put({
-                    'target': target,
-                    'callbacks': (log_callback, complete_callback, error_callback)
-                })
+                  complete_callback=None, error_callback=None,
+                  scan_options: Dict = None, priority: int = 0) -> List[int]:
+        """开始扫描
+        
+        单一目标直接提交给调度器; 批量目标先写入一个父任务和每个目标对应的子任务,
+        中断后可通过 resume_batch() 只恢复未完成的目标. 返回提交的任务ID列表
+        """
+        callbacks = (log_callback, complete_callback, error_callback)
+        if 'targets' not in target_config:
+            return [self.scheduler.submit(
+                name=f"扫描 {target_config.get('url', '')}",
+                target_config=target_config,
+                scan_options=scan_options,
+                priority=priority,
+                callbacks=callbacks
+            )]
             
-            # 启动工作线程
-            for _ in range(min(self.max_workers, len(targets))):
-                self._start_worker()
-        else:
-            # 单一目标扫描
-            self._scan_single_target(
-                target_config,
-                log_callback,
-                complete_callback,
-                error_callback
+        targets = target_config['targets']
+        if not targets:
+            return []
+        _, task_ids = self.scheduler.submit_batch(
+            name=f"批量扫描 ({len(targets)} 个目标)",
+            targets=targets,
+            scan_options=scan_options,
+            priority=priority,
+            callbacks=callbacks
+        )
+        return task_ids
+        
+    def resume_pending(self) -> int:
+        """恢复上次运行遗留的等待中和被中断的任务"""
+        return self.scheduler.recover()
+        
+    def resume_batch(self, parent_id: int, log_callback=None,
+                     complete_callback=None, error_callback=None) -> int:
+        """恢复批量任务中未完成的目标, 已完成的目标不会重新扫描
+        
+        输出目录保留了 sqlmap 的会话文件, 被中断的目标会从会话中继续
+        """
+        callbacks = (log_callback, complete_callback, error_callback)
+        return self.scheduler.resume_batch(parent_id, callbacks)
+        
+    def shutdown(self):
+        """停止调度器, 未开始的任务保持等待状态"""
+        self.scheduler.stop()
+        self.processes.stop_all(wait=True)
+        self.output_pump.stop()
+        self.log_store.close_all()
+        
+    def _update_performance_stats(self, duration: float, process_stats: Dict = None):
+        """更新性能统计"""
+        if process_stats:
+            self.performance_stats['cpu_usage'].append(
+                process_stats.get('cpu_usage', 0.0)
+            )
+            self.performance_stats['memory_usage'].append(
+                process_stats.get('max_memory', 0.0)  # MB
             )
             
-    def _start_worker(self):
-        """启动工作线程"""
-        future = self.executor.submit(self._worker_loop)
-        self.running_tasks.append(future)
-        
-    def _worker_loop(self):
-        """工作线程循环"""
-        while not self.task_queue.empty():
-            task = self.task_queue.get()
-            target = task['target']
-            callbacks = task['callbacks']
-            
-            try:
-                start_time = time.time()
-                self._scan_single_target(target, *callbacks)
-                duration = time.time() - start_time
-                
-                # 记录性能数据
-                self._update_performance_stats(duration)
-                
-            except Exception as e:
-                logging.error(f"扫描失败: {str(e)}")
-                if callbacks[2]:  # error_callback
-                    callbacks[2](str(e))
-                    
-            finally:
-                self.task_queue.task_done()
-                
-    def _update_performance_stats(self, duration: float):
-        """更新性能统计"""
-        if self.process:
-            try:
-                process = psutil.Process(self.process.pid)
-                self.performance_stats['cpu_usage'].append(
-                    process.cpu_percent()
-                )
-                self.performance_stats['memory_usage'].append(
-                    process.memory_info().rss / 1024 / 1024  # MB
-                )
-            except:
-                pass
-                
         self.performance_stats['scan_duration'].append(duration)
         
     def get_performance_stats(self) -> Dict:
@@ -211,68 +232,150 @@ class SQLMapWrapper:
         elif stats.get('avg_memory', 0) < 512:  # 512MB
             self.batch_size += 5
         
-    def _scan_single_target(self, target_config: Dict, log_callback=None,
-                           complete_callback=None, error_callback=None):
-        """扫描单个目标"""
-        cmd = self.build_command(target_config)
-        
-        def run_scan():
-            try:
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True
-                )
+    def _run_task(self, task: ScanTask, log_callback=None) -> Optional[Dict]:
+        """执行单个任务, 在调度器槽位线程中阻塞运行直到sqlmap退出
+        
+        设置了代理池且目标未单独配置代理时, 为任务取一个代理(计入进行中的请求数),
+        扫描结束后归还, 并发任务会分散到不同的代理上. 取不到代理时任务失败,
+        不会不经代理直接扫描; 只有代理本身出错才计为代理的失败
+        """
+        proxy = None
+        if self.proxy_pool and not (task.target_config.get('proxy') or {}).get('enabled'):
+            proxy = self.proxy_pool.acquire(timeout=self.proxy_wait_timeout)
+            if proxy is None:
+                raise RuntimeError("代理池中没有可用代理, 为避免暴露真实IP未启动扫描")
                 
-                # 收集输出
-                output_data = []
-                while True:
-                    output = self.process.stdout.readline()
-                    if output == '' and self.process.poll() is not None:
-                        break
-                    if output:
-                        output_data.append(output.strip())
-                        if log_callback:
-                            log_callback(output.strip())
-                    
-                return_code = self.process.poll()
+        success = True
+        try:
+            return self._run_sqlmap(task, log_callback, proxy)
+        except ProxyConnectionError:
+            success = False
+            raise
+        finally:
+            self.processes.clear_stopped(task.id)
+            if proxy:
+                self.proxy_pool.release(proxy, success)
                 
-                # 检查是否成功完成
-                if return_code == 0:
-                    # 读取结果文件
-                    result = self.get_results()
-                    if complete_callback:
-                        complete_callback(result)
-                else:
-                    error_msg = f"扫描失败，返回码: {return_code}"
-                    if error_callback:
-                        error_callback(error_msg)
+    def _proxy_args(self, proxy: Dict) -> List[str]:
+        """代理池中代理对应的sqlmap参数"""
+        args = ["--proxy", f"{proxy['type'].lower()}://{proxy['host']}:{proxy['port']}"]
+        auth = proxy.get('auth') or {}
+        if auth.get('enabled'):
+            args.extend(["--proxy-cred", f"{auth.get('username', '')}:{auth.get('password', '')}"])
+        return args
+        
+    def _run_sqlmap(self, task: ScanTask, log_callback=None, proxy: Dict = None) -> Optional[Dict]:
+        """启动sqlmap进程并等待其退出"""
+        output_dir = self.task_output_dir(task.id)
+        cmd = self.build_command(task.target_config, task.scan_options, output_dir)
+        if proxy:
+            cmd.extend(self._proxy_args(proxy))
+        collector = ResultCollector(output_dir)
+        start_time = time.time()
+        if self.processes.was_stopped(task.id):
+            raise ScanCancelled()  # 启动前已被停止
+        
+        # 以二进制模式打开管道, 由输出泵负责解码与按行切分;
+        # 子进程放入独立的进程组, 终端中的 Ctrl-C 只中断本程序, 由 shutdown() 停止子进程
+        # 并把被中断的任务保持为等待状态
+        if os.name == 'nt':
+            group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {'start_new_session': True}
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **group
+        )
+        self.processes.register(task.id, process)
+        
+        task_log = self.log_store.open(task.id)
+        proxy_errors = []
+        
+        def on_output(lines):
+            task_log.append(line for _, line in lines)
+            if proxy and not proxy_errors:
+                proxy_errors.extend(
+                    line for _, line in lines if PROXY_ERROR_PATTERN.search(line)
+                )
+            if log_callback:
+                for _, line in lines:
+                    log_callback(line)
                     
-            except Exception as e:
-                if error_callback:
-                    error_callback(str(e))
+        output_done = self.output_pump.attach(task.id, process, on_output)
+        
+        process_stats = {}
+        try:
+            # 等待输出读完, 期间每秒采样一次进程资源并收集新增的结果
+            while not output_done.wait(1.0):
+                process_stats = self.processes.sample(task.id)
+                if collector.poll():
+                    self.task_manager.update_task_result(task.id, collector.snapshot())
                     
-        # 在新线程中运行扫描
-        thread = threading.Thread(target=run_scan)
-        thread.daemon = True
-        thread.start()
-        
-    def stop_scan(self):
-        """停止扫描"""
-        if self.process:
-            self.process.terminate()
+            return_code = process.wait()
+        finally:
+            self.log_store.close(task.id)
+            process_stats = self.processes.unregister(task.id) or process_stats
+            self._update_performance_stats(time.time() - start_time, process_stats)
             
-    def get_results(self) -> Optional[Dict]:
-        """获取扫描结果"""
-        try:
-            results_file = os.path.join(self.output_dir, "results.json")
-            if os.path.exists(results_file):
-                with open(results_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"读取结果文件出错: {str(e)}")
-        return None 
+        if self.processes.was_stopped(task.id):
+            raise ScanCancelled()
+            
+        # 检查是否成功完成
+        if return_code != 0:
+            if proxy_errors:
+                raise ProxyConnectionError(f"代理 {proxy['host']}:{proxy['port']} 出错: {proxy_errors[0]}")
+            raise RuntimeError(f"扫描失败，返回码: {return_code}")
+            
+        # 读取进程退出前最后写入的结果
+        collector.poll()
+        return collector.snapshot()
+        
+    def stop_scan(self, task_id: int = None, kill: bool = False):
+        """停止扫描
+        
+        指定task_id时只停止该任务(排队中则取消, 运行中则结束其进程; 批量任务停止其所有
+        未结束的子任务), 否则取消所有排队任务并停止所有运行中的进程
+        """
+        if task_id is not None:
+            task = self.task_manager.get_task(task_id)
+            if task and task.child_count:
+                task_ids = self.task_manager.get_child_ids(
+                    task_id, [TaskStatus.PENDING, TaskStatus.RUNNING]
+                )
+            else:
+                task_ids = [task_id]
+                
+            running = [i for i in task_ids if not self.scheduler.cancel(i)]
+            stopped = set(self.processes.stop_tasks(running, kill))
+            active = self.scheduler.active_ids()
+            unregistered = []
+            for i in running:
+                if i in stopped:
+                    continue
+                if i in active:
+                    # 已由槽位线程取出但进程尚未启动, 登记进程时立即停止
+                    self.processes.request_stop(i)
+                else:
+                    unregistered.append(i)
+            # 既不在队列中也没有进程(如上次运行遗留的等待中任务), 直接标记为已停止
+            self.task_manager.mark_stopped(unregistered)
+            if task and task.child_count:
+                self.task_manager.refresh_batch(task_id)
+            return
+            
+        self.scheduler.cancel_all()
+        self.processes.stop_all(kill)
+        
+    def get_results(self, task_id: int) -> Optional[Dict]:
+        """从任务输出目录解析扫描结果"""
+        output_dir = self.task_output_dir(task_id)
+        if not os.path.isdir(output_dir):
+            return None
+        collector = ResultCollector(output_dir)
+        collector.poll()
+        return collector.snapshot()
 
     def set_proxy(self, proxy_config: dict):
         """设置代理配置"""
@@ -298,8 +401,17 @@ class SQLMapWrapper:
         elif 'http' in proxy_config:
             self.options['--proxy'] = proxy_config['http']
 
-    def set_proxy_pool(self, proxy_pool: ProxyPool):
-        """设置代理池"""
+    def set_proxy_pool(self, proxy_pool, auto_switch: bool = True):
+        """设置代理池, 传入 None 时停止使用代理池"""
+        if self.proxy_switcher:
+            self.proxy_switcher.stop()
+            self.proxy_switcher = None
+        self.proxy_pool = proxy_pool
+        if proxy_pool is None or not auto_switch:
+            return
+            
+        # 只在使用代理池时加载代理模块
+        from src.utils.proxy_switcher import ProxySwitcher
         self.proxy_switcher = ProxySwitcher(proxy_pool)
         self.proxy_switcher.start(self._on_proxy_switch)
         
@@ -307,7 +419,7 @@ class SQLMapWrapper:
         """代理切换回调"""
         self.current_proxy = proxy
         # 如果正在扫描，需要重新应用代理设置
-        if self.process and self.process.poll() is None:
+        if self.processes.is_running():
             self._apply_proxy_settings()
             
     def _apply_proxy_settings(self):
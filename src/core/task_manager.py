@@ -1,10 +1,16 @@
+import os
 import sqlite3
 import json
 import time
-from typing import List, Dict, Optional
+import logging
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Iterable, Tuple, Callable
 from datetime import datetime
+from urllib.parse import urlparse
 from dataclasses import dataclass
 from enum import Enum
+from src.core.task_storage import TaskStorage
+from src.core.result_store import ResultBlobStore
 
 class TaskStatus(Enum):
     PENDING = "等待中"
@@ -23,17 +29,82 @@ class ScanTask:
     create_time: datetime
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
-    result: Optional[Dict] = None
+    result: Optional[Dict] = None  # 列表查询不加载结果, 需要时调用 get_task_result
     error: Optional[str] = None
+    priority: int = 0
+    host: Optional[str] = None
+    result_hash: Optional[str] = None
+    parent_id: Optional[int] = None  # 批量扫描中每个目标是父任务下的子任务
+    child_count: int = 0
+
+@dataclass
+class TaskSummary:
+    """任务列表行, 只包含列表显示所需的列"""
+    id: int
+    name: str
+    url: str
+    status: TaskStatus
+    create_time: datetime
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    dbms: Optional[str] = None
+    vulnerable: bool = False
+    child_count: int = 0
+
+# 显式列出查询列，避免依赖 SELECT * 的列顺序
+TASK_COLUMNS = ("id, name, target_config, scan_options, status, create_time, "
+                "start_time, end_time, result_hash, error, priority, host, "
+                "parent_id, child_count")
+
+# 列表查询只投影需要的列, 不读取 result 等大字段
+SUMMARY_COLUMNS = ("id, name, json_extract(target_config, '$.url'), status, "
+                   "create_time, start_time, end_time, dbms, vulnerable, child_count")
+
+# 数据库结构版本(PRAGMA user_version), 用于判断是否需要回填数据
+SCHEMA_VERSION = 2
+
+INSERT_TASK_SQL = """
+    INSERT INTO scan_tasks (name, target_config, scan_options, status,
+                            create_time, priority, host, parent_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 任务变更监听器: (任务ID, 变更类型), 变更类型为 'created' / 'updated' / 'deleted',
+# 'batch' 表示批量任务及其子任务整体发生了变化
+ChangeListener = Callable[[int, str], None]
+
+def get_target_host(target_config: Dict) -> str:
+    """从目标配置中提取主机名(用于按主机限制并发)"""
+    try:
+        return urlparse(target_config.get('url', '')).netloc.lower()
+    except Exception:
+        return ''
+
+def summarize_result(result: Optional[Dict]) -> Tuple[Optional[str], int]:
+    """提取扫描结果中的数据库类型和注入点数量(写入冗余列用于统计和过滤)"""
+    if not result:
+        return None, 0
+    database = result.get('database')
+    dbms = database.get('type') if isinstance(database, dict) else None
+    points = result.get('injection_points') or []
+    return dbms, len(points) if isinstance(points, list) else 1
 
 class TaskManager:
-    def __init__(self, db_path: str = "sqlmap_gui.db"):
+    def __init__(self, db_path: str = "sqlmap_gui.db", result_dir: str = None):
         self.db_path = db_path
+        # 扫描结果单独存放, 任务表只保存结果哈希
+        self.results = ResultBlobStore.shared(
+            result_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), 'task_results')
+        )
+        # 同一数据库共享连接池与写队列
+        self.storage = TaskStorage.get(db_path)
+        self.listeners: List[ChangeListener] = []
+        self.logger = logging.getLogger('task_manager')
         self.init_db()
         
     def init_db(self):
         """初始化数据库"""
-        with sqlite3.connect(self.db_path) as conn:
+        def op(conn):
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS scan_tasks (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,46 +116,286 @@ class TaskManager:
                     start_time TIMESTAMP,
                     end_time TIMESTAMP,
                     result TEXT,
-                    error TEXT
+                    error TEXT,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    host TEXT,
+                    dbms TEXT,
+                    injection_count INTEGER NOT NULL DEFAULT 0,
+                    vulnerable INTEGER NOT NULL DEFAULT 0,
+                    result_hash TEXT,
+                    parent_id INTEGER,
+                    child_count INTEGER NOT NULL DEFAULT 0
                 )
             """)
+            self._migrate(conn)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_status_priority
+                ON scan_tasks (status, priority DESC, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_status_id
+                ON scan_tasks (status, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_create_time
+                ON scan_tasks (create_time)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_vulnerable
+                ON scan_tasks (vulnerable, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_dbms
+                ON scan_tasks (dbms)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_host
+                ON scan_tasks (host, id)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_result_hash
+                ON scan_tasks (result_hash)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scan_tasks_parent
+                ON scan_tasks (parent_id, status)
+            """)
+        self.storage.write(op, wait=True)
             
-    def create_task(self, name: str, target_config: Dict, scan_options: Dict = None) -> ScanTask:
-        """创建新的扫描任务"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            now = datetime.now()
-            cursor.execute("""
-                INSERT INTO scan_tasks (name, target_config, scan_options, status, create_time)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                name,
-                json.dumps(target_config),
-                json.dumps(scan_options) if scan_options else None,
-                TaskStatus.PENDING.value,
-                now
-            ))
-            task_id = cursor.lastrowid
+    def _migrate(self, conn: sqlite3.Connection):
+        """为旧版本数据库补充新增列"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_tasks)")}
+        if 'priority' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        if 'host' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN host TEXT")
+        if 'dbms' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN dbms TEXT")
+        if 'injection_count' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN injection_count INTEGER NOT NULL DEFAULT 0")
+        if 'vulnerable' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN vulnerable INTEGER NOT NULL DEFAULT 0")
+        if 'result_hash' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN result_hash TEXT")
+        if 'parent_id' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN parent_id INTEGER")
+        if 'child_count' not in columns:
+            conn.execute("ALTER TABLE scan_tasks ADD COLUMN child_count INTEGER NOT NULL DEFAULT 0")
+            
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._backfill_v1(conn)
+        if version < 2:
+            self._move_results_v2(conn)
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            
+    def _backfill_v1(self, conn: sqlite3.Connection):
+        """为已有任务回填主机、数据库类型和注入点数量"""
+        conn.execute("""
+            UPDATE scan_tasks SET
+                dbms = json_extract(result, '$.database.type'),
+                injection_count = CASE json_type(result, '$.injection_points')
+                    WHEN 'array' THEN json_array_length(result, '$.injection_points')
+                    WHEN 'object' THEN 1
+                    ELSE 0
+                END
+            WHERE result IS NOT NULL
+        """)
+        conn.execute("UPDATE scan_tasks SET vulnerable = injection_count > 0")
+        
+        rows = conn.execute("SELECT id, target_config FROM scan_tasks WHERE host IS NULL").fetchall()
+        conn.executemany("UPDATE scan_tasks SET host = ? WHERE id = ?", [
+            (get_target_host(json.loads(target_config)), task_id)
+            for task_id, target_config in rows
+        ])
+            
+    def _move_results_v2(self, conn: sqlite3.Connection):
+        """把表内保存的结果迁移到结果存储"""
+        task_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM scan_tasks WHERE result IS NOT NULL AND result_hash IS NULL"
+        )]
+        for task_id in task_ids:
+            # 逐行读取, 避免同时加载所有结果
+            raw = conn.execute("SELECT result FROM scan_tasks WHERE id = ?", (task_id,)).fetchone()[0]
+            try:
+                digest = self.results.put(json.loads(raw))
+            except (ValueError, OSError) as e:
+                self.logger.error(f"迁移任务 {task_id} 的结果失败: {e}")
+                continue
+            conn.execute(
+                "UPDATE scan_tasks SET result_hash = ?, result = NULL WHERE id = ?",
+                (digest, task_id)
+            )
             
+    def subscribe(self, listener: ChangeListener):
+        """订阅任务变更
+        
+        监听器在写操作提交后被调用(通常在存储层写线程中),
+        界面代码需自行切换到界面线程
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+            
+    def unsubscribe(self, listener: ChangeListener):
+        """取消订阅任务变更"""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+            
+    def _notify(self, task_id: int, change: str):
+        """通知所有监听器"""
+        for listener in list(self.listeners):
+            try:
+                listener(task_id, change)
+            except Exception as e:
+                self.logger.error(f"任务变更通知失败: {e}")
+                
+    def _notify_on_commit(self, future: Future, task_id: Optional[int], change: str):
+        """写操作提交成功且影响了行时通知监听器"""
+        def done(f):
+            if f.exception() is not None:
+                return
+            lastrowid, rowcount = f.result()
+            if rowcount:
+                self._notify(lastrowid if task_id is None else task_id, change)
+        future.add_done_callback(done)
+        
+    def flush(self):
+        """等待已提交的写操作落盘(需要立即读到最新状态时调用)"""
+        self.storage.flush()
+        
+    def create_task(self, name: str, target_config: Dict, scan_options: Dict = None,
+                    priority: int = 0) -> ScanTask:
+        """创建新的扫描任务"""
+        host = get_target_host(target_config)
+        now = datetime.now()
+        params = (
+            name,
+            json.dumps(target_config),
+            json.dumps(scan_options) if scan_options else None,
+            TaskStatus.PENDING.value,
+            now,
+            priority,
+            host,
+            None
+        )
+        future = self.storage.execute(INSERT_TASK_SQL, params)
+        self._notify_on_commit(future, None, 'created')
+        task_id, _ = future.result()
+        
         return ScanTask(
             id=task_id,
             name=name,
             target_config=target_config,
             scan_options=scan_options or {},
             status=TaskStatus.PENDING,
-            create_time=now
+            create_time=now,
+            priority=priority,
+            host=host
         )
         
-    def get_task(self, task_id: int) -> Optional[ScanTask]:
-        """获取任务信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM scan_tasks WHERE id = ?", (task_id,))
-            row = cursor.fetchone()
+    def create_batch(self, name: str, targets: Iterable[Dict], scan_options: Dict = None,
+                     priority: int = 0) -> Tuple[int, List[Tuple[int, str]]]:
+        """创建批量任务
+        
+        父任务只用于汇总, 每个目标写入一行子任务(名称为 "扫描 <URL>"), 全部在同一事务中提交;
+        返回父任务ID和子任务的 (ID, 主机) 列表. 没有目标时父任务直接标记为已完成
+        """
+        now = datetime.now()
+        options_json = json.dumps(scan_options) if scan_options else None
+        
+        def op(conn):
+            cursor = conn.execute(INSERT_TASK_SQL, (
+                name, json.dumps({'batch': True}), options_json,
+                TaskStatus.RUNNING.value, now, priority, '', None
+            ))
+            parent_id = cursor.lastrowid
+            conn.executemany(INSERT_TASK_SQL, (
+                (f"扫描 {target.get('url', '')}", json.dumps(target), options_json,
+                 TaskStatus.PENDING.value,
+                 now, priority, get_target_host(target), parent_id)
+                for target in targets
+            ))
+            children = conn.execute(
+                "SELECT id, host FROM scan_tasks WHERE parent_id = ? ORDER BY id",
+                (parent_id,)
+            ).fetchall()
+            if children:
+                conn.execute(
+                    "UPDATE scan_tasks SET child_count = ?, start_time = ? WHERE id = ?",
+                    (len(children), now.isoformat(), parent_id)
+                )
+            else:
+                # 没有子任务时 refresh_batch 永远不会被调用, 不能停留在运行中
+                conn.execute(
+                    "UPDATE scan_tasks SET status = ?, start_time = ?, end_time = ? WHERE id = ?",
+                    (TaskStatus.COMPLETED.value, now.isoformat(), now.isoformat(), parent_id)
+                )
+            return parent_id, children
             
-        if not row:
-            return None
+        parent_id, children = self.storage.write(op).result()
+        self._notify(parent_id, 'batch')
+        return parent_id, children
+        
+    def refresh_batch(self, parent_id: int):
+        """根据子任务状态汇总父任务状态
+        
+        仍有等待或运行中的子任务时为运行中, 否则有被停止的子任务时为已停止,
+        全部结束后为已完成
+        """
+        def op(conn):
+            counts = dict(conn.execute("""
+                SELECT status, COUNT(*) FROM scan_tasks
+                WHERE parent_id = ?
+                GROUP BY status
+            """, (parent_id,)).fetchall())
+            if counts.get(TaskStatus.PENDING.value) or counts.get(TaskStatus.RUNNING.value):
+                status, end_time = TaskStatus.RUNNING, None
+            elif counts.get(TaskStatus.STOPPED.value):
+                status, end_time = TaskStatus.STOPPED, datetime.now().isoformat()
+            else:
+                status, end_time = TaskStatus.COMPLETED, datetime.now().isoformat()
+            cursor = conn.execute(
+                "UPDATE scan_tasks SET status = ?, end_time = ? WHERE id = ? AND status != ?",
+                (status.value, end_time, parent_id, status.value)
+            )
+            return None, cursor.rowcount
+            
+        self._notify_on_commit(self.storage.write(op), parent_id, 'updated')
+        
+    def resume_batch(self, parent_id: int,
+                     running: Iterable[int] = ()) -> List[Tuple[int, int, str]]:
+        """将批量任务中未结束的子任务重置为等待中, 返回需要重新入队的 (ID, 优先级, 主机)
+        
+        running 为当前进程中仍在运行的任务ID, 这些子任务保持运行中状态
+        """
+        running = list(running)
+        
+        def op(conn):
+            conn.execute(f"""
+                UPDATE scan_tasks SET status = ?, end_time = NULL
+                WHERE parent_id = ? AND status IN (?, ?)
+                AND id NOT IN ({', '.join('?' * len(running))})
+            """, (TaskStatus.PENDING.value, parent_id,
+                  TaskStatus.RUNNING.value, TaskStatus.STOPPED.value, *running))
+            rows = conn.execute("""
+                SELECT id, priority, host FROM scan_tasks
+                WHERE parent_id = ? AND status = ?
+                ORDER BY id
+            """, (parent_id, TaskStatus.PENDING.value)).fetchall()
+            if rows:
+                conn.execute(
+                    "UPDATE scan_tasks SET status = ?, end_time = NULL WHERE id = ?",
+                    (TaskStatus.RUNNING.value, parent_id)
+                )
+            return rows
             
+        rows = self.storage.write(op).result()
+        self._notify(parent_id, 'batch')
+        return [(task_id, priority or 0, host or '') for task_id, priority, host in rows]
+        
+    def _row_to_task(self, row) -> ScanTask:
+        """将查询结果行转换为ScanTask"""
         return ScanTask(
             id=row[0],
             name=row[1],
@@ -94,91 +405,373 @@ class TaskManager:
             create_time=datetime.fromisoformat(row[5]),
             start_time=datetime.fromisoformat(row[6]) if row[6] else None,
             end_time=datetime.fromisoformat(row[7]) if row[7] else None,
-            result=json.loads(row[8]) if row[8] else None,
-            error=row[9]
+            error=row[9],
+            priority=row[10] or 0,
+            host=row[11],
+            result_hash=row[8],
+            parent_id=row[12],
+            child_count=row[13] or 0
         )
         
+    def get_task(self, task_id: int) -> Optional[ScanTask]:
+        """获取任务信息"""
+        row = self.storage.query_one(
+            f"SELECT {TASK_COLUMNS} FROM scan_tasks WHERE id = ?", (task_id,)
+        )
+        if not row:
+            return None
+            
+        return self._row_to_task(row)
+        
+    def get_task_result(self, task_id: int) -> Optional[Dict]:
+        """从结果存储中加载任务结果"""
+        row = self.storage.query_one(
+            "SELECT result_hash, result FROM scan_tasks WHERE id = ?", (task_id,)
+        )
+        if not row:
+            return None
+        if row[0]:
+            return self.results.get(row[0])
+        # 尚未迁移的旧数据
+        return json.loads(row[1]) if row[1] else None
+        
     def get_all_tasks(self) -> List[ScanTask]:
         """获取所有任务"""
-        tasks = []
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM scan_tasks ORDER BY create_time DESC")
-            for row in cursor.fetchall():
-                tasks.append(ScanTask(
-                    id=row[0],
-                    name=row[1],
-                    target_config=json.loads(row[2]),
-                    scan_options=json.loads(row[3]) if row[3] else {},
-                    status=TaskStatus(row[4]),
-                    create_time=datetime.fromisoformat(row[5]),
-                    start_time=datetime.fromisoformat(row[6]) if row[6] else None,
-                    end_time=datetime.fromisoformat(row[7]) if row[7] else None,
-                    result=json.loads(row[8]) if row[8] else None,
-                    error=row[9]
-                ))
-        return tasks
+        rows = self.storage.query(
+            f"SELECT {TASK_COLUMNS} FROM scan_tasks ORDER BY create_time DESC"
+        )
+        return [self._row_to_task(row) for row in rows]
+        
+    def get_queue_entries(self, statuses: Iterable[TaskStatus]) -> List[Tuple[int, int, str]]:
+        """按状态获取可执行任务的 (ID, 优先级, 主机), 不包含批量任务的父任务
+        
+        只读取调度所需的列, 恢复大批量任务时不解析目标配置
+        """
+        values = [status.value for status in statuses]
+        if not values:
+            return []
+            
+        placeholders = ', '.join('?' * len(values))
+        rows = self.storage.query(f"""
+            SELECT id, priority, host FROM scan_tasks
+            WHERE status IN ({placeholders}) AND child_count = 0
+            ORDER BY priority DESC, id
+        """, values)
+        return [(task_id, priority or 0, host or '') for task_id, priority, host in rows]
+        
+    def get_child_ids(self, parent_id: int, statuses: Iterable[TaskStatus]) -> List[int]:
+        """按状态获取批量任务的子任务ID"""
+        values = [status.value for status in statuses]
+        if not values:
+            return []
+            
+        placeholders = ', '.join('?' * len(values))
+        rows = self.storage.query(f"""
+            SELECT id FROM scan_tasks
+            WHERE parent_id = ? AND status IN ({placeholders})
+            ORDER BY id
+        """, [parent_id, *values])
+        return [row[0] for row in rows]
+        
+    def get_tasks_by_status(self, statuses: Iterable[TaskStatus]) -> List[ScanTask]:
+        """按状态获取任务(按优先级从高到低、创建顺序排列)"""
+        values = [status.value for status in statuses]
+        if not values:
+            return []
+            
+        placeholders = ', '.join('?' * len(values))
+        rows = self.storage.query(f"""
+            SELECT {TASK_COLUMNS} FROM scan_tasks
+            WHERE status IN ({placeholders})
+            ORDER BY priority DESC, id
+        """, values)
+        return [self._row_to_task(row) for row in rows]
+        
+    def _summary_filter(self, statuses: Iterable[TaskStatus] = None,
+                        since: datetime = None, until: datetime = None,
+                        vulnerable: bool = None, dbms: str = None,
+                        host: str = None) -> Tuple[List[str], List]:
+        """构建列表查询的过滤条件"""
+        conditions = []
+        params = []
+        if vulnerable is not None:
+            conditions.append("vulnerable = ?")
+            params.append(1 if vulnerable else 0)
+        if dbms:
+            conditions.append("dbms = ?")
+            params.append(dbms)
+        if host:
+            conditions.append("host = ?")
+            params.append(host.lower())
+        if statuses:
+            values = [status.value for status in statuses]
+            conditions.append(f"status IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if since:
+            conditions.append("create_time >= ?")
+            params.append(since.isoformat(' '))
+        if until:
+            conditions.append("create_time < ?")
+            params.append(until.isoformat(' '))
+        return conditions, params
+        
+    def list_tasks(self, limit: int = 200, after_id: int = None,
+                   statuses: Iterable[TaskStatus] = None,
+                   since: datetime = None, until: datetime = None,
+                   vulnerable: bool = None, dbms: str = None,
+                   host: str = None) -> List[TaskSummary]:
+        """分页获取任务列表(按创建顺序倒序)
+        
+        使用键集分页: 传入上一页最后一行的ID作为after_id获取下一页,
+        翻页代价与页码无关
+        """
+        conditions, params = self._summary_filter(statuses, since, until,
+                                                  vulnerable, dbms, host)
+        if after_id is not None:
+            conditions.append("id < ?")
+            params.append(after_id)
+            
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        rows = self.storage.query(f"""
+            SELECT {SUMMARY_COLUMNS} FROM scan_tasks
+            {where}
+            ORDER BY id DESC
+            LIMIT ?
+        """, params)
+        
+        return [self._row_to_summary(row) for row in rows]
+        
+    def get_task_summaries(self, task_ids: Iterable[int]) -> List[TaskSummary]:
+        """按ID批量获取任务摘要(用于增量刷新列表)"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+            
+        placeholders = ', '.join('?' * len(task_ids))
+        rows = self.storage.query(f"""
+            SELECT {SUMMARY_COLUMNS} FROM scan_tasks
+            WHERE id IN ({placeholders})
+        """, task_ids)
+        return [self._row_to_summary(row) for row in rows]
+        
+    def _row_to_summary(self, row) -> TaskSummary:
+        """将列表查询结果行转换为TaskSummary"""
+        return TaskSummary(
+            id=row[0],
+            name=row[1],
+            url=row[2] or '',
+            status=TaskStatus(row[3]),
+            create_time=datetime.fromisoformat(row[4]),
+            start_time=datetime.fromisoformat(row[5]) if row[5] else None,
+            end_time=datetime.fromisoformat(row[6]) if row[6] else None,
+            dbms=row[7],
+            vulnerable=bool(row[8]),
+            child_count=row[9] or 0
+        )
+        
+    def count_tasks(self, statuses: Iterable[TaskStatus] = None,
+                    since: datetime = None, until: datetime = None,
+                    vulnerable: bool = None, dbms: str = None,
+                    host: str = None) -> int:
+        """统计符合过滤条件的任务数"""
+        conditions, params = self._summary_filter(statuses, since, until,
+                                                  vulnerable, dbms, host)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.storage.query_one(f"SELECT COUNT(*) FROM scan_tasks {where}", params)[0]
+        
+    def count_tasks_by_status(self, status: TaskStatus) -> int:
+        """统计指定状态的任务数"""
+        row = self.storage.query_one(
+            "SELECT COUNT(*) FROM scan_tasks WHERE status = ?", (status.value,)
+        )
+        return row[0]
         
     def update_task_status(self, task_id: int, status: TaskStatus,
-                          result: Dict = None, error: str = None):
-        """更新任务状态"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            updates = ["status = ?"]
-            params = [status.value]
-            
-            if status == TaskStatus.RUNNING:
-                updates.append("start_time = ?")
-                params.append(datetime.now().isoformat())
-            elif status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.STOPPED):
-                updates.append("end_time = ?")
-                params.append(datetime.now().isoformat())
-                
-            if result is not None:
-                updates.append("result = ?")
-                params.append(json.dumps(result))
-                
-            if error is not None:
-                updates.append("error = ?")
-                params.append(error)
-                
-            params.append(task_id)
+                          result: Dict = None, error: str = None, wait: bool = False):
+        """更新任务状态
+        
+        写操作进入写队列, 与其他任务的状态更新合并在同一事务中提交;
+        wait为True时等待提交完成
+        """
+        updates = ["status = ?"]
+        params = [status.value]
+        
+        if status == TaskStatus.RUNNING:
+            updates.append("start_time = ?")
+            params.append(datetime.now().isoformat())
+        elif status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.STOPPED):
+            updates.append("end_time = ?")
+            params.append(datetime.now().isoformat())
             
-            cursor.execute(f"""
-                UPDATE scan_tasks
-                SET {', '.join(updates)}
-                WHERE id = ?
-            """, params)
+        if result is not None:
+            # 结果在调用线程中写入结果存储, 写线程只更新哈希
+            dbms, injection_count = summarize_result(result)
+            updates.append("result_hash = ?")
+            updates.append("result = NULL")
+            updates.append("dbms = ?")
+            updates.append("injection_count = ?")
+            updates.append("vulnerable = ?")
+            digest = self.results.put(result, pin=True)
+            params.extend([digest, dbms, injection_count, 1 if injection_count else 0])
             
-    def delete_task(self, task_id: int):
-        """删除任务"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM scan_tasks WHERE id = ?", (task_id,))
+        if error is not None:
+            updates.append("error = ?")
+            params.append(error)
             
-    def get_task_statistics(self) -> Dict:
-        """获取任务统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT status, COUNT(*) 
-                FROM scan_tasks 
-                GROUP BY status
-            """)
-            status_stats = dict(cursor.fetchall())
+        params.append(task_id)
+        
+        sql = f"""
+            UPDATE scan_tasks
+            SET {', '.join(updates)}
+            WHERE id = ?
+        """
+        if result is not None:
+            future = self._replace_result(task_id, sql, params, digest)
+        else:
+            future = self.storage.execute(sql, params)
+        self._notify_on_commit(future, task_id, 'updated')
+        if wait:
+            future.result()
             
-            cursor.execute("""
-                SELECT COUNT(DISTINCT json_extract(result, '$.database.type'))
-                FROM scan_tasks 
-                WHERE result IS NOT NULL
-            """)
-            db_types = cursor.fetchone()[0]
+    def start_task(self, task_id: int) -> bool:
+        """将等待中的任务置为运行中, 返回是否成功
+
+        只在任务仍为等待中时更新, 检查与更新在同一条语句中完成,
+        不会覆盖同时到达的停止操作
+        """
+        future = self.storage.execute("""
+            UPDATE scan_tasks SET status = ?, start_time = ?
+            WHERE id = ? AND status = ?
+        """, (TaskStatus.RUNNING.value, datetime.now().isoformat(), task_id,
+              TaskStatus.PENDING.value))
+        self._notify_on_commit(future, task_id, 'updated')
+        return future.result()[1] > 0
+        
+    def mark_stopped(self, task_ids: Iterable[int]):
+        """将尚未结束的任务标记为已停止, 已结束的任务保持原状态"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
             
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM scan_tasks 
-                WHERE json_extract(result, '$.injection_points') IS NOT NULL
-            """)
-            vuln_count = cursor.fetchone()[0]
+        def op(conn):
+            end_time = datetime.now().isoformat()
+            return [
+                task_id for task_id in task_ids
+                if conn.execute("""
+                    UPDATE scan_tasks SET status = ?, end_time = ?
+                    WHERE id = ? AND status IN (?, ?)
+                """, (TaskStatus.STOPPED.value, end_time, task_id,
+                      TaskStatus.PENDING.value, TaskStatus.RUNNING.value)).rowcount
+            ]
+            
+        def done(f):
+            if f.exception() is None:
+                for task_id in f.result():
+                    self._notify(task_id, 'updated')
+        self.storage.write(op).add_done_callback(done)
+        
+    def update_task_result(self, task_id: int, result: Dict):
+        """保存运行中任务的阶段性结果, 不改变任务状态"""
+        dbms, injection_count = summarize_result(result)
+        digest = self.results.put(result, pin=True)
+        future = self._replace_result(task_id, """
+            UPDATE scan_tasks
+            SET result_hash = ?, result = NULL, dbms = ?, injection_count = ?, vulnerable = ?
+            WHERE id = ?
+        """, (digest, dbms, injection_count, 1 if injection_count else 0, task_id), digest)
+        self._notify_on_commit(future, task_id, 'updated')
+        
+    def _replace_result(self, task_id: int, sql: str, params, digest: str) -> Future:
+        """执行更新 result_hash 的语句, 提交后删除不再被引用的旧结果
+
+        digest 是调用方以 pin=True 写入的新结果, 提交(或失败)后解除固定
+        """
+        def op(conn):
+            row = conn.execute(
+                "SELECT result_hash FROM scan_tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+            cursor = conn.execute(sql, params)
+            return self._unreferenced(conn, [row[0]] if row else []), cursor.rowcount
+            
+        def done(f):
+            self.results.unpin(digest)
+            self._release_results(f)
+            
+        future = self.storage.write(op)
+        future.add_done_callback(done)
+        return future
+        
+    @staticmethod
+    def _unreferenced(conn: sqlite3.Connection, digests: Iterable[str]) -> List[str]:
+        """结果可能被多个任务共享, 返回已没有任务引用的结果哈希"""
+        return [
+            digest for digest in set(filter(None, digests))
+            if not conn.execute(
+                "SELECT 1 FROM scan_tasks WHERE result_hash = ? LIMIT 1", (digest,)
+            ).fetchone()
+        ]
+        
+    def _is_referenced(self, digest: str) -> bool:
+        """已提交的任务中是否仍有引用该结果的任务"""
+        return self.storage.query_one(
+            "SELECT 1 FROM scan_tasks WHERE result_hash = ? LIMIT 1", (digest,)
+        ) is not None
+        
+    def _release_results(self, future: Future):
+        """写操作提交后删除其返回的无引用结果文件
+
+        提交前其他线程可能已写入相同内容的结果(已固定)或已提交对它的引用,
+        删除时在结果存储的锁内重新检查
+        """
+        if future.exception() is not None:
+            return
+        for digest in future.result()[0]:
+            self.results.delete(digest, self._is_referenced)
+            
+    def delete_task(self, task_id: int) -> List[int]:
+        """删除任务, 批量任务连同其子任务一起删除; 返回被删除的任务ID列表"""
+        deleted = []
+        
+        def op(conn):
+            rows = conn.execute(
+                "SELECT id, result_hash FROM scan_tasks WHERE id = ? OR parent_id = ?",
+                (task_id, task_id)
+            ).fetchall()
+            deleted[:] = [row[0] for row in rows]
+            cursor = conn.execute(
+                "DELETE FROM scan_tasks WHERE id = ? OR parent_id = ?", (task_id, task_id)
+            )
+            return self._unreferenced(conn, [row[1] for row in rows]), cursor.rowcount
+            
+        future = self.storage.write(op)
+        future.result()
+        self._release_results(future)
+        if deleted:
+            # 连同子任务删除时影响多行, 按批量变更通知
+            self._notify(task_id, 'batch' if len(deleted) > 1 else 'deleted')
+        return deleted
+            
+    def get_task_statistics(self) -> Dict:
+        """获取任务统计信息"""
+        status_stats = dict(self.storage.query("""
+            SELECT status, COUNT(*) 
+            FROM scan_tasks 
+            GROUP BY status
+        """))
+        
+        # 使用冗余列上的索引, 不再逐行解析结果JSON
+        db_types = self.storage.query_one("""
+            SELECT COUNT(DISTINCT dbms)
+            FROM scan_tasks 
+            WHERE dbms IS NOT NULL
+        """)[0]
+        
+        vuln_count = self.storage.query_one("""
+            SELECT COUNT(*) 
+            FROM scan_tasks 
+            WHERE vulnerable = 1
+        """)[0]
             
         return {
             'status_stats': status_stats,
@@ -0,0 +1,197 @@
+import atexit
+import queue
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# 写操作: 接收写连接并返回结果的函数
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+class TaskStorage:
+    """任务数据库存储层
+
+    - 读: 每个线程一个长连接(线程局部存储), 避免每次查询重新建立连接
+    - 写: 所有写操作进入同一个队列, 由唯一的写线程按批合并到一个事务中提交,
+      不会出现多个写者互相等待导致的 "database is locked"
+    - 数据库使用 WAL 日志模式, 读写互不阻塞
+    - 语句文本保持不变, 由 sqlite3 的语句缓存复用预编译语句
+
+    同一数据库文件在进程内只创建一个实例, 通过 TaskStorage.get() 获取。
+    """
+    
+    _instances: Dict[str, 'TaskStorage'] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, db_path: str, batch_size: int = 500):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.logger = logging.getLogger('task_storage')
+        
+        self.running = True
+        self.writer_thread = threading.Thread(
+            target=self._writer_loop,
+            daemon=True,
+            name="TaskStorageWriter"
+        )
+        self.writer_thread.start()
+        
+    @classmethod
+    def get(cls, db_path: str) -> 'TaskStorage':
+        """获取数据库对应的共享存储实例"""
+        with cls._instances_lock:
+            storage = cls._instances.get(db_path)
+            if storage is None or not storage.running:
+                storage = cls(db_path)
+                cls._instances[db_path] = storage
+            return storage
+            
+    def _connect(self) -> sqlite3.Connection:
+        """创建连接并设置连接参数"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            isolation_level=None,  # 事务由调用方显式控制
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+        
+    def connection(self) -> sqlite3.Connection:
+        """获取当前线程的读连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+        
+    def query(self, sql: str, params: Sequence = ()) -> list:
+        """执行查询并返回所有行"""
+        return self.connection().execute(sql, params).fetchall()
+        
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        """执行查询并返回第一行"""
+        return self.connection().execute(sql, params).fetchone()
+        
+    def write(self, op: WriteOp, wait: bool = False) -> Future:
+        """提交写操作
+
+        Args:
+            op: 在写线程中执行的函数, 参数为写连接
+            wait: 是否等待提交完成
+        Returns:
+            Future, 结果为op的返回值
+        """
+        future = Future()
+        if not self.running:
+            future.set_exception(RuntimeError("存储层已关闭"))
+            return future
+            
+        self._queue.put((op, future))
+        if wait:
+            future.result()
+        return future
+        
+    def execute(self, sql: str, params: Sequence = (), wait: bool = False) -> Future:
+        """提交单条写语句, 结果为 (lastrowid, rowcount)"""
+        def op(conn):
+            cursor = conn.execute(sql, params)
+            return cursor.lastrowid, cursor.rowcount
+        return self.write(op, wait)
+        
+    def flush(self):
+        """等待此前提交的所有写操作完成"""
+        if self.running:
+            self.write(lambda conn: None, wait=True)
+            
+    def close(self):
+        """提交剩余写操作并关闭所有连接"""
+        if not self.running:
+            return
+        self.flush()
+        self.running = False
+        self._queue.put(None)
+        self.writer_thread.join(timeout=5.0)
+        
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+            
+    def _writer_loop(self):
+        """写线程: 合并队列中的写操作, 一批一个事务"""
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+                
+            # 不额外等待, 只合并提交上一批期间积压的写操作
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # 处理完本批后退出
+                    break
+                batch.append(item)
+                
+            self._commit_batch(conn, batch)
+        conn.close()
+        
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        """在一个事务中执行一批写操作, 单个操作失败只回滚其自身"""
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op, future in batch:
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    results.append((future, op(conn), None))
+                    conn.execute("RELEASE write_op")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            self.logger.error(f"写入事务失败: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+            
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+@atexit.register
+def _close_all_storages():
+    """进程退出前提交所有未写入的数据"""
+    for storage in list(TaskStorage._instances.values()):
+        try:
+            storage.close()
+        except Exception:
+            pass
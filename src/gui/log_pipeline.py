@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class LogPipeline(QObject):
+    """扫描日志投递管道
+
+    任意线程调用 push() 写入日志行, 后台线程每隔 frame_interval 秒把积攒的行
+    合并成一帧: 全部写入磁盘日志文件, 再通过 frame_ready 信号(跨线程自动排队)
+    交给界面线程一次性追加。单帧超过 max_frame_lines 行时只显示最后的部分,
+    其余内容只保留在磁盘文件中。磁盘文件超过 max_spill_bytes 后轮转为 .1 文件,
+    只保留最近的两份。
+    """
+    
+    frame_ready = pyqtSignal(str)
+    
+    def __init__(self, spill_path: str = "logs/scan_output.log",
+                 frame_interval: float = 0.05, max_frame_lines: int = 2000,
+                 max_spill_bytes: int = 10 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.spill_path = spill_path
+        self.max_spill_bytes = max_spill_bytes
+        self.frame_interval = frame_interval
+        self.max_frame_lines = max_frame_lines
+        
+        self._lines = deque()
+        self._lock = threading.Lock()
+        self._spill_file = None
+        self.running = False
+        self.frame_thread = None
+        
+    def start(self):
+        """启动帧合并线程"""
+        if self.running:
+            return
+            
+        os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+        self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+        self.running = True
+        self.frame_thread = threading.Thread(
+            target=self._frame_loop,
+            daemon=True,
+            name="LogPipeline"
+        )
+        self.frame_thread.start()
+        
+    def stop(self):
+        """停止并写出剩余日志"""
+        if not self.running:
+            return
+        self.running = False
+        if self.frame_thread:
+            self.frame_thread.join(timeout=1.0)
+        self._emit_frame()
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+            
+    def push(self, message: str):
+        """写入一行日志(线程安全)"""
+        with self._lock:
+            self._lines.append(message)
+            
+    def _frame_loop(self):
+        """每个帧间隔合并一次日志"""
+        while self.running:
+            time.sleep(self.frame_interval)
+            try:
+                self._emit_frame()
+            except Exception as e:
+                print(f"日志投递错误: {str(e)}")
+                
+    def _emit_frame(self):
+        """取出积攒的日志行, 写盘后发送给界面"""
+        with self._lock:
+            if not self._lines:
+                return
+            lines, self._lines = self._lines, deque()
+            
+        if self._spill_file:
+            self._spill_file.write('\n'.join(lines) + '\n')
+            self._spill_file.flush()
+            if self._spill_file.tell() > self.max_spill_bytes:
+                self._rotate()
+                
+        dropped = len(lines) - self.max_frame_lines
+        if dropped > 0:
+            shown = list(lines)[dropped:]
+            shown.insert(0, f"... 省略 {dropped} 行, 完整日志见 {self.spill_path}")
+        else:
+            shown = lines
+            
+        self.frame_ready.emit('\n'.join(shown))
+        
+    def _rotate(self):
+        """轮转磁盘日志文件, 上一份覆盖旧的 .1 文件"""
+        self._spill_file.close()
+        try:
+            os.replace(self.spill_path, self.spill_path + '.1')
+        except OSError as e:
+            print(f"日志文件轮转失败: {str(e)}")
+        self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
@@ -0,0 +1,103 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit,
+                           QPushButton, QLabel, QSpinBox)
+from src.core.log_store import TaskLogStore
+
+class LogViewerDialog(QDialog):
+    PAGE_SIZE = 1000  # 每页行数
+    
+    def __init__(self, task_id: int, log_store: TaskLogStore = None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"任务日志 - {task_id}")
+        self.resize(900, 600)
+        
+        self.task_id = task_id
+        self.log_store = log_store or TaskLogStore()
+        self.task_log = None
+        self.page_start = 0
+        
+        self.setup_ui()
+        self.reload()
+        
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        
+        # 日志内容, 只显示当前页
+        self.log_edit = QPlainTextEdit()
+        self.log_edit.setReadOnly(True)
+        self.log_edit.setLineWrapMode(QPlainTextEdit.NoWrap)
+        layout.addWidget(self.log_edit)
+        
+        # 翻页工具栏
+        toolbar = QHBoxLayout()
+        self.first_btn = QPushButton("首页")
+        self.prev_btn = QPushButton("上一页")
+        self.next_btn = QPushButton("下一页")
+        self.last_btn = QPushButton("末页")
+        self.refresh_btn = QPushButton("刷新")
+        
+        self.line_spin = QSpinBox()
+        self.line_spin.setMinimum(1)
+        self.line_spin.setMaximum(1)
+        self.goto_btn = QPushButton("跳转")
+        
+        self.page_label = QLabel()
+        
+        toolbar.addWidget(self.first_btn)
+        toolbar.addWidget(self.prev_btn)
+        toolbar.addWidget(self.next_btn)
+        toolbar.addWidget(self.last_btn)
+        toolbar.addWidget(QLabel("行号:"))
+        toolbar.addWidget(self.line_spin)
+        toolbar.addWidget(self.goto_btn)
+        toolbar.addStretch()
+        toolbar.addWidget(self.page_label)
+        toolbar.addWidget(self.refresh_btn)
+        layout.addLayout(toolbar)
+        
+        self.setLayout(layout)
+        
+        # 连接信号
+        self.first_btn.clicked.connect(lambda: self.show_page(0))
+        self.prev_btn.clicked.connect(lambda: self.show_page(self.page_start - self.PAGE_SIZE))
+        self.next_btn.clicked.connect(lambda: self.show_page(self.page_start + self.PAGE_SIZE))
+        self.last_btn.clicked.connect(self.show_last_page)
+        self.goto_btn.clicked.connect(lambda: self.show_page(self.line_spin.value() - 1))
+        self.refresh_btn.clicked.connect(self.reload)
+        
+    def reload(self):
+        """重新打开日志(运行中的任务可看到最新输出)"""
+        self.task_log = self.log_store.reader(self.task_id)
+        if not self.task_log:
+            self.log_edit.setPlainText("该任务没有日志")
+            self.page_label.setText("")
+            return
+        self.show_page(self.page_start)
+        
+    def line_count(self) -> int:
+        return self.task_log.line_count if self.task_log else 0
+        
+    def show_last_page(self):
+        """显示最后一页"""
+        total = self.line_count()
+        self.show_page(max(0, total - self.PAGE_SIZE))
+        
+    def show_page(self, start: int):
+        """显示从start行开始的一页"""
+        if not self.task_log:
+            return
+            
+        total = self.line_count()
+        start = max(0, min(start, max(0, total - 1)))
+        lines = self.task_log.read_lines(start, self.PAGE_SIZE)
+        self.page_start = start
+        
+        self.log_edit.setPlainText('\n'.join(lines))
+        self.line_spin.setMaximum(max(1, total))
+        self.page_label.setText(
+            f"第 {start + 1 if lines else 0}-{start + len(lines)} 行 / 共 {total} 行"
+        )
+        
+        self.prev_btn.setEnabled(start > 0)
+        self.first_btn.setEnabled(start > 0)
+        self.next_btn.setEnabled(start + len(lines) < total)
+        self.last_btn.setEnabled(start + len(lines) < total)
@@ -2,14 +2,24 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdi
                            QPushButton, QComboBox, QCheckBox, QGroupBox,
                            QTableWidget, QTableWidgetItem, QHeaderView,
                            QMessageBox, QFileDialog, QWidget, QTabWidget,
-                           QGridLayout)
+                           QGridLayout, QProgressBar)
 from PyQt5.QtCore import Qt
 from typing import Dict, List
 from PyQt5.QtGui import QColor
+from src.gui.proxy_importer import ProxyChecker, ProxyImporter
 from src.utils.proxy_pool import ProxyPool
+from src.utils.proxy_probe import create_probe
+from src.utils.proxy_tester import ProxyTester
+
+# 代理池状态 -> (显示文本, 颜色)
+POOL_STATUS = {
+    'working': ("可用", "green"),
+    'unverified': ("待检测", "gray"),
+    'failed': ("失败", "red"),
+}
 
 class ProxyDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, proxy_pool: ProxyPool = None):
         super().__init__(parent)
         self.setWindowTitle("代理设置")
         self.resize(600, 400)
@@ -22,9 +32,13 @@ class ProxyDialog(QDialog):
         self.auth_username = ""
         self.auth_password = ""
         self.proxy_chain = []  # 添加代理链列表
-        self.proxy_pool = ProxyPool()  # 初始化代理池
+        self.proxy_pool = proxy_pool or ProxyPool()  # 沿用扫描正在使用的代理池
+        self.checker = None  # 正在进行的后台检测(导入或刷新)
+        self.pool_rows = {}  # 代理键 -> 代理池表格行号
         
         self.setup_ui()
+        if len(self.proxy_pool):
+            self.update_pool_table()
         
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -124,6 +138,11 @@ class ProxyDialog(QDialog):
         pool_toolbar.addWidget(self.export_btn)
         pool_toolbar.addWidget(self.refresh_btn)
         pool_toolbar.addStretch()
+        self.check_progress = QProgressBar()
+        self.check_progress.setFormat("检测中 %v/%m")
+        self.check_progress.setMaximumWidth(200)
+        self.check_progress.hide()
+        pool_toolbar.addWidget(self.check_progress)
         pool_layout.addLayout(pool_toolbar)
         
         # 代理池表格
@@ -153,6 +172,13 @@ class ProxyDialog(QDialog):
         switch_options.addStretch()
         settings_layout.addLayout(switch_options)
         
+        probe_options = QHBoxLayout()
+        probe_options.addWidget(QLabel("检测目标:"))
+        self.probe_edit = QLineEdit()
+        self.probe_edit.setPlaceholderText("留空只检测代理握手; 主机:端口(隧道检测) 或 http(s)://回显地址")
+        probe_options.addWidget(self.probe_edit)
+        settings_layout.addLayout(probe_options)
+        
         settings_group.setLayout(settings_layout)
         pool_layout.addWidget(settings_group)
         
@@ -230,10 +256,20 @@ class ProxyDialog(QDialog):
             auth = "是" if proxy.get('auth', {}).get('enabled') else "否"
             self.chain_table.setItem(i, 3, QTableWidgetItem(auth))
             
+    def apply_probe(self) -> bool:
+        """按检测目标设置代理检测方式"""
+        try:
+            ProxyTester.configure(create_probe(self.probe_edit.text()))
+            return True
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", str(e))
+            return False
+            
     def test_proxy(self):
         """测试代理连接"""
-        from src.utils.proxy_tester import ProxyTester
-        
+        if not self.apply_probe():
+            return
+            
         config = self.get_proxy_config()
         success, message, latency = ProxyTester.test_proxy(config)
         
@@ -268,14 +304,78 @@ class ProxyDialog(QDialog):
         return config
         
     def import_proxies(self):
-        """导入代理"""
+        """导入代理(后台检测, 检测结果逐批更新到表格); 检测过程中再次点击停止检测"""
+        if self.checker:
+            self.checker.cancel()
+            return
+            
         filename, _ = QFileDialog.getOpenFileName(
-            self, "导入代理", "", "JSON文件 (*.json)"
+            self, "导入代理", "",
+            "代理列表 (*.txt *.csv *.json *.jsonl);;文本文件 (*.txt);;CSV文件 (*.csv);;JSON文件 (*.json *.jsonl)"
         )
-        if filename:
-            self.proxy_pool.load_from_file(filename)
-            self.update_pool_table()
+        if not filename or not self.apply_probe():
+            return
+        self._start_check(ProxyImporter(self.proxy_pool, filename, parent=self), self.import_btn)
+        
+    def _start_check(self, checker: ProxyChecker, button: QPushButton):
+        """启动后台检测, 点击的按钮变为停止按钮"""
+        self.checker = checker
+        self.checker.admitted.connect(self._on_check_started)
+        self.checker.checked.connect(self._on_proxies_checked)
+        self.checker.progress.connect(self._on_check_progress)
+        self.checker.finished.connect(self._on_check_finished)
+        self.checker.failed.connect(self._on_check_failed)
+        for btn in (self.import_btn, self.refresh_btn):
+            btn.setEnabled(btn is button)
+        button.setText("停止检测")
+        self.checker.start()
+        
+    def _on_check_started(self, count: int):
+        """待检测的代理已确定(导入时新代理已以待检测状态加入代理池)"""
+        self.update_pool_table()
+        if count:
+            self.check_progress.setRange(0, count)
+            self.check_progress.setValue(0)
+            self.check_progress.show()
             
+    def _on_proxies_checked(self, proxies: list):
+        """只更新检测完成的代理所在的行"""
+        for proxy in proxies:
+            row = self.pool_rows.get(proxy.key)
+            if row is not None:
+                self._set_pool_row(row, proxy)
+        self.update_stats()
+        
+    def _on_check_progress(self, done: int, total: int):
+        self.check_progress.setMaximum(max(total, 1))
+        self.check_progress.setValue(done)
+        
+    def _end_check(self):
+        """结束检测, 恢复界面状态"""
+        self.checker = None
+        self.check_progress.hide()
+        self.import_btn.setText("导入代理")
+        self.refresh_btn.setText("刷新状态")
+        self.import_btn.setEnabled(True)
+        self.refresh_btn.setEnabled(True)
+        
+    def _on_check_finished(self, cancelled: bool):
+        self._end_check()
+        self.update_pool_table()
+        if cancelled:
+            stats = self.proxy_pool.get_stats()
+            QMessageBox.information(self, "已停止", f"检测已停止, {stats['unverified']} 个代理尚未检测")
+            
+    def _on_check_failed(self, error: str):
+        self._end_check()
+        QMessageBox.warning(self, "错误", f"导入失败: {error}")
+        
+    def done(self, result: int):
+        """关闭对话框时停止后台检测"""
+        if self.checker:
+            self.checker.cancel()
+        super().done(result)
+        
     def export_proxies(self):
         """导出代理"""
         filename, _ = QFileDialog.getSaveFileName(
@@ -285,36 +385,44 @@ class ProxyDialog(QDialog):
             self.proxy_pool.save_to_file(filename)
             
     def refresh_proxies(self):
-        """刷新代理状态"""
-        self.proxy_pool.refresh_proxies()
-        self.update_pool_table()
+        """刷新代理状态(后台检测); 检测过程中再次点击停止检测"""
+        if self.checker:
+            self.checker.cancel()
+            return
+        if not self.apply_probe():
+            return
+        self._start_check(ProxyChecker(self.proxy_pool, parent=self), self.refresh_btn)
         
     def update_pool_table(self):
         """更新代理池表格"""
-        self.pool_table.setRowCount(len(self.proxy_pool.proxies))
+        proxies = self.proxy_pool.proxies
+        self.pool_rows = {proxy.key: i for i, proxy in enumerate(proxies)}
+        self.pool_table.setRowCount(len(proxies))
         
-        for i, proxy in enumerate(self.proxy_pool.proxies):
+        for i, proxy in enumerate(proxies):
             self.pool_table.setItem(i, 0, QTableWidgetItem(proxy['type']))
             self.pool_table.setItem(i, 1, QTableWidgetItem(proxy['host']))
             self.pool_table.setItem(i, 2, QTableWidgetItem(str(proxy['port'])))
-            self.pool_table.setItem(i, 3, QTableWidgetItem(f"{proxy.get('latency', 0):.2f}"))
+            self._set_pool_row(i, proxy)
             
-            status = "可用" if proxy in self.proxy_pool.working_proxies else "失败"
-            status_item = QTableWidgetItem(status)
-            status_item.setForeground(
-                QColor("green") if status == "可用" else QColor("red")
-            )
-            self.pool_table.setItem(i, 4, status_item)
-            
-            self.pool_table.setItem(i, 5, 
-                QTableWidgetItem(str(proxy.get('fail_count', 0))))
-        
         self.update_stats()
         
+    def _set_pool_row(self, row: int, proxy):
+        """更新一行的延迟、状态和失败次数"""
+        self.pool_table.setItem(row, 3, QTableWidgetItem(f"{proxy.get('latency', 0):.2f}"))
+        
+        status, color = POOL_STATUS[self.proxy_pool.status(proxy)]
+        status_item = QTableWidgetItem(status)
+        status_item.setForeground(QColor(color))
+        self.pool_table.setItem(row, 4, status_item)
+        
+        self.pool_table.setItem(row, 5, 
+            QTableWidgetItem(str(proxy.get('fail_count', 0))))
+        
     def update_stats(self):
         """更新统计信息"""
         stats = self.proxy_pool.get_stats()
-        self.total_label.setText(f"总数: {stats['total']}")
+        self.total_label.setText(f"总数: {stats['total']} (待检测: {stats['unverified']})")
         self.working_label.setText(f"可用: {stats['working']}")
         self.failed_label.setText(f"失败: {stats['failed']}")
         self.latency_label.setText(f"平均延迟: {stats['avg_latency']:.2f}ms")
@@ -0,0 +1,108 @@
+import time
+import threading
+from typing import List
+from PyQt5.QtCore import QObject, pyqtSignal
+from src.utils.proxy_import import load_proxies
+from src.utils.proxy_pool import ProxyPool, ProxyRecord
+
+class ProxyChecker(QObject):
+    """后台检测代理池中的代理
+
+    检测线程并发检测代理, 检测结果按 interval 秒合并成批通过 checked 信号
+    交给界面线程, 每个代理通过检测后立即可以从代理池中获取。
+    """
+    
+    admitted = pyqtSignal(int)  # 待检测的代理数
+    checked = pyqtSignal(list)  # 一批已更新状态的代理
+    progress = pyqtSignal(int, int)  # 已检测数, 总数
+    finished = pyqtSignal(bool)  # 是否被取消
+    failed = pyqtSignal(str)
+    
+    def __init__(self, proxy_pool: ProxyPool, max_workers: int = 32,
+                 timeout: float = 5, interval: float = 0.2, parent=None):
+        super().__init__(parent)
+        self.proxy_pool = proxy_pool
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.interval = interval
+        self._cancelled = threading.Event()
+        self._batch = []
+        self._last_emit = 0.0
+        self.thread = None
+        
+    def start(self):
+        """启动检测线程"""
+        self.thread = threading.Thread(
+            target=self._run,
+            daemon=True,
+            name=type(self).__name__
+        )
+        self.thread.start()
+        
+    def cancel(self):
+        """停止检测, 尚未检测的代理保持原状态"""
+        self._cancelled.set()
+        
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+        
+    def _collect(self) -> List[ProxyRecord]:
+        """需要检测的代理(在检测线程中调用)"""
+        return self.proxy_pool.proxies
+        
+    def _on_result(self, proxy):
+        """检测线程中调用, 合并结果后再发信号, 避免逐个刷新表格"""
+        self._batch.append(proxy)
+        now = time.monotonic()
+        if now - self._last_emit >= self.interval:
+            self._flush(now)
+            
+    def _on_progress(self, done: int, total: int):
+        # 在 _on_result 之后调用, 只在刚发出一批结果或全部完成时更新进度
+        if done == total or not self._batch:
+            self.progress.emit(done, total)
+            
+    def _flush(self, now: float = None):
+        self._last_emit = now or time.monotonic()
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self.checked.emit(batch)
+            
+    def _run(self):
+        """检测线程"""
+        try:
+            proxies = self._collect()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.admitted.emit(len(proxies))
+        self.progress.emit(0, len(proxies))
+        
+        if proxies and not self.cancelled:
+            self._last_emit = time.monotonic()
+            self.proxy_pool.check_proxies(
+                proxies,
+                max_workers=self.max_workers,
+                timeout=self.timeout,
+                progress_callback=self._on_progress,
+                result_callback=self._on_result,
+                cancel_event=self._cancelled
+            )
+            self._flush()
+        self.finished.emit(self.cancelled)
+
+class ProxyImporter(ProxyChecker):
+    """后台导入并检测代理列表
+
+    导入线程解析文件, 把代理以待检测状态加入代理池后发出 admitted 信号,
+    随后只检测新加入的代理。
+    """
+    
+    def __init__(self, proxy_pool: ProxyPool, filename: str, **kwargs):
+        super().__init__(proxy_pool, **kwargs)
+        self.filename = filename
+        
+    def _collect(self) -> List[ProxyRecord]:
+        # 先在锁外解析整个文件, 加入代理池时只短暂持有锁
+        return self.proxy_pool.import_proxies(load_proxies(self.filename))
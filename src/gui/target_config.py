@@ -1,13 +1,17 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                            QLineEdit, QTextEdit, QPushButton, QLabel, QComboBox,
                            QMessageBox, QFileDialog, QTabWidget, QWidget,
-                           QTableWidget, QTableWidgetItem, QHeaderView)
+                           QTableView, QAbstractItemView, QHeaderView,
+                           QProgressDialog)
 from PyQt5.QtCore import Qt
 import json
 import csv
 import re
-from urllib.parse import urlparse
 from src.utils.cache_manager import CacheManager
+from src.utils.target_import import is_valid_url
+from src.utils.target_signature import TargetIndex
+from src.gui.target_importer import TargetImporter
+from src.gui.target_table_model import TargetTableModel
 
 class TargetConfigDialog(QDialog):
     def __init__(self, parent=None):
@@ -15,14 +19,14 @@ class TargetConfigDialog(QDialog):
         self.setWindowTitle("目标配置")
         self.resize(800, 600)
         
-        # 初始化缓存管理器
-        self.cache_manager = CacheManager()
+        # 使用共享的缓存管理器, 内存层在多次打开对话框之间复用
+        self.cache_manager = CacheManager.shared()
         
         # 加载缓存的配置
         self.cached_config = self.cache_manager.load_cache('target_config')
         
-        # 添加去重集合
-        self.url_set = set()
+        # 目标签名索引: 只有参数值不同的目标合并为一个
+        self.target_index = TargetIndex()
         
         self.setup_ui()
         
@@ -108,12 +112,12 @@ class TargetConfigDialog(QDialog):
         
         layout.addLayout(toolbar)
         
-        # 目标列表
-        self.target_table = QTableWidget()
-        self.target_table.setColumnCount(5)
-        self.target_table.setHorizontalHeaderLabels([
-            "URL", "方法", "Headers", "Cookie", "状态"
-        ])
+        # 目标列表, 数据保存在模型中, 视图只绘制可见行
+        self.target_model = TargetTableModel(self)
+        self.target_table = QTableView()
+        self.target_table.setModel(self.target_model)
+        self.target_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.target_table.verticalHeader().setDefaultSectionSize(22)
         header = self.target_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
@@ -132,59 +136,61 @@ class TargetConfigDialog(QDialog):
         return widget
         
     def import_targets(self):
-        """导入目标"""
+        """导入目标(后台流式读取, 分批加入表格)"""
         filename, _ = QFileDialog.getOpenFileName(
             self, "导入目标", "", 
-            "文本文件 (*.txt);;CSV文件 (*.csv);;JSON文件 (*.json)"
+            "文本文件 (*.txt);;CSV文件 (*.csv);;JSON文件 (*.json *.jsonl)"
         )
         if not filename:
             return
             
+        self.import_count = 0
+        self.import_collapsed = self.target_index.collapsed
+        self.import_progress = QProgressDialog("正在导入目标...", "取消", 0, 1000, self)
+        self.import_progress.setWindowTitle("导入目标")
+        self.import_progress.setWindowModality(Qt.WindowModal)
+        self.import_progress.setMinimumDuration(300)
+        self.import_progress.setValue(0)
+        
+        self.importer = TargetImporter(filename, parent=self)
+        self.importer.chunk_ready.connect(self._on_import_chunk)
+        self.importer.progress.connect(self.import_progress.setValue)
+        self.importer.finished.connect(self._on_import_finished)
+        self.importer.failed.connect(self._on_import_failed)
+        self.import_progress.canceled.connect(self.importer.cancel)
+        self.import_btn.setEnabled(False)
+        self.importer.start()
+        
+    def _on_import_chunk(self, targets: list):
+        """加入一批导入的目标"""
         try:
-            if filename.endswith('.txt'):
-                self._import_from_txt(filename)
-            elif filename.endswith('.csv'):
-                self._import_from_csv(filename)
-            elif filename.endswith('.json'):
-                self._import_from_json(filename)
-                
-            QMessageBox.information(self, "成功", "目标导入成功")
-            
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"导入失败: {str(e)}")
-            
-    def _import_from_txt(self, filename: str):
-        """从文本文件导入"""
-        with open(filename, 'r', encoding='utf-8') as f:
-            urls = f.readlines()
+            if not self.importer.cancelled:
+                before = self.target_model.rowCount()
+                self._add_targets_to_table(targets)
+                self.import_count += self.target_model.rowCount() - before
+                self.import_progress.setLabelText(f"正在导入目标... 已导入 {self.import_count} 个")
+        finally:
+            self.importer.chunk_done()
             
-        for url in urls:
-            url = url.strip()
-            if url and self._is_valid_url(url):
-                self._add_target_to_table({
-                    'url': url,
-                    'method': 'GET'
-                })
-                
-    def _import_from_csv(self, filename: str):
-        """从CSV文件导入"""
-        with open(filename, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if 'url' in row and self._is_valid_url(row['url']):
-                    self._add_target_to_table(row)
-                    
-    def _import_from_json(self, filename: str):
-        """从JSON文件导入"""
-        with open(filename, 'r', encoding='utf-8') as f:
-            targets = json.load(f)
+    def _end_import(self):
+        """结束导入, 恢复界面状态"""
+        self.import_progress.canceled.disconnect(self.importer.cancel)
+        self.import_progress.close()
+        self.import_btn.setEnabled(True)
+        
+    def _on_import_finished(self, cancelled: bool):
+        self._end_import()
+        collapsed = self.target_index.collapsed - self.import_collapsed
+        summary = f"{self.import_count} 个目标, 合并 {collapsed} 个仅参数值不同的相似目标"
+        if cancelled:
+            QMessageBox.information(self, "已取消", f"导入已取消, 已导入 {summary}")
+        else:
+            QMessageBox.information(self, "成功", f"目标导入成功, 共导入 {summary}")
             
-        if isinstance(targets, list):
-            for target in targets:
-                if isinstance(target, dict) and 'url' in target:
-                    if self._is_valid_url(target['url']):
-                        self._add_target_to_table(target)
-                        
+    def _on_import_failed(self, error: str):
+        self._end_import()
+        QMessageBox.warning(self, "错误", f"导入失败: {error}")
+        
     def export_targets(self):
         """导出目标"""
         filename, _ = QFileDialog.getSaveFileName(
@@ -195,7 +201,7 @@ class TargetConfigDialog(QDialog):
             return
             
         try:
-            targets = self._get_targets_from_table()
+            targets = self.target_model.targets()
             
             if filename.endswith('.csv'):
                 self._export_to_csv(filename, targets)
@@ -221,7 +227,7 @@ class TargetConfigDialog(QDialog):
     def _export_to_json(self, filename: str, targets: list):
         """导出为JSON文件"""
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(targets, f, indent=4, ensure_ascii=False)
+            json.dump(list(targets), f, indent=4, ensure_ascii=False)
             
     def add_target(self):
         """添加目标"""
@@ -245,73 +251,51 @@ class TargetConfigDialog(QDialog):
         
     def remove_target(self):
         """删除目标"""
-        current_row = self.target_table.currentRow()
-        if current_row >= 0:
-            self.target_table.removeRow(current_row)
+        rows = [index.row() for index in self.target_table.selectionModel().selectedRows()]
+        if not rows and self.target_table.currentIndex().isValid():
+            rows = [self.target_table.currentIndex().row()]
+        for record in self.target_model.remove_rows(rows):
+            self.target_index.discard(record.to_dict())
             
     def clear_targets(self):
         """清空目标"""
-        self.target_table.setRowCount(0)
+        self.target_model.clear()
+        self.target_index.clear()
         
     def _add_target_to_table(self, target: dict):
         """添加目标到表格"""
-        url = target['url']
+        self._add_targets_to_table([target])
         
-        # URL去重
-        if url in self.url_set:
+    def _add_targets_to_table(self, targets: list):
+        """批量添加目标到表格, 缓存读写合并为一次批量操作"""
+        # 按签名去重(包括本批内部的重复), 只有参数值不同的目标只保留第一个
+        new_targets = [target for target in targets if self.target_index.add(target)]
+        if not new_targets:
             return
-        
+            
         # 检查缓存
-        cache_key = self.cache_manager._get_cache_key(target)
-        cached_data = self.cache_manager.get(cache_key)
-        if cached_data:
-            target.update(cached_data)
-        
-        row = self.target_table.rowCount()
-        self.target_table.insertRow(row)
-        
-        self.target_table.setItem(row, 0, QTableWidgetItem(url))
-        self.target_table.setItem(row, 1, QTableWidgetItem(
-            target.get('method', 'GET')))
-        self.target_table.setItem(row, 2, QTableWidgetItem(
-            target.get('headers', '')))
-        self.target_table.setItem(row, 3, QTableWidgetItem(
-            target.get('cookie', '')))
-        self.target_table.setItem(row, 4, QTableWidgetItem("待扫描"))
-        
-        # 添加到去重集合
-        self.url_set.add(url)
+        cache_keys = [self.cache_manager._get_cache_key(target) for target in new_targets]
+        cached = self.cache_manager.get_many(cache_keys)
+        
+        for target, cache_key in zip(new_targets, cache_keys):
+            cached_data = cached.get(cache_key)
+            if cached_data:
+                target.update(cached_data)
+        self.target_model.add_targets(new_targets)
         
         # 缓存配置
-        self.cache_manager.set(cache_key, target)
-        
-    def _get_targets_from_table(self) -> list:
-        """从表格获取目标列表"""
-        targets = []
-        for row in range(self.target_table.rowCount()):
-            target = {
-                'url': self.target_table.item(row, 0).text(),
-                'method': self.target_table.item(row, 1).text(),
-                'headers': self.target_table.item(row, 2).text(),
-                'cookie': self.target_table.item(row, 3).text()
-            }
-            targets.append(target)
-        return targets
+        self.cache_manager.set_many(zip(cache_keys, new_targets))
         
     def _is_valid_url(self, url: str) -> bool:
         """验证URL格式"""
-        try:
-            result = urlparse(url)
-            return all([result.scheme, result.netloc])
-        except:
-            return False
+        return is_valid_url(url)
             
     def get_config(self) -> dict:
         """获取配置"""
-        # 如果在批量目标选项卡
-        if self.target_table.rowCount() > 0:
+        # 如果在批量目标选项卡, 目标以惰性序列的形式交给调度器逐个读取
+        if self.target_model.rowCount() > 0:
             return {
-                'targets': self._get_targets_from_table()
+                'targets': self.target_model.targets()
             }
             
         # 如果在单一目标选项卡
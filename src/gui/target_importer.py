@@ -0,0 +1,66 @@
+import os
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from src.utils.target_import import iter_target_chunks
+
+class TargetImporter(QObject):
+    """后台导入目标文件
+
+    读取线程逐批解析文件并通过 chunk_ready 信号(跨线程自动排队)把目标交给界面线程,
+    界面线程处理完一批后调用 chunk_done(), 在途批次达到 max_pending 时读取线程等待,
+    避免界面处理不过来时把整个文件堆积在信号队列中。
+    """
+    
+    chunk_ready = pyqtSignal(list)
+    progress = pyqtSignal(int)  # 按已读取字节计算的进度(千分比)
+    finished = pyqtSignal(bool)  # 是否被取消
+    failed = pyqtSignal(str)
+    
+    def __init__(self, filename: str, chunk_size: int = 1000, max_pending: int = 4,
+                 parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self._slots = threading.Semaphore(max_pending)
+        self._cancelled = threading.Event()
+        self.thread = None
+        
+    def start(self):
+        """启动读取线程"""
+        self.thread = threading.Thread(
+            target=self._run,
+            daemon=True,
+            name="TargetImporter"
+        )
+        self.thread.start()
+        
+    def cancel(self):
+        """取消导入"""
+        self._cancelled.set()
+        self._slots.release()  # 唤醒可能在等待的读取线程
+        
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+        
+    def chunk_done(self):
+        """界面线程处理完一批目标"""
+        self._slots.release()
+        
+    def _run(self):
+        """读取线程"""
+        try:
+            total = os.path.getsize(self.filename) or 1
+            for chunk, done in iter_target_chunks(self.filename, self.chunk_size):
+                self._slots.acquire()
+                if self.cancelled:
+                    break
+                if chunk:
+                    self.chunk_ready.emit(chunk)
+                else:
+                    self._slots.release()
+                self.progress.emit(done * 1000 // total)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(self.cancelled)
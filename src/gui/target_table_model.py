@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, Iterator, List
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+class TargetRecord:
+    """批量目标的一行, 使用 __slots__ 减少每行的内存占用"""
+    __slots__ = ('url', 'method', 'headers', 'cookie', 'status')
+    
+    def __init__(self, url: str, method: str = 'GET', headers: str = '',
+                 cookie: str = '', status: str = '待扫描'):
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.cookie = cookie
+        self.status = status
+        
+    @classmethod
+    def from_dict(cls, target: Dict) -> 'TargetRecord':
+        return cls(
+            target['url'],
+            target.get('method') or 'GET',
+            target.get('headers') or '',
+            target.get('cookie') or ''
+        )
+        
+    def to_dict(self) -> Dict:
+        return {
+            'url': self.url,
+            'method': self.method,
+            'headers': self.headers,
+            'cookie': self.cookie
+        }
+
+class TargetSequence:
+    """目标配置的惰性序列
+
+    保存记录列表的快照, 每次迭代时才逐个生成目标字典, 可以重复迭代
+    """
+    
+    def __init__(self, records: List[TargetRecord]):
+        self.records = records
+        
+    def __iter__(self) -> Iterator[Dict]:
+        return (record.to_dict() for record in self.records)
+        
+    def __len__(self) -> int:
+        return len(self.records)
+
+class TargetTableModel(QAbstractTableModel):
+    """批量目标表格模型, 视图只为可见行请求数据"""
+    
+    HEADERS = ["URL", "方法", "Headers", "Cookie", "状态"]
+    FIELDS = ('url', 'method', 'headers', 'cookie', 'status')
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records: List[TargetRecord] = []
+        
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.records)
+        
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return getattr(self.records[index.row()], self.FIELDS[index.column()])
+        return None
+        
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() < 4:
+            flags |= Qt.ItemIsEditable
+        return flags
+        
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or index.column() >= 4:
+            return False
+        setattr(self.records[index.row()], self.FIELDS[index.column()], str(value))
+        self.dataChanged.emit(index, index)
+        return True
+        
+    def add_targets(self, targets: Iterable[Dict]):
+        """在末尾追加目标"""
+        records = [TargetRecord.from_dict(target) for target in targets]
+        if not records:
+            return
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        self.records.extend(records)
+        self.endInsertRows()
+        
+    def remove_rows(self, rows: Iterable[int]) -> List[TargetRecord]:
+        """删除指定行, 返回被删除的记录"""
+        removed = []
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            removed.append(self.records.pop(row))
+            self.endRemoveRows()
+        return removed
+        
+    def clear(self):
+        """清空所有目标"""
+        self.beginResetModel()
+        self.records = []
+        self.endResetModel()
+        
+    def targets(self) -> TargetSequence:
+        """获取目标的惰性序列"""
+        return TargetSequence(list(self.records))
@@ -1,26 +1,47 @@
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
-                           QTableWidgetItem, QPushButton, QLabel, QMessageBox,
-                           QMenu, QTabWidget, QWidget, QProgressBar)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableView,
+                           QAbstractItemView, QPushButton, QLabel, QMessageBox,
+                           QMenu, QTabWidget, QWidget, QComboBox, QCheckBox)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from src.core.task_manager import TaskManager, TaskStatus
+from src.gui.task_table_model import TaskTableModel
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# 时间范围过滤选项: (显示名称, 时间跨度)
+TIME_RANGES = [
+    ("全部时间", None),
+    ("最近24小时", timedelta(days=1)),
+    ("最近7天", timedelta(days=7)),
+    ("最近30天", timedelta(days=30)),
+]
 
 class TaskDialog(QDialog):
+    # 任务变更信号: (任务ID, 变更类型), 用于把存储层线程的通知转到界面线程
+    task_changed = pyqtSignal(int, str)
+    
+    CHANGE_DELAY = 300  # 合并变更的延迟(毫秒)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("任务管理")
         self.resize(1000, 600)
-        self.task_manager = TaskManager()
+        # 复用主窗口的任务管理器, 避免重复初始化数据库
+        self.task_manager = getattr(parent, 'task_manager', None) or TaskManager()
+        self.last_stats = None  # 上次绘制图表时的统计数据
         self.setup_ui()
         self.load_tasks()
         
-        # 定时刷新
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_tasks)
-        self.timer.start(5000)  # 每5秒刷新一次
+        # 订阅任务变更, 只在有变化时增量刷新
+        self.changed_ids = set()
+        self.deleted_ids = set()
+        self.reload_pending = False
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.timeout.connect(self.apply_changes)
+        self.task_changed.connect(self.queue_change)
+        self.change_listener = self.task_changed.emit
+        self.task_manager.subscribe(self.change_listener)
         
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -32,12 +53,33 @@ class TaskDialog(QDialog):
         task_tab = QWidget()
         task_layout = QVBoxLayout(task_tab)
         
-        # 任务表格
-        self.task_table = QTableWidget()
-        self.task_table.setColumnCount(7)
-        self.task_table.setHorizontalHeaderLabels([
-            "ID", "名称", "目标", "状态", "创建时间", "开始时间", "完成时间"
-        ])
+        # 过滤条件
+        filter_layout = QHBoxLayout()
+        self.status_combo = QComboBox()
+        self.status_combo.addItem("全部状态", None)
+        for status in TaskStatus:
+            self.status_combo.addItem(status.value, status)
+        self.time_combo = QComboBox()
+        for label, span in TIME_RANGES:
+            self.time_combo.addItem(label, span)
+        self.vulnerable_check = QCheckBox("仅显示存在漏洞")
+        self.count_label = QLabel()
+        filter_layout.addWidget(QLabel("状态:"))
+        filter_layout.addWidget(self.status_combo)
+        filter_layout.addWidget(QLabel("时间:"))
+        filter_layout.addWidget(self.time_combo)
+        filter_layout.addWidget(self.vulnerable_check)
+        filter_layout.addStretch()
+        filter_layout.addWidget(self.count_label)
+        task_layout.addLayout(filter_layout)
+        
+        # 任务表格, 滚动到底部时按页加载
+        self.task_model = TaskTableModel(self.task_manager, parent=self)
+        self.task_table = QTableView()
+        self.task_table.setModel(self.task_model)
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.task_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.task_table.verticalHeader().setVisible(False)
         self.task_table.setContextMenuPolicy(Qt.CustomContextMenu)
         task_layout.addWidget(self.task_table)
         
@@ -76,42 +118,73 @@ class TaskDialog(QDialog):
         self.refresh_btn.clicked.connect(self.refresh_tasks)
         self.delete_btn.clicked.connect(self.delete_selected_task)
         self.export_btn.clicked.connect(self.export_selected_result)
+        self.status_combo.currentIndexChanged.connect(self.apply_filter)
+        self.time_combo.currentIndexChanged.connect(self.apply_filter)
+        self.vulnerable_check.stateChanged.connect(self.apply_filter)
         
-    def load_tasks(self):
-        """加载所有任务"""
-        tasks = self.task_manager.get_all_tasks()
-        self.task_table.setRowCount(len(tasks))
-        
-        for i, task in enumerate(tasks):
-            self.task_table.setItem(i, 0, QTableWidgetItem(str(task.id)))
-            self.task_table.setItem(i, 1, QTableWidgetItem(task.name))
-            self.task_table.setItem(i, 2, QTableWidgetItem(task.target_config.get('url', '')))
-            self.task_table.setItem(i, 3, QTableWidgetItem(task.status.value))
-            self.task_table.setItem(i, 4, QTableWidgetItem(task.create_time.strftime("%Y-%m-%d %H:%M:%S")))
-            self.task_table.setItem(i, 5, QTableWidgetItem(
-                task.start_time.strftime("%Y-%m-%d %H:%M:%S") if task.start_time else ""
-            ))
-            self.task_table.setItem(i, 6, QTableWidgetItem(
-                task.end_time.strftime("%Y-%m-%d %H:%M:%S") if task.end_time else ""
-            ))
-            
-            # 设置状态颜色
-            status_item = self.task_table.item(i, 3)
-            if task.status == TaskStatus.COMPLETED:
-                status_item.setBackground(QColor(200, 255, 200))
-            elif task.status == TaskStatus.FAILED:
-                status_item.setBackground(QColor(255, 200, 200))
-            elif task.status == TaskStatus.RUNNING:
-                status_item.setBackground(QColor(200, 200, 255))
-                
-        self.task_table.resizeColumnsToContents()
+    def load_tasks(self, keep_loaded: bool = False):
+        """加载任务列表(只加载第一页, 其余滚动时再加载)"""
+        self.task_model.reload(keep_loaded)
+        if not keep_loaded:
+            self.task_table.resizeColumnsToContents()
+        self.count_label.setText(f"共 {self.task_model.total_count()} 个任务")
         
         # 更新统计信息
         self.update_statistics()
         
+    def queue_change(self, task_id: int, change: str):
+        """记录任务变更, 短时间内的多次变更合并处理"""
+        if change == 'batch':
+            # 批量任务一次影响大量行, 直接重新加载而不是逐行刷新
+            self.reload_pending = True
+        elif change == 'deleted':
+            self.deleted_ids.add(task_id)
+            self.changed_ids.discard(task_id)
+        else:
+            self.changed_ids.add(task_id)
+        if not self.change_timer.isActive():
+            self.change_timer.start(self.CHANGE_DELAY)
+            
+    def apply_changes(self):
+        """只重新读取发生变化的任务并更新列表与统计信息"""
+        changed_ids, self.changed_ids = self.changed_ids, set()
+        deleted_ids, self.deleted_ids = self.deleted_ids, set()
+        if self.reload_pending:
+            self.reload_pending = False
+            self.load_tasks(keep_loaded=True)
+            return
+            
+        tasks = self.task_manager.get_task_summaries(changed_ids)
+        self.task_model.apply_changes(tasks, deleted_ids)
+        self.count_label.setText(f"共 {self.task_model.total_count()} 个任务")
+        self.update_statistics()
+        
+    def done(self, result):
+        """关闭对话框时取消订阅"""
+        self.task_manager.unsubscribe(self.change_listener)
+        self.change_timer.stop()
+        super().done(result)
+        
+    def apply_filter(self):
+        """按状态和时间范围过滤任务"""
+        status = self.status_combo.currentData()
+        span = self.time_combo.currentData()
+        self.task_model.statuses = [status] if status else None
+        self.task_model.since = datetime.now() - span if span else None
+        self.task_model.vulnerable = True if self.vulnerable_check.isChecked() else None
+        self.load_tasks()
+        
+    def selected_task_ids(self):
+        """获取选中行的任务ID"""
+        return [self.task_model.task_id(index.row())
+                for index in self.task_table.selectionModel().selectedRows()]
+        
     def update_statistics(self):
-        """更新统计信息"""
+        """更新统计信息, 统计数据没有变化时不重绘图表"""
         stats = self.task_manager.get_task_statistics()
+        if stats == self.last_stats:
+            return
+        self.last_stats = stats
         
         # 清除旧图表
         self.ax1.clear()
@@ -151,39 +224,97 @@ class TaskDialog(QDialog):
         """显示右键菜单"""
         menu = QMenu()
         view_action = menu.addAction("查看详情")
+        analysis_action = menu.addAction("分析结果")
+        log_action = menu.addAction("查看日志")
         stop_action = menu.addAction("停止")
+        resume_action = menu.addAction("恢复批量任务")
         delete_action = menu.addAction("删除")
         
-        action = menu.exec_(self.task_table.mapToGlobal(pos))
+        index = self.task_table.indexAt(pos)
+        if not index.isValid():
+            return
+        resume_action.setEnabled(self.task_model.is_batch(index.row()))
+            
+        action = menu.exec_(self.task_table.viewport().mapToGlobal(pos))
         if not action:
             return
             
-        row = self.task_table.currentRow()
-        task_id = int(self.task_table.item(row, 0).text())
+        task_id = self.task_model.task_id(index.row())
         
         if action == view_action:
             self.view_task_details(task_id)
+        elif action == analysis_action:
+            self.view_task_analysis(task_id)
+        elif action == log_action:
+            self.view_task_log(task_id)
         elif action == stop_action:
             self.stop_task(task_id)
+        elif action == resume_action:
+            self.resume_batch(task_id)
         elif action == delete_action:
             self.delete_task(task_id)
             
     def view_task_details(self, task_id):
         """查看任务详情"""
-        task = self.task_manager.get_task(task_id)
-        if not task:
+        result = self.task_manager.get_task_result(task_id)
+        if not result:
+            QMessageBox.information(self, "提示", "该任务没有扫描结果")
             return
             
         from src.gui.result_dialog import ResultDialog
-        dialog = ResultDialog(task.result, self)
+        dialog = ResultDialog(result, self)
+        dialog.exec_()
+        
+    def view_task_analysis(self, task_id):
+        """分析任务结果"""
+        result = self.task_manager.get_task_result(task_id)
+        if not result:
+            QMessageBox.information(self, "提示", "该任务没有扫描结果")
+            return
+            
+        from src.gui.analysis_dialog import AnalysisDialog
+        dialog = AnalysisDialog(result, self)
+        dialog.exec_()
+        
+    def view_task_log(self, task_id):
+        """分页查看任务日志"""
+        from src.gui.log_viewer_dialog import LogViewerDialog
+        dialog = LogViewerDialog(task_id, self._get_log_store(), self)
         dialog.exec_()
         
+    def _get_log_store(self):
+        """优先使用主窗口SQLMap包装器的日志存储, 以便看到运行中任务的最新输出"""
+        sqlmap = getattr(self.parent(), 'sqlmap', None)
+        if sqlmap:
+            return sqlmap.log_store
+        from src.core.log_store import TaskLogStore
+        return TaskLogStore()
+        
     def stop_task(self, task_id):
         """停止任务"""
         task = self.task_manager.get_task(task_id)
-        if task and task.status == TaskStatus.RUNNING:
+        if not task or task.status not in (TaskStatus.PENDING, TaskStatus.RUNNING):
+            return
+            
+        # 通过主窗口的SQLMap包装器结束该任务对应的进程
+        sqlmap = getattr(self.parent(), 'sqlmap', None)
+        if sqlmap:
+            sqlmap.stop_scan(task_id)
+        else:
             self.task_manager.update_task_status(task_id, TaskStatus.STOPPED)
-            self.refresh_tasks()
+            
+    def resume_batch(self, task_id):
+        """恢复批量任务中未完成的目标"""
+        sqlmap = getattr(self.parent(), 'sqlmap', None)
+        if not sqlmap:
+            QMessageBox.information(self, "提示", "请在主窗口中恢复批量任务")
+            return
+            
+        count = sqlmap.resume_batch(task_id)
+        if count:
+            QMessageBox.information(self, "提示", f"已恢复 {count} 个未完成的目标")
+        else:
+            QMessageBox.information(self, "提示", "该批量任务没有未完成的目标")
             
     def delete_task(self, task_id):
         """删除任务"""
@@ -194,41 +325,37 @@ class TaskDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            self.task_manager.delete_task(task_id)
-            self.refresh_tasks()
+            log_store = self._get_log_store()
+            for deleted_id in self.task_manager.delete_task(task_id):
+                log_store.delete(deleted_id)
             
     def refresh_tasks(self):
-        """刷新任务列表"""
-        self.load_tasks()
+        """刷新任务列表, 保留已加载的行数"""
+        self.load_tasks(keep_loaded=True)
         
     def delete_selected_task(self):
         """删除选中的任务"""
-        rows = set(item.row() for item in self.task_table.selectedItems())
-        if not rows:
+        task_ids = self.selected_task_ids()
+        if not task_ids:
             return
             
         reply = QMessageBox.question(
             self, "确认删除",
-            f"确定要删除选中的 {len(rows)} 个任务吗？",
+            f"确定要删除选中的 {len(task_ids)} 个任务吗？",
             QMessageBox.Yes | QMessageBox.No
         )
         
         if reply == QMessageBox.Yes:
-            for row in rows:
-                task_id = int(self.task_table.item(row, 0).text())
-                self.task_manager.delete_task(task_id)
-            self.refresh_tasks()
+            log_store = self._get_log_store()
+            for task_id in task_ids:
+                for deleted_id in self.task_manager.delete_task(task_id):
+                    log_store.delete(deleted_id)
             
     def export_selected_result(self):
         """导出选中任务的结果"""
-        rows = set(item.row() for item in self.task_table.selectedItems())
-        if not rows:
-            return
-            
-        for row in rows:
-            task_id = int(self.task_table.item(row, 0).text())
-            task = self.task_manager.get_task(task_id)
-            if task and task.result:
+        for task_id in self.selected_task_ids():
+            result = self.task_manager.get_task_result(task_id)
+            if result:
                 from src.gui.result_dialog import ResultDialog
-                dialog = ResultDialog(task.result, self)
+                dialog = ResultDialog(result, self)
                 dialog.export_json() 
\ No newline at end of file
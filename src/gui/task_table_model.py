@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from datetime import datetime
+from typing import Iterable, List, Optional
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from src.core.task_manager import TaskManager, TaskStatus, TaskSummary
+
+STATUS_COLORS = {
+    TaskStatus.COMPLETED: QColor(200, 255, 200),
+    TaskStatus.FAILED: QColor(255, 200, 200),
+    TaskStatus.RUNNING: QColor(200, 200, 255),
+}
+
+class TaskTableModel(QAbstractTableModel):
+    """任务列表模型
+
+    只在视图滚动到底部时按页向数据库请求下一页(canFetchMore/fetchMore),
+    内存中只保存已加载行的摘要信息。
+    """
+    
+    HEADERS = ["ID", "名称", "目标", "状态", "创建时间", "开始时间", "完成时间"]
+    
+    def __init__(self, task_manager: TaskManager, page_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.task_manager = task_manager
+        self.page_size = page_size
+        self.rows: List[TaskSummary] = []
+        self.exhausted = False
+        
+        # 过滤条件
+        self.statuses: Optional[List[TaskStatus]] = None
+        self.since: Optional[datetime] = None
+        self.until: Optional[datetime] = None
+        self.vulnerable: Optional[bool] = None
+        
+    def _fetch(self, limit: int, after_id: int = None) -> List[TaskSummary]:
+        return self.task_manager.list_tasks(
+            limit=limit,
+            after_id=after_id,
+            statuses=self.statuses,
+            since=self.since,
+            until=self.until,
+            vulnerable=self.vulnerable
+        )
+        
+    def reload(self, keep_loaded: bool = False):
+        """重新加载列表
+
+        keep_loaded为True时一次取回与当前已加载行数相同的行, 用于刷新时保持滚动位置
+        """
+        limit = max(self.page_size, len(self.rows)) if keep_loaded else self.page_size
+        rows = self._fetch(limit)
+        
+        self.beginResetModel()
+        self.rows = rows
+        self.exhausted = len(rows) < limit
+        self.endResetModel()
+        
+    def total_count(self) -> int:
+        """符合过滤条件的任务总数"""
+        return self.task_manager.count_tasks(self.statuses, self.since, self.until,
+                                             self.vulnerable)
+        
+    def task_id(self, row: int) -> int:
+        return self.rows[row].id
+        
+    def is_batch(self, row: int) -> bool:
+        """该行是否为批量任务的父任务"""
+        return self.rows[row].child_count > 0
+        
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+        
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+            
+        task = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(task.id)
+            elif column == 1:
+                return task.name
+            elif column == 2:
+                return task.url
+            elif column == 3:
+                return task.status.value
+            elif column == 4:
+                return task.create_time.strftime("%Y-%m-%d %H:%M:%S")
+            elif column == 5:
+                return task.start_time.strftime("%Y-%m-%d %H:%M:%S") if task.start_time else ""
+            elif column == 6:
+                return task.end_time.strftime("%Y-%m-%d %H:%M:%S") if task.end_time else ""
+        elif role == Qt.BackgroundRole and column == 3:
+            return STATUS_COLORS.get(task.status)
+        elif role == Qt.UserRole:
+            return task.id
+        return None
+        
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self.exhausted
+        
+    def fetchMore(self, parent=QModelIndex()):
+        """加载下一页"""
+        if parent.isValid() or self.exhausted:
+            return
+            
+        after_id = self.rows[-1].id if self.rows else None
+        page = self._fetch(self.page_size, after_id)
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+            
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+        
+    def matches(self, task: TaskSummary) -> bool:
+        """任务是否符合当前过滤条件"""
+        if self.statuses and task.status not in self.statuses:
+            return False
+        if self.since and task.create_time < self.since:
+            return False
+        if self.until and task.create_time >= self.until:
+            return False
+        if self.vulnerable is not None and task.vulnerable != self.vulnerable:
+            return False
+        return True
+        
+    def apply_changes(self, tasks: Iterable[TaskSummary], deleted_ids: Iterable[int] = ()):
+        """增量应用任务变更, 只更新受影响的行
+        
+        tasks为新建或更新后的任务摘要, deleted_ids为已删除的任务ID
+        """
+        positions = {task.id: row for row, task in enumerate(self.rows)}
+        removed = {positions[task_id] for task_id in deleted_ids if task_id in positions}
+        inserted = []
+        
+        for task in tasks:
+            row = positions.get(task.id)
+            if not self.matches(task):
+                if row is not None:
+                    removed.add(row)
+            elif row is not None:
+                self.rows[row] = task
+                self.dataChanged.emit(self.index(row, 0),
+                                      self.index(row, len(self.HEADERS) - 1))
+            else:
+                inserted.append(task)
+                
+        # 从后往前删除, 保证前面的行号不变
+        for row in sorted(removed, reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+            
+        # 新行按ID倒序插入; 比已加载的最后一行更早的行留给fetchMore加载
+        for task in sorted(inserted, key=lambda t: t.id, reverse=True):
+            keys = [-t.id for t in self.rows]
+            row = bisect_left(keys, -task.id)
+            if row == len(self.rows) and not self.exhausted:
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.insert(row, task)
+            self.endInsertRows()
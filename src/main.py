@@ -1,27 +1,23 @@
 from PyQt5.QtWidgets import (QMainWindow, QApplication, QWidget, QVBoxLayout, 
                            QHBoxLayout, QPushButton, QTextEdit, QTabWidget,
                            QStatusBar, QAction, QMenuBar, QLabel)
-from PyQt5.QtCore import Qt
-from src.gui.target_config import TargetConfigDialog
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QTextCursor
 from src.core.sqlmap_wrapper import SQLMapWrapper
-from src.gui.tamper_dialog import TamperDialog
-from src.gui.decoder_dialog import DecoderDialog
-from src.gui.advanced_dialog import AdvancedDialog
-from src.gui.result_dialog import ResultDialog
-from src.gui.task_dialog import TaskDialog
 from src.core.task_manager import TaskManager, TaskStatus
-from src.gui.advanced_options_dialog import AdvancedOptionsDialog
-from src.gui.config_dialog import ConfigDialog
-from src.gui.analysis_dialog import AnalysisDialog
-from src.gui.proxy_dialog import ProxyDialog
-from src.core.proxy_presets import PROXY_PRESETS
-from src.utils.proxy_monitor import ProxyMonitor
 from typing import Dict
 from src.core.performance_manager import PerformanceManager, PerformanceMetrics
+from src.gui.log_pipeline import LogPipeline
 import os
 import shutil
 
 class MainWindow(QMainWindow):
+    MAX_LOG_LINES = 5000  # 日志选项卡保留的最大行数
+    
+    # 扫描回调在调度器槽位线程中调用, 通过信号(跨线程自动排队)切换到界面线程
+    scan_completed = pyqtSignal(object)
+    scan_failed = pyqtSignal(str)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SQLMap GUI - 零漏安全出品")
@@ -36,18 +32,23 @@ class MainWindow(QMainWindow):
         # 启动监控
         self._start_monitoring()
         
+        # 提示上次遗留的未完成任务
+        self._check_pending_tasks()
+        
     def _init_components(self):
         """初始化组件"""
         try:
             # 初始化性能管理器
             self.performance_manager = PerformanceManager()
             
-            # 初始化SQLMap包装器
-            self.sqlmap = SQLMapWrapper()
-            
             # 初始化任务管理器
             self.task_manager = TaskManager()
             
+            # 初始化SQLMap包装器(与界面共用任务管理器)
+            self.sqlmap = SQLMapWrapper(task_manager=self.task_manager)
+            self.scan_completed.connect(self._on_scan_completed)
+            self.scan_failed.connect(self._on_scan_failed)
+            
         except Exception as e:
             print(f"组件初始化失败: {str(e)}")
             raise
@@ -90,6 +91,8 @@ class MainWindow(QMainWindow):
         self.tab_widget = QTabWidget()
         self.log_tab = QTextEdit()
         self.log_tab.setReadOnly(True)
+        # 只保留最近的日志行, 完整日志由日志管道写入磁盘
+        self.log_tab.document().setMaximumBlockCount(self.MAX_LOG_LINES)
         self.results_tab = QTextEdit()
         self.results_tab.setReadOnly(True)
         
@@ -112,6 +115,11 @@ class MainWindow(QMainWindow):
         self.performance_label = QLabel()
         self.statusBar.addPermanentWidget(self.performance_label)
         
+        # 日志管道: 合并日志行后在界面线程批量追加
+        self.log_pipeline = LogPipeline(parent=self)
+        self.log_pipeline.frame_ready.connect(self._append_log_frame)
+        self.log_pipeline.start()
+        
         # 连接信号
         self.connect_signals()
         
@@ -148,10 +156,13 @@ class MainWindow(QMainWindow):
         self.results_action = QAction("查看结果", self)
         self.config_action = QAction("配置管理", self)
         self.analysis_action = QAction("结果分析", self)
+        self.resume_action = QAction("恢复未完成任务", self)
         scan_menu.addAction(self.advanced_action)
         scan_menu.addAction(self.results_action)
         scan_menu.addAction(self.config_action)
         scan_menu.addAction(self.analysis_action)
+        scan_menu.addSeparator()
+        scan_menu.addAction(self.resume_action)
         
         # 帮助菜单
         help_menu = menubar.addMenu("帮助")
@@ -172,16 +183,22 @@ class MainWindow(QMainWindow):
         self.task_manager_action.triggered.connect(self.show_task_manager)
         self.config_action.triggered.connect(self.show_config_manager)
         self.analysis_action.triggered.connect(self.show_analysis)
+        self.resume_action.triggered.connect(self.resume_pending_tasks)
         self.help_action.triggered.connect(self.show_help)
         self.about_action.triggered.connect(self.show_about)
         self.proxy_action.triggered.connect(self.show_proxy_settings)
         self.performance_action.triggered.connect(self.show_performance_monitor)
         
     def show_target_config(self):
+        # 对话框及其依赖在首次打开时才导入, 缩短启动时间
+        from src.gui.target_config import TargetConfigDialog
         dialog = TargetConfigDialog(self)
         if dialog.exec_():
             self.target_config = dialog.get_config()
-            self.statusBar.showMessage(f"目标已配置: {self.target_config['url']}")
+            if 'targets' in self.target_config:
+                self.statusBar.showMessage(f"目标已配置: {len(self.target_config['targets'])} 个批量目标")
+            else:
+                self.statusBar.showMessage(f"目标已配置: {self.target_config['url']}")
             
     def start_scan(self):
         if not hasattr(self, 'target_config'):
@@ -195,52 +212,73 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'advanced_options'):
             options.update(self.advanced_options.to_sqlmap_args())
         
-        # 创建新任务
-        task = self.task_manager.create_task(
-            name=f"扫描 {self.target_config['url']}",
-            target_config=self.target_config,
-            scan_options=options
-        )
-        
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
         self.statusBar.showMessage("扫描中...")
         
         def log_callback(message):
-            self.log_tab.append(message)
-            
-        def scan_completed(result):
-            self.task_manager.update_task_status(
-                task.id,
-                TaskStatus.COMPLETED,
-                result=result
-            )
-            self.scan_results = result
-            self.start_button.setEnabled(True)
-            self.stop_button.setEnabled(False)
-            self.statusBar.showMessage("扫描完成")
+            # 可能在工作线程中调用, 只写入日志管道
+            self.log_pipeline.push(message)
             
-        def scan_failed(error):
-            self.task_manager.update_task_status(
-                task.id,
-                TaskStatus.FAILED,
-                error=str(error)
-            )
-            self.start_button.setEnabled(True)
-            self.stop_button.setEnabled(False)
-            self.statusBar.showMessage(f"扫描失败: {error}")
-            
-        # 更新任务状态为运行中
-        self.task_manager.update_task_status(task.id, TaskStatus.RUNNING)
-        
-        # 开始扫描
+        # 开始扫描, 每个目标由调度器创建一条任务记录
         self.sqlmap.start_scan(
             self.target_config,
             log_callback,
-            scan_completed,
-            scan_failed
+            self.scan_completed.emit,
+            self.scan_failed.emit,
+            scan_options=options
         )
         
+    def _on_scan_completed(self, result):
+        # 任务状态由调度器写入数据库
+        self.scan_results = result
+        self.statusBar.showMessage("扫描完成")
+        self._update_scan_buttons()
+        
+    def _on_scan_failed(self, error: str):
+        self.statusBar.showMessage(f"扫描失败: {error}")
+        self._update_scan_buttons()
+        
+    def _update_scan_buttons(self):
+        """按调度器中排队和运行的任务数更新按钮状态"""
+        scanning = bool(self.sqlmap.scheduler.active_ids())
+        self.start_button.setEnabled(not scanning)
+        self.stop_button.setEnabled(scanning)
+        
+    def _check_pending_tasks(self):
+        """启动时检查数据库中遗留的等待中和被中断的任务"""
+        try:
+            count = len(self.task_manager.get_queue_entries(
+                [TaskStatus.PENDING, TaskStatus.RUNNING]
+            ))
+            if count:
+                self.statusBar.showMessage(f"有 {count} 个未完成任务, 可通过 扫描 -> 恢复未完成任务 继续")
+        except Exception as e:
+            print(f"检查未完成任务失败: {str(e)}")
+            
+    def resume_pending_tasks(self):
+        """将遗留的等待中任务重新交给调度器"""
+        count = self.sqlmap.resume_pending()
+        if count:
+            self.statusBar.showMessage(f"已恢复 {count} 个未完成任务")
+        else:
+            self.statusBar.showMessage("没有未完成的任务")
+            
+    def _append_log_frame(self, text: str):
+        """在界面线程中追加一帧日志"""
+        scrollbar = self.log_tab.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        
+        cursor = QTextCursor(self.log_tab.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.log_tab.document().isEmpty():
+            cursor.insertText('\n')
+        cursor.insertText(text)
+        
+        # 用户向上翻看时不自动滚动
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+            
     def stop_scan(self):
         self.sqlmap.stop_scan()
         self.start_button.setEnabled(True)
@@ -248,14 +286,17 @@ class MainWindow(QMainWindow):
         self.statusBar.showMessage("扫描已停止")
         
     def show_tamper_manager(self):
+        from src.gui.tamper_dialog import TamperDialog
         dialog = TamperDialog(self)
         dialog.exec_()
         
     def show_decoder(self):
+        from src.gui.decoder_dialog import DecoderDialog
         dialog = DecoderDialog(self)
         dialog.exec_()
         
     def show_advanced_settings(self):
+        from src.gui.advanced_dialog import AdvancedDialog
         dialog = AdvancedDialog(self)
         if dialog.exec_():
             self.scan_options = dialog.get_options()
@@ -266,20 +307,24 @@ class MainWindow(QMainWindow):
             self.statusBar.showMessage("没有可用的扫描结果")
             return
         
+        from src.gui.result_dialog import ResultDialog
         dialog = ResultDialog(self.scan_results, self)
         dialog.exec_()
         
     def show_task_manager(self):
+        from src.gui.task_dialog import TaskDialog
         dialog = TaskDialog(self)
         dialog.exec_()
         
     def show_advanced_options(self):
+        from src.gui.advanced_options_dialog import AdvancedOptionsDialog
         dialog = AdvancedOptionsDialog(self)
         if dialog.exec_():
             self.advanced_options = dialog.get_options()
             self.statusBar.showMessage("高级选项已更新")
         
     def show_config_manager(self):
+        from src.gui.config_dialog import ConfigDialog
         dialog = ConfigDialog(self)
         if dialog.exec_():
             config = dialog.selected_config
@@ -305,6 +350,7 @@ class MainWindow(QMainWindow):
             self.statusBar.showMessage("没有可用的扫描结果")
             return
         
+        from src.gui.analysis_dialog import AnalysisDialog
         dialog = AnalysisDialog(self.scan_results, self)
         dialog.exec_()
         
@@ -322,16 +368,24 @@ class MainWindow(QMainWindow):
         
     def show_proxy_settings(self):
         """显示代理设置对话框"""
-        dialog = ProxyDialog(self)
+        from src.gui.proxy_dialog import ProxyDialog
+        dialog = ProxyDialog(self, proxy_pool=self.sqlmap.proxy_pool)
         if dialog.exec_():
             proxy_config = dialog.get_proxy_config()
             self.sqlmap.set_proxy(proxy_config)
             
+            # 代理池中有代理时, 每个扫描任务从代理池中分配代理
+            self.sqlmap.set_proxy_pool(
+                dialog.proxy_pool if len(dialog.proxy_pool) else None,
+                proxy_config['auto_switch']['enabled']
+            )
+            
             # 更新代理监控
             if self.proxy_monitor:
                 self.proxy_monitor.stop()
             
             if proxy_config:
+                from src.utils.proxy_monitor import ProxyMonitor
                 self.proxy_monitor = ProxyMonitor(
                     proxy_config,
                     self._update_proxy_status
@@ -413,6 +467,10 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 print(f"停止性能监控失败: {str(e)}")
             
+        # 停止日志管道
+        if hasattr(self, 'log_pipeline'):
+            self.log_pipeline.stop()
+            
         # 停止代理监控
         if hasattr(self, 'proxy_monitor') and self.proxy_monitor:
             try:
@@ -423,11 +481,19 @@ class MainWindow(QMainWindow):
     def _cleanup_resources(self):
         """清理资源"""
         try:
-            # 清理临时文件
-            if os.path.exists("sqlmap_results"):
-                shutil.rmtree("sqlmap_results")
+            # 停止调度器, 未开始的任务保留为等待状态
+            if hasattr(self, 'sqlmap'):
+                self.sqlmap.shutdown()
+                
+            # 提交写队列中剩余的任务状态
+            if hasattr(self, 'task_manager'):
+                self.task_manager.flush()
+                
+            # sqlmap_results 中的会话文件用于恢复中断的扫描, 不再清理
             
-            # 清理缓存
+            # 清理缓存, 先关闭缓存数据库
+            from src.utils.cache_manager import CacheManager
+            CacheManager.close_all()
             if os.path.exists("cache"):
                 shutil.rmtree("cache")
             
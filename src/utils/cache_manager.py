@@ -1,33 +1,174 @@
 import os
 import json
 import time
-from typing import Any, Dict, Optional
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 import hashlib
 
+def _canonical_default(obj: Any) -> Any:
+    """把JSON不支持的类型转换为确定的表示"""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    if isinstance(obj, bytes):
+        return {'__bytes__': obj.hex()}
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"无法为 {type(obj).__name__} 类型生成缓存键")
+
+# 紧凑、按键排序的规范JSON编码器, 复用同一实例避免每次调用重新构造
+_KEY_ENCODER = json.JSONEncoder(
+    sort_keys=True,
+    separators=(',', ':'),
+    ensure_ascii=False,
+    check_circular=False,
+    default=_canonical_default
+)
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=4096)
+def _immutable_key(data: Any) -> str:
+    """不可变输入(字符串、字节串)的缓存键, 结果可以安全地记忆"""
+    return _digest(_KEY_ENCODER.encode(data))
+
+def _byte_size(text: str) -> int:
+    """序列化后的值按UTF-8编码的字节数计入内存预算(值中可能有非ASCII字符)"""
+    return len(text.encode('utf-8'))
+
+def make_cache_key(data: Any) -> str:
+    """生成缓存键
+    
+    对数据做一次规范化JSON编码(键排序、无多余空白)后取blake2b(128位)摘要,
+    相同内容在不同进程中得到相同的键; 不支持的类型直接报错而不是退化为str()
+    """
+    if type(data) in (str, bytes):
+        return _immutable_key(data)
+    return _digest(_KEY_ENCODER.encode(data))
+
 class CacheManager:
-    def __init__(self, cache_dir: str = "cache"):
+    """两级缓存
+
+    - 内存层: LRU(OrderedDict), 按序列化后的字节数限制总大小, 超出预算时淘汰最久未使用的项
+    - 磁盘层: cache_dir/cache.db 单个sqlite文件, 内存层淘汰的项仍可从磁盘层读回
+
+    每项带过期时间, 读取时发现过期即删除, 后台线程定期清理两层中的过期项并回收磁盘空间。
+    同一缓存目录在进程内建议通过 CacheManager.shared() 共享一个实例。
+
+    开启 write_behind 后写操作只更新内存并记入待写表, 由后台线程每 flush_interval 秒
+    在一个事务中批量写入磁盘, 同一键的多次写入只落盘最后一次。
+    """
+    
+    _instances: Dict[str, 'CacheManager'] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, cache_dir: str = "cache", memory_budget: int = 32 * 1024 * 1024,
+                 compact_interval: float = 300.0, write_behind: bool = False,
+                 flush_interval: float = 1.0):
         self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.compact_interval = compact_interval
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.db_path = os.path.join(cache_dir, "cache.db")
+        
+        # 内存层: 键 -> (序列化后的值, 过期时间)
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._memory_bytes = 0
+        # 待写入磁盘的项: 键 -> (序列化后的值, 过期时间), 值为None表示待删除
+        self._pending: Dict[str, Optional[tuple]] = {}
+        self.lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+        
         self.init_cache_dir()
+        self._conn = self._connect()
+        
+        self._stop_event = threading.Event()
+        self.background_thread = threading.Thread(
+            target=self._background_loop,
+            daemon=True,
+            name="CacheBackground"
+        )
+        self.background_thread.start()
         
+    @classmethod
+    def shared(cls, cache_dir: str = "cache") -> 'CacheManager':
+        """获取缓存目录对应的共享实例"""
+        key = os.path.abspath(cache_dir)
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None or cache._conn is None:
+                cache = cls(cache_dir, write_behind=True)
+                cls._instances[key] = cache
+            return cache
+            
+    @classmethod
+    def close_all(cls):
+        """关闭所有共享实例"""
+        with cls._instances_lock:
+            caches = list(cls._instances.values())
+            cls._instances.clear()
+        for cache in caches:
+            cache.close()
+            
     def init_cache_dir(self):
         """初始化缓存目录"""
         os.makedirs(self.cache_dir, exist_ok=True)
         
+    def _connect(self) -> sqlite3.Connection:
+        """打开磁盘层数据库"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # 仅对新建的数据库生效
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expire REAL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_expire
+            ON cache_entries (expire)
+        """)
+        return conn
+        
     def _get_cache_key(self, data: Any) -> str:
         """生成缓存键"""
-        if isinstance(data, dict):
-            # 对字典进行排序以确保相同内容生成相同的键
-            sorted_data = {k: data[k] for k in sorted(data.keys())}
-            data_str = json.dumps(sorted_data, sort_keys=True)
-        else:
-            data_str = str(data)
-            
-        return hashlib.md5(data_str.encode()).hexdigest()
-        
-    def _get_cache_path(self, key: str) -> str:
-        """获取缓存文件路径"""
-        return os.path.join(self.cache_dir, f"{key}.json")
+        return make_cache_key(data)
         
+    def _remember(self, key: str, text: str, expire: Optional[float]):
+        """放入内存层并按字节预算淘汰(调用方需持有锁)"""
+        self._forget(key)
+        size = _byte_size(text)
+        if size > self.memory_budget:
+            return  # 单项超过预算只保存在磁盘层
+            
+        self._memory[key] = (text, expire)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= _byte_size(evicted)
+            self.stats['evictions'] += 1
+            
+    def _forget(self, key: str):
+        """从内存层移除(调用方需持有锁)"""
+        old = self._memory.pop(key, None)
+        if old:
+            self._memory_bytes -= _byte_size(old[0])
+            
     def set(self, key: str, value: Any, expire: int = 3600):
         """设置缓存
         Args:
@@ -35,56 +176,252 @@ class CacheManager:
             value: 缓存值
             expire: 过期时间(秒)
         """
-        cache_data = {
-            'value': value,
-            'expire': time.time() + expire
-        }
+        self.set_many({key: value}, expire)
         
-        with open(self._get_cache_path(key), 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
+    def set_many(self, items: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+                 expire: int = 3600):
+        """批量设置缓存, 非write_behind模式下在一个事务中写入"""
+        if isinstance(items, dict):
+            items = items.items()
+        expire_at = time.time() + expire
+        rows = [(key, json.dumps(value, ensure_ascii=False), expire_at) for key, value in items]
+        if not rows:
+            return
             
+        with self.lock:
+            for key, text, _ in rows:
+                self._remember(key, text, expire_at)
+            if self.write_behind:
+                for key, text, _ in rows:
+                    self._pending[key] = (text, expire_at)
+                return
+            try:
+                self._write_rows(rows, [])
+            except sqlite3.Error as e:
+                print(f"写入缓存失败: {str(e)}")
+                
+    def _write_rows(self, rows: List[tuple], deleted: List[str]):
+        """在一个事务中写入和删除磁盘层的项(调用方需持有锁)"""
+        self._conn.execute("BEGIN")
+        try:
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expire) VALUES (?, ?, ?)",
+                    rows
+                )
+            if deleted:
+                self._conn.executemany(
+                    "DELETE FROM cache_entries WHERE key = ?", [(key,) for key in deleted]
+                )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+            
+    def flush(self):
+        """把待写项写入磁盘"""
+        with self.lock:
+            if not self._pending or self._conn is None:
+                return
+            pending, self._pending = self._pending, {}
+            rows = [(key, entry[0], entry[1]) for key, entry in pending.items() if entry]
+            deleted = [key for key, entry in pending.items() if entry is None]
+            try:
+                self._write_rows(rows, deleted)
+            except sqlite3.Error as e:
+                print(f"写入缓存失败: {str(e)}")
+                
     def get(self, key: str) -> Optional[Any]:
         """获取缓存"""
         try:
-            cache_path = self._get_cache_path(key)
-            if not os.path.exists(cache_path):
-                return None
-                
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                
-            # 检查是否过期
-            if time.time() > cache_data['expire']:
-                os.remove(cache_path)
-                return None
+            with self.lock:
+                now = time.time()
+                entry = self._memory.get(key)
+                if entry:
+                    text, expire = entry
+                    if expire is not None and now > expire:
+                        self._expire(key)
+                        return None
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return json.loads(text)
+                    
+                if key in self._pending:
+                    row = self._pending[key]  # 已从内存层淘汰但尚未落盘
+                else:
+                    row = self._conn.execute(
+                        "SELECT value, expire FROM cache_entries WHERE key = ?", (key,)
+                    ).fetchone()
+                if not row:
+                    self.stats['misses'] += 1
+                    return None
+                    
+                text, expire = row
+                if expire is not None and now > expire:
+                    self._expire(key)
+                    return None
+                    
+                # 提升到内存层
+                self._remember(key, text, expire)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return json.loads(text)
                 
-            return cache_data['value']
-            
         except Exception as e:
             print(f"读取缓存失败: {str(e)}")
             return None
             
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """批量获取缓存, 只返回命中的项
+        
+        内存层未命中的键合并成一次磁盘查询
+        """
+        result = {}
+        try:
+            with self.lock:
+                now = time.time()
+                disk_keys = []
+                for key in keys:
+                    entry = self._memory.get(key)
+                    from_memory = entry is not None
+                    if not from_memory and key in self._pending:
+                        entry = self._pending[key]  # 已从内存层淘汰但尚未落盘
+                        if entry is None:
+                            self.stats['misses'] += 1
+                            continue
+                    if entry is None:
+                        disk_keys.append(key)
+                        continue
+                    text, expire = entry
+                    if expire is not None and now > expire:
+                        self._expire(key)
+                        continue
+                    self.stats['hits'] += 1
+                    if from_memory:
+                        self._memory.move_to_end(key)
+                        self.stats['memory_hits'] += 1
+                    else:
+                        # 超过预算的项不会进入内存层, 不能再对其 move_to_end
+                        self._remember(key, text, expire)
+                        self.stats['disk_hits'] += 1
+                    result[key] = json.loads(text)
+                    
+                # 分段查询, 避免超过SQL参数数量限制
+                for start in range(0, len(disk_keys), 500):
+                    chunk = disk_keys[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, value, expire FROM cache_entries "
+                        f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    self.stats['misses'] += len(chunk) - len(rows)
+                    for key, text, expire in rows:
+                        if expire is not None and now > expire:
+                            self._expire(key)
+                            continue
+                        self._remember(key, text, expire)
+                        self.stats['hits'] += 1
+                        self.stats['disk_hits'] += 1
+                        result[key] = json.loads(text)
+                        
+        except Exception as e:
+            print(f"读取缓存失败: {str(e)}")
+        return result
+        
+    def _expire(self, key: str):
+        """删除已过期的项(调用方需持有锁)"""
+        self._remove(key)
+        self.stats['expired'] += 1
+        self.stats['misses'] += 1
+        
+    def _remove(self, key: str):
+        """从两层中删除(调用方需持有锁)"""
+        self._forget(key)
+        if self.write_behind:
+            self._pending[key] = None
+        else:
+            self._pending.pop(key, None)
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            
     def delete(self, key: str):
         """删除缓存"""
         try:
-            cache_path = self._get_cache_path(key)
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
+            with self.lock:
+                self._remove(key)
         except Exception as e:
             print(f"删除缓存失败: {str(e)}")
             
     def clear(self):
         """清空缓存"""
         try:
+            with self.lock:
+                self._memory.clear()
+                self._memory_bytes = 0
+                self._pending.clear()
+                self._conn.execute("DELETE FROM cache_entries")
+                
+            # 清理旧版本每个键一个文件的缓存
             for filename in os.listdir(self.cache_dir):
                 file_path = os.path.join(self.cache_dir, filename)
-                if os.path.isfile(file_path):
+                if filename.endswith('.json') and os.path.isfile(file_path):
                     os.remove(file_path)
         except Exception as e:
             print(f"清空缓存失败: {str(e)}")
             
+    def compact(self):
+        """清理过期项并回收磁盘空间"""
+        self.flush()
+        now = time.time()
+        with self.lock:
+            expired_keys = [key for key, (_, expire) in self._memory.items()
+                            if expire is not None and now > expire]
+            for key in expired_keys:
+                self._forget(key)
+                
+            cursor = self._conn.execute(
+                "DELETE FROM cache_entries WHERE expire IS NOT NULL AND expire < ?", (now,)
+            )
+            self.stats['expired'] += cursor.rowcount
+            self._conn.execute("PRAGMA incremental_vacuum")
+            
+    def _background_loop(self):
+        """后台线程: 定期写入待写项并清理过期项"""
+        interval = self.flush_interval if self.write_behind else self.compact_interval
+        next_compact = time.time() + self.compact_interval
+        while not self._stop_event.wait(interval):
+            try:
+                self.flush()
+                if time.time() >= next_compact:
+                    self.compact()
+                    next_compact = time.time() + self.compact_interval
+            except Exception as e:
+                print(f"清理缓存失败: {str(e)}")
+                
+    def get_stats(self) -> Dict:
+        """获取缓存统计信息"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+            stats['pending_writes'] = len(self._pending)
+            stats['disk_entries'] = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries"
+            ).fetchone()[0]
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return stats
+        
     def load_cache(self, name: str) -> Optional[Dict]:
         """加载指定名称的缓存"""
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ?", (f"named:{name}",)
+            ).fetchone()
+        if row:
+            return json.loads(row[0])
+            
+        # 兼容旧版本保存的JSON文件
         cache_path = os.path.join(self.cache_dir, f"{name}.json")
         if not os.path.exists(cache_path):
             return None
@@ -97,10 +434,23 @@ class CacheManager:
             return None
             
     def save_cache(self, name: str, data: Dict):
-        """保存缓存"""
-        cache_path = os.path.join(self.cache_dir, f"{name}.json")
+        """保存缓存(不过期)"""
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self.lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expire) VALUES (?, ?, NULL)",
+                    (f"named:{name}", json.dumps(data, ensure_ascii=False))
+                )
         except Exception as e:
-            print(f"保存缓存失败: {str(e)}")
\ No newline at end of file
+            print(f"保存缓存失败: {str(e)}")
+            
+    def close(self):
+        """写入待写项, 停止后台线程并关闭数据库"""
+        self._stop_event.set()
+        self.flush()
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+atexit.register(CacheManager.close_all)
@@ -0,0 +1,134 @@
+import io
+import csv
+import json
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import unquote, urlsplit
+
+PROXY_TYPES = ('HTTP', 'HTTPS', 'SOCKS4', 'SOCKS5')
+
+def _make_proxy(proxy_type: str, host: str, port, username: str = '',
+                password: str = '') -> Optional[Dict]:
+    """构造代理字典, 类型/主机/端口无效时返回 None"""
+    if not isinstance(proxy_type or '', str) or not isinstance(host or '', str):
+        return None
+    proxy_type = (proxy_type or 'HTTP').strip().upper()
+    if proxy_type == 'SOCKS':
+        proxy_type = 'SOCKS5'
+    host = (host or '').strip().strip('[]')
+    try:
+        port = int(str(port).strip())
+    except ValueError:
+        return None
+    if proxy_type not in PROXY_TYPES or not host or not 0 < port < 65536:
+        return None
+        
+    proxy = {'type': proxy_type, 'host': host, 'port': port}
+    if username:
+        proxy['auth'] = {'enabled': True, 'username': username, 'password': password or ''}
+    return proxy
+
+def parse_proxy(text: str, default_type: str = 'HTTP') -> Optional[Dict]:
+    """解析单个代理
+
+    支持 type://[user:pass@]host:port、host:port 和 host:port:user:pass 三种写法
+    """
+    text = text.strip()
+    if not text or text.startswith('#'):
+        return None
+    if '://' in text:
+        parts = urlsplit(text)
+        try:
+            port = parts.port
+        except ValueError:
+            return None
+        if port is None:
+            return None
+        return _make_proxy(parts.scheme, parts.hostname, port,
+                           unquote(parts.username or ''), unquote(parts.password or ''))
+                           
+    fields = text.split(':')
+    if len(fields) == 2:
+        return _make_proxy(default_type, fields[0], fields[1])
+    if len(fields) >= 4:
+        return _make_proxy(default_type, fields[0], fields[1], fields[2], ':'.join(fields[3:]))
+    return None
+
+def _from_object(item, default_type: str) -> Optional[Dict]:
+    """JSON中的代理: 字符串或包含 type/host/port 的对象"""
+    if isinstance(item, str):
+        return parse_proxy(item, default_type)
+    if not isinstance(item, dict):
+        return None
+    if 'host' not in item and isinstance(item.get('proxy'), str):
+        return parse_proxy(item['proxy'], default_type)
+    auth = item.get('auth')
+    if not isinstance(auth, dict) or not auth.get('enabled'):
+        auth = item  # auth 格式不正确或未启用时使用顶层的 username/password
+    username, password = auth.get('username') or '', auth.get('password') or ''
+    if not isinstance(username, str) or not isinstance(password, str):
+        return None
+    return _make_proxy(item.get('type') or default_type, item.get('host'),
+                       item.get('port', ''), username, password)
+
+def _iter_txt(raw, default_type: str) -> Iterator[Dict]:
+    """文本文件: 每行一个代理, # 开头为注释"""
+    for line in io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace'):
+        proxy = parse_proxy(line, default_type)
+        if proxy:
+            yield proxy
+
+def _iter_csv(raw, default_type: str) -> Iterator[Dict]:
+    """CSV文件: 包含 host/port 列(可选 type/username/password), 或 proxy 列"""
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+    for row in csv.DictReader(text):
+        row = {(key or '').strip().lower(): (value or '').strip()
+               for key, value in row.items() if isinstance(value, str)}
+        proxy = _from_object(row, default_type)
+        if proxy:
+            yield proxy
+
+def _iter_json(raw, default_type: str, lines: bool) -> Iterator[Dict]:
+    """JSON数组、导出的代理池文件或JSON Lines文件"""
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace')
+    if lines:
+        # JSON Lines: 每行一个代理
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue  # 格式错误的行与无效代理一样丢弃
+            proxy = _from_object(item, default_type)
+            if proxy:
+                yield proxy
+        return
+        
+    data = json.load(text)
+    if isinstance(data, dict):
+        # save_to_file 导出的格式, 失败的代理也重新检测
+        items = list(data.get('proxies', [])) + list(data.get('failed_proxies', []))
+    elif isinstance(data, list):
+        items = data
+    else:
+        items = [data]
+    for item in items:
+        proxy = _from_object(item, default_type)
+        if proxy:
+            yield proxy
+
+def iter_proxies(filename: str, default_type: str = 'HTTP') -> Iterator[Dict]:
+    """流式读取代理列表文件, 支持 .txt/.csv/.json/.jsonl, 无效的行直接丢弃"""
+    with open(filename, 'rb') as raw:
+        lower = filename.lower()
+        if lower.endswith('.csv'):
+            yield from _iter_csv(raw, default_type)
+        elif lower.endswith('.json') or lower.endswith('.jsonl'):
+            yield from _iter_json(raw, default_type, lower.endswith('.jsonl'))
+        else:
+            yield from _iter_txt(raw, default_type)
+
+def load_proxies(filename: str, default_type: str = 'HTTP') -> List[Dict]:
+    """读取代理列表文件"""
+    return list(iter_proxies(filename, default_type))
@@ -1,119 +1,452 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
 import json
 import random
 import time
-from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Condition, Event, Lock
 from src.utils.proxy_tester import ProxyTester
 
-class ProxyPool:
+def proxy_key(proxy) -> str:
+    """代理的唯一键: 类型:主机:端口"""
+    return f"{str(proxy['type']).lower()}:{str(proxy['host']).lower()}:{int(proxy['port'])}"
+
+class ProxyRecord:
+    """代理池中的一条代理, 使用 __slots__ 减少内存占用
+
+    支持 proxy['host'] / proxy.get('auth') 形式的访问, 可以直接传给
+    ProxyTester 以及使用代理字典的旧代码
+    """
+    __slots__ = ('key', 'type', 'host', 'port', 'auth', 'latency',
+                 'fail_count', 'last_used', 'in_flight', 'checked')
+                 
+    FIELDS = ('type', 'host', 'port', 'auth', 'latency', 'fail_count', 'last_used')
+    
+    def __init__(self, type: str, host: str, port: int, auth: Optional[Dict] = None,
+                 latency: float = 0.0, fail_count: int = 0, last_used: float = 0):
+        self.type = type
+        self.host = host
+        self.port = int(port)
+        self.auth = auth
+        self.latency = latency
+        self.fail_count = fail_count
+        self.last_used = last_used
+        self.in_flight = 0
+        self.checked = False  # 导入后是否已检测过
+        self.key = proxy_key(self)
+        
+    @classmethod
+    def from_dict(cls, proxy: Dict) -> 'ProxyRecord':
+        return cls(
+            proxy['type'],
+            proxy['host'],
+            proxy['port'],
+            proxy.get('auth'),
+            proxy.get('latency') or 0.0,
+            proxy.get('fail_count') or 0,
+            proxy.get('last_used') or 0
+        )
+        
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        if data['auth'] is None:
+            del data['auth']
+        return data
+        
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+            
+    def __setitem__(self, name: str, value):
+        setattr(self, name, value)
+        
+    def get(self, name: str, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+class _IndexedSet:
+    """支持 O(1) 增删和随机抽样的集合(列表 + 位置索引, 删除时与末尾元素交换)"""
+    __slots__ = ('items', 'positions')
+    
     def __init__(self):
-        self.proxies: List[Dict] = []  # 代理列表
-        self.working_proxies: List[Dict] = []  # 可用代理列表
-        self.failed_proxies: List[Dict] = []  # 失败代理列表
-        self.current_proxy: Optional[Dict] = None  # 当前使用的代理
+        self.items: List[ProxyRecord] = []
+        self.positions: Dict[ProxyRecord, int] = {}
+        
+    def add(self, item: ProxyRecord):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+            
+    def discard(self, item: ProxyRecord):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if last is not item:
+            self.items[position] = last
+            self.positions[last] = position
+            
+    def clear(self):
+        self.items.clear()
+        self.positions.clear()
+        
+    def __contains__(self, item) -> bool:
+        return item in self.positions
+        
+    def __len__(self) -> int:
+        return len(self.items)
+        
+    def __iter__(self) -> Iterator[ProxyRecord]:
+        return iter(list(self.items))
+
+ProxyLike = Union[Dict, ProxyRecord]
+
+class ProxyPool:
+    """代理池
+
+    代理按 类型:主机:端口 建立索引, 可用与失败代理以索引集合维护,
+    添加、移除和标记失败都是 O(1) 操作。批量导入的代理先以"待检测"状态加入,
+    由 check_proxies() 在后台并发检测, 每个代理通过检测后立即可用。
+
+    选择代理时使用"两次随机选择": 从可用代理中随机取两个, 选择得分较低的一个,
+    得分 = 延迟 x (1 + 失败次数) x (1 + 进行中的请求数)。选择代价为 O(1),
+    负载会分散到所有较快的代理上, 而不是全部集中在最快的一个。
+    """
+    
+    SAMPLE_ATTEMPTS = 4  # 抽到的代理都已达到并发上限时的重试次数
+    ACQUIRE_POLL = 0.5  # 等待代理空闲时重新抽样的间隔(秒)
+    LATENCY_SMOOTHING = 0.3  # 延迟滑动平均中新样本的权重
+    MAX_FAILURES = 3  # 失败次数达到后移出代理池
+    CANCEL_POLL = 0.2  # 检测期间检查取消和截止时间的间隔(秒)
+    
+    def __init__(self, max_in_flight: int = 0):
+        self._records: Dict[str, ProxyRecord] = {}  # 代理池中的代理
+        self._working = _IndexedSet()  # 可用代理
+        self._failed: Dict[str, ProxyRecord] = {}  # 已移出代理池的失败代理
+        self.current_proxy: Optional[ProxyRecord] = None  # 当前使用的代理
+        self.max_in_flight = max_in_flight  # 每个代理的最大并发请求数, 0 表示不限制
         self.lock = Lock()  # 线程锁
+        self._released = Condition(self.lock)  # 有代理归还或变为可用时通知
         
-    def add_proxy(self, proxy: Dict) -> bool:
-        """添加代理到代理池"""
+    @property
+    def proxies(self) -> List[ProxyRecord]:
+        """代理列表(快照)"""
+        with self.lock:
+            return list(self._records.values())
+            
+    @property
+    def working_proxies(self) -> List[ProxyRecord]:
+        """可用代理列表(快照)"""
+        with self.lock:
+            return list(self._working.items)
+            
+    @property
+    def failed_proxies(self) -> List[ProxyRecord]:
+        """失败代理列表(快照)"""
+        with self.lock:
+            return list(self._failed.values())
+            
+    def is_working(self, proxy: ProxyLike) -> bool:
+        """代理当前是否可用"""
+        with self.lock:
+            record = self._records.get(proxy_key(proxy))
+            return record is not None and record in self._working
+            
+    def status(self, proxy: ProxyLike) -> str:
+        """代理状态: working / unverified / failed"""
+        with self.lock:
+            record = self._records.get(proxy_key(proxy))
+            if record is not None and record in self._working:
+                return 'working'
+            if record is not None and not record.checked:
+                return 'unverified'
+            return 'failed'
+            
+    def __contains__(self, proxy: ProxyLike) -> bool:
+        return proxy_key(proxy) in self._records
+        
+    def __len__(self) -> int:
+        return len(self._records)
+        
+    def add_proxy(self, proxy: ProxyLike) -> bool:
+        """添加单个代理, 检测可用后加入代理池
+
+        检测在锁外进行, 不会阻塞其他线程获取代理
+        """
+        record = proxy if isinstance(proxy, ProxyRecord) else ProxyRecord.from_dict(proxy)
         with self.lock:
             # 检查代理是否已存在
-            if self._proxy_exists(proxy):
+            if record.key in self._records:
                 return False
-                
-            # 测试代理可用性
-            success, _, latency = ProxyTester.test_proxy(proxy)
+            self._records[record.key] = record
+            
+        # 测试代理可用性
+        success, _, latency = ProxyTester.test_proxy(record)
+        with self.lock:
+            if self._records.get(record.key) is not record:
+                return False  # 检测期间已被移除
+            record.checked = True
             if success:
-                proxy['latency'] = latency
-                proxy['last_used'] = 0
-                proxy['fail_count'] = 0
-                self.proxies.append(proxy)
-                self.working_proxies.append(proxy)
+                record.latency = latency
+                record.last_used = 0
+                record.fail_count = 0
+                self._failed.pop(record.key, None)
+                self._working.add(record)
                 return True
             else:
-                self.failed_proxies.append(proxy)
+                self._remove(record.key)
+                self._failed[record.key] = record
                 return False
                 
-    def get_proxy(self) -> Optional[Dict]:
-        """获取一个可用代理"""
+    def import_proxies(self, proxies: Iterable[ProxyLike]) -> List[ProxyRecord]:
+        """批量导入代理, 以待检测状态加入代理池, 返回新加入的代理
+
+        已存在的代理直接跳过, 需要再调用 check_proxies() 检测新加入的代理
+        """
+        added = []
+        with self.lock:
+            for proxy in proxies:
+                record = proxy if isinstance(proxy, ProxyRecord) else ProxyRecord.from_dict(proxy)
+                if record.key in self._records:
+                    continue
+                self._failed.pop(record.key, None)
+                self._records[record.key] = record
+                added.append(record)
+        return added
+        
+    def get_proxy(self) -> Optional[ProxyRecord]:
+        """获取一个可用代理(长期使用, 不计入进行中的请求数)"""
+        with self.lock:
+            proxy = self._select()
+            if proxy:
+                proxy.last_used = time.time()
+                self.current_proxy = proxy
+            return proxy
+            
+    def acquire(self, timeout: float = 0) -> Optional[ProxyRecord]:
+        """为一次请求获取代理, 用完后需调用 release()
+
+        代理都已达到并发上限时最多等待 timeout 秒; 没有可用代理或等待超时返回 None
+        """
+        end_time = time.monotonic() + timeout
+        with self.lock:
+            while True:
+                proxy = self._select()
+                if proxy:
+                    proxy.in_flight += 1
+                    proxy.last_used = time.time()
+                    return proxy
+                remaining = end_time - time.monotonic()
+                if not self._working.items or remaining <= 0:
+                    return None
+                # 抽样可能错过空闲的代理, 归还通知之外也定期重新抽样
+                self._released.wait(min(remaining, self.ACQUIRE_POLL))
+                
+    def release(self, proxy: ProxyRecord, success: bool = True, latency: float = None):
+        """归还代理, 并根据本次请求的结果更新延迟或失败次数
+
+        success 为 False 表示代理本身出错(连接/握手失败或 407), 连续失败 MAX_FAILURES 次
+        才移出代理池, 之前仍留在可用代理中, 只是得分变差
+        """
         with self.lock:
-            if not self.working_proxies:
-                return None
+            proxy.in_flight = max(0, proxy.in_flight - 1)
+            self._released.notify_all()
+            if not success:
+                self._mark_failed(proxy, keep_working=True)
+                return
+            # 成功后清零失败次数, 只有连续失败才会把代理移出代理池
+            proxy.fail_count = 0
+            if latency is not None:
+                previous = proxy.latency or latency
+                proxy.latency = previous + (latency - previous) * self.LATENCY_SMOOTHING
                 
-            # 按延迟排序
-            self.working_proxies.sort(key=lambda x: x['latency'])
-            
-            # 选择延迟最低的代理
-            proxy = self.working_proxies[0]
-            proxy['last_used'] = time.time()
-            self.current_proxy = proxy
-            return proxy
+    def _score(self, proxy: ProxyRecord) -> float:
+        """代理得分, 越低越优先"""
+        return (proxy.latency + 0.001) * (1 + proxy.fail_count) * (1 + proxy.in_flight)
+        
+    def _available(self, proxy: ProxyRecord) -> bool:
+        return not self.max_in_flight or proxy.in_flight < self.max_in_flight
+        
+    def _select(self) -> Optional[ProxyRecord]:
+        """两次随机选择(调用方需持有锁)"""
+        candidates = self._working.items
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            proxy = candidates[0]
+            return proxy if self._available(proxy) else None
             
-    def remove_proxy(self, proxy: Dict):
+        for _ in range(self.SAMPLE_ATTEMPTS):
+            first, second = random.sample(candidates, 2)
+            available = [proxy for proxy in (first, second) if self._available(proxy)]
+            if available:
+                return min(available, key=self._score)
+        return None
+        
+    def remove_proxy(self, proxy: ProxyLike):
         """移除代理"""
         with self.lock:
-            if proxy in self.proxies:
-                self.proxies.remove(proxy)
-            if proxy in self.working_proxies:
-                self.working_proxies.remove(proxy)
-            if proxy in self.failed_proxies:
-                self.failed_proxies.remove(proxy)
-                
-    def mark_proxy_failed(self, proxy: Dict):
+            self._remove(proxy_key(proxy))
+            
+    def _remove(self, key: str) -> Optional[ProxyRecord]:
+        """从代理池和失败列表中移除代理(调用方需持有锁)"""
+        record = self._records.pop(key, None)
+        if record is not None:
+            self._working.discard(record)
+        failed = self._failed.pop(key, None)
+        return record or failed
+        
+    def mark_proxy_failed(self, proxy: ProxyLike):
         """标记代理失败"""
         with self.lock:
-            proxy['fail_count'] = proxy.get('fail_count', 0) + 1
+            self._mark_failed(proxy)
+            
+    def _mark_failed(self, proxy: ProxyLike, keep_working: bool = False):
+        """记录一次失败(调用方需持有锁)
+
+        keep_working 为 True 时失败次数未达到上限的代理仍留在可用代理中
+        """
+        record = self._records.get(proxy_key(proxy))
+        if record is None:
+            return
+        record.fail_count += 1
+        
+        # 失败次数过多则移出代理池
+        if record.fail_count >= self.MAX_FAILURES:
+            self._remove(record.key)
+            self._failed[record.key] = record
+        elif not keep_working:
+            self._working.discard(record)
             
-            # 失败次数过多则移除
-            if proxy['fail_count'] >= 3:
-                self.remove_proxy(proxy)
-                self.failed_proxies.append(proxy)
-            elif proxy in self.working_proxies:
-                self.working_proxies.remove(proxy)
+    def _apply_result(self, proxy: ProxyRecord, success: bool, latency: float):
+        """在锁内更新单个代理的检测结果"""
+        with self.lock:
+            if self._records.get(proxy.key) is not proxy:
+                return  # 检测期间已被移除
+            proxy.checked = True
+            if success:
+                proxy.latency = latency
+                proxy.fail_count = 0
+                self._working.add(proxy)
+                self._released.notify_all()
+            else:
+                self._mark_failed(proxy)
+                
+    def refresh_proxies(self, max_workers: int = 32, timeout: float = 5,
+                        deadline: float = None,
+                        progress_callback: Callable[[int, int], None] = None) -> int:
+        """并发检测所有代理, 返回可用代理数"""
+        return self.check_proxies(self.proxies, max_workers, timeout, deadline,
+                                  progress_callback)
+
+    def check_proxies(self, proxies: List[ProxyRecord], max_workers: int = 32,
+                      timeout: float = 5, deadline: float = None,
+                      progress_callback: Callable[[int, int], None] = None,
+                      result_callback: Callable[[ProxyRecord], None] = None,
+                      cancel_event: Event = None) -> int:
+        """并发检测指定代理, 返回可用代理数
+
+        网络检测在线程池中进行且不持有锁, 每个代理检测完成后立即在锁内更新状态,
+        其他线程随时可以获取代理。每个代理只检测一次, 单次超时为 timeout 秒;
+        deadline 为整体截止时间(秒), 到期仍未完成的代理按失败处理; 检测抛出异常的代理
+        只按该代理失败处理。result_callback 在每个代理的状态更新后调用;
+        cancel_event 被设置后在 CANCEL_POLL 秒内停止检测, 尚未检测的代理保持原状态
+        """
+        if not proxies:
+            with self.lock:
+                return len(self._working)
                 
-    def refresh_proxies(self):
-        """刷新代理状态"""
-        with self.lock:
-            for proxy in self.proxies[:]:  # 创建副本以避免迭代时修改
-                success, _, latency = ProxyTester.test_proxy(proxy)
-                if success:
-                    proxy['latency'] = latency
-                    if proxy not in self.working_proxies:
-                        self.working_proxies.append(proxy)
-                else:
-                    self.mark_proxy_failed(proxy)
+        if deadline is None:
+            # 默认截止时间: 按并发批次估算, 留出一倍余量
+            deadline = timeout * 2 * (len(proxies) // max_workers + 1)
+            
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_workers, len(proxies)),
+            thread_name_prefix="ProxyCheck"
+        )
+        futures = {
+            executor.submit(ProxyTester.test_proxy, proxy, timeout, 1): proxy
+            for proxy in proxies
+        }
+        pending = set(futures)
+        end_time = time.monotonic() + deadline
+        checked = 0
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                remaining = end_time - time.monotonic()
+                if remaining <= 0:
+                    # 截止时间已到, 未完成的代理按失败处理
+                    for future in pending:
+                        self._apply_result(futures[future], False, 0)
+                        if result_callback:
+                            result_callback(futures[future])
+                    break
                     
-    def _proxy_exists(self, proxy: Dict) -> bool:
-        """检查代理是否已存在"""
-        proxy_key = f"{proxy['type']}:{proxy['host']}:{proxy['port']}"
-        for p in self.proxies:
-            if f"{p['type']}:{p['host']}:{p['port']}" == proxy_key:
-                return True
-        return False
-        
+                done, pending = wait(pending, timeout=min(remaining, self.CANCEL_POLL),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        success, _, latency = future.result()
+                    except Exception:
+                        success, latency = False, 0
+                    self._apply_result(futures[future], success, latency)
+                    if result_callback:
+                        result_callback(futures[future])
+                    checked += 1
+                    if progress_callback:
+                        progress_callback(checked, len(proxies))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+        with self.lock:
+            return len(self._working)
+            
     def save_to_file(self, filename: str):
         """保存代理池到文件"""
+        with self.lock:
+            data = {
+                'proxies': [record.to_dict() for record in self._records.values()],
+                'failed_proxies': [record.to_dict() for record in self._failed.values()]
+            }
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'proxies': self.proxies,
-                'failed_proxies': self.failed_proxies
-            }, f, indent=2)
+            json.dump(data, f, indent=2)
             
-    def load_from_file(self, filename: str):
-        """从文件加载代理池"""
+    def load_from_file(self, filename: str) -> List[ProxyRecord]:
+        """从文件加载代理池, 返回加载的代理
+
+        加载的代理处于待检测状态, 不在此处检测(可能耗时很长),
+        需要由调用方在后台调用 check_proxies() 或 refresh_proxies()
+        """
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                self.proxies = data.get('proxies', [])
-                self.failed_proxies = data.get('failed_proxies', [])
-                self.refresh_proxies()  # 刷新代理状态
         except FileNotFoundError:
-            pass
+            return []
             
+        with self.lock:
+            self._records.clear()
+            self._working.clear()
+            self._failed.clear()
+            for proxy in data.get('proxies', []):
+                record = ProxyRecord.from_dict(proxy)
+                self._records.setdefault(record.key, record)
+            for proxy in data.get('failed_proxies', []):
+                record = ProxyRecord.from_dict(proxy)
+                if record.key not in self._records:
+                    self._failed.setdefault(record.key, record)
+            return list(self._records.values())
+        
     def get_stats(self) -> Dict:
         """获取代理池统计信息"""
-        return {
-            'total': len(self.proxies),
-            'working': len(self.working_proxies),
-            'failed': len(self.failed_proxies),
-            'avg_latency': sum(p['latency'] for p in self.working_proxies) / len(self.working_proxies) if self.working_proxies else 0
-        } 
\ No newline at end of file
+        with self.lock:
+            working = self._working.items
+            return {
+                'total': len(self._records),
+                'working': len(working),
+                'unverified': sum(1 for p in self._records.values() if not p.checked),
+                'failed': len(self._failed),
+                'avg_latency': sum(p.latency for p in working) / len(working) if working else 0
+            }
@@ -0,0 +1,321 @@
+import ssl
+import time
+import base64
+import socket
+import struct
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 检测结果: (成功与否, 错误信息, 延迟时间)
+ProbeResult = Tuple[bool, str, float]
+
+class ProbeError(Exception):
+    """代理握手失败"""
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ProbeError("代理关闭了连接")
+        data += chunk
+    return data
+
+def _recv_head(sock: socket.socket, limit: int = 16384) -> bytes:
+    """读取HTTP响应头(到空行为止)"""
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > limit:
+            raise ProbeError("响应头过长")
+    if not data:
+        raise ProbeError("代理关闭了连接")
+    return data
+
+def _status_code(head: bytes) -> int:
+    """解析状态行中的状态码"""
+    parts = head.split(b'\r\n', 1)[0].split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b'HTTP/') or not parts[1].isdigit():
+        raise ProbeError("代理返回了无效的响应")
+    return int(parts[1])
+
+def _auth(proxy: Dict) -> Optional[Tuple[str, str]]:
+    auth = proxy.get('auth') or {}
+    if auth.get('enabled'):
+        return auth.get('username', ''), auth.get('password', '')
+    return None
+
+def _proxy_authorization(proxy: Dict) -> str:
+    credentials = _auth(proxy)
+    if not credentials:
+        return ''
+    token = base64.b64encode(f"{credentials[0]}:{credentials[1]}".encode()).decode()
+    return f"Proxy-Authorization: Basic {token}\r\n"
+
+def _http_connect(sock: socket.socket, proxy: Dict, host: str, port: int):
+    sock.sendall((
+        f"CONNECT {host}:{port} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"{_proxy_authorization(proxy)}\r\n"
+    ).encode())
+    status = _status_code(_recv_head(sock))
+    if status == 407:
+        raise ProbeError("代理需要认证")
+    if not 200 <= status < 300:
+        raise ProbeError(f"代理拒绝连接目标: HTTP {status}")
+
+def _socks4_connect(sock: socket.socket, proxy: Dict, host: str, port: int):
+    # SOCKS4a: IP 填 0.0.0.1, 由代理解析主机名
+    user = (_auth(proxy) or ('', ''))[0].encode()
+    sock.sendall(struct.pack('>BBH', 4, 1, port) + b'\x00\x00\x00\x01'
+                 + user + b'\x00' + host.encode('idna') + b'\x00')
+    reply = _recv_exact(sock, 8)
+    if reply[1] != 0x5A:
+        raise ProbeError(f"SOCKS4 代理拒绝连接目标: {reply[1]:#x}")
+
+def _socks5_greet(sock: socket.socket, proxy: Dict):
+    """SOCKS5 方法协商(需要时完成用户名/密码认证)"""
+    credentials = _auth(proxy)
+    methods = b'\x00\x02' if credentials else b'\x00'
+    sock.sendall(b'\x05' + bytes([len(methods)]) + methods)
+    version, method = _recv_exact(sock, 2)
+    if version != 5:
+        raise ProbeError("不是SOCKS5代理")
+    if method == 0x02 and credentials:
+        user, password = (value.encode() for value in credentials)
+        sock.sendall(b'\x01' + bytes([len(user)]) + user + bytes([len(password)]) + password)
+        if _recv_exact(sock, 2)[1] != 0:
+            raise ProbeError("SOCKS5 认证失败")
+    elif method != 0x00:
+        raise ProbeError("SOCKS5 代理不接受认证方式")
+        
+def _socks5_connect(sock: socket.socket, proxy: Dict, host: str, port: int):
+    _socks5_greet(sock, proxy)
+    name = host.encode('idna')
+    sock.sendall(b'\x05\x01\x00\x03' + bytes([len(name)]) + name + struct.pack('>H', port))
+    reply = _recv_exact(sock, 4)
+    if reply[1] != 0:
+        raise ProbeError(f"SOCKS5 代理拒绝连接目标: {reply[1]:#x}")
+    # 跳过绑定地址
+    address_size = {1: 4, 4: 16}.get(reply[3])
+    if address_size is None:
+        address_size = _recv_exact(sock, 1)[0]
+    _recv_exact(sock, address_size + 2)
+
+TUNNELS = {
+    'http': _http_connect,
+    'https': _http_connect,
+    'socks4': _socks4_connect,
+    'socks5': _socks5_connect,
+}
+
+def open_tunnel(proxy: Dict, host: str, port: int, timeout: float) -> Tuple[socket.socket, float]:
+    """通过代理建立到目标的隧道, 返回 (套接字, 握手延迟)
+
+    延迟只统计与代理建立连接并完成握手的时间, 不包含之后的任何请求
+    """
+    tunnel = TUNNELS.get(str(proxy.get('type', 'http')).lower())
+    if tunnel is None:
+        raise ProbeError(f"不支持的代理类型: {proxy.get('type')}")
+        
+    start = time.perf_counter()
+    sock = socket.create_connection((proxy['host'], int(proxy['port'])), timeout=timeout)
+    try:
+        tunnel(sock, proxy, host, port)
+    except BaseException:
+        sock.close()
+        raise
+    return sock, time.perf_counter() - start
+
+class ProxyProbe(ABC):
+    """代理检测方式"""
+    
+    def probe(self, proxy: Dict, timeout: float) -> ProbeResult:
+        """检测代理, 任何异常都视为检测失败而不会抛出"""
+        try:
+            return self._probe(proxy, timeout)
+        except ProbeError as e:
+            return False, str(e), 0
+        except socket.timeout:
+            return False, "连接超时", 0
+        except ConnectionRefusedError:
+            return False, "代理服务器连接失败", 0
+        except Exception as e:
+            # 代理配置无效(缺少字段、端口不是数字、主机名无法编码等)
+            return False, str(e) or type(e).__name__, 0
+            
+    @abstractmethod
+    def _probe(self, proxy: Dict, timeout: float) -> ProbeResult:
+        """执行一次检测, 返回 (成功与否, 错误信息, 延迟时间)"""
+
+class HandshakeProbe(ProxyProbe):
+    """代理握手检测(默认): 只与代理本身通信, 不依赖任何第三方地址
+
+    - HTTP: 请求建立到代理自身监听地址的 CONNECT 隧道, 要求代理返回 2xx;
+      普通Web服务器不会接受 CONNECT, 限制了 CONNECT 端口的代理需要改用隧道检测
+    - SOCKS5: 完成方法协商和认证
+    - SOCKS4: 请求连接代理自身的 127.0.0.1:1, 只要求代理返回有效的 SOCKS4 应答
+    """
+    
+    def _probe(self, proxy: Dict, timeout: float) -> ProbeResult:
+        proxy_type = str(proxy.get('type', 'http')).lower()
+        if proxy_type not in TUNNELS:
+            raise ProbeError(f"不支持的代理类型: {proxy.get('type')}")
+            
+        start = time.perf_counter()
+        with socket.create_connection((proxy['host'], int(proxy['port'])), timeout=timeout) as sock:
+            if proxy_type == 'socks5':
+                _socks5_greet(sock, proxy)
+            elif proxy_type == 'socks4':
+                user = (_auth(proxy) or ('', ''))[0].encode()
+                sock.sendall(struct.pack('>BBH', 4, 1, 1) + socket.inet_aton('127.0.0.1') + user + b'\x00')
+                reply = _recv_exact(sock, 8)
+                if reply[0] != 0 or not 0x5A <= reply[1] <= 0x5D:
+                    raise ProbeError("不是SOCKS4代理")
+            else:
+                _http_connect(sock, proxy, proxy['host'], int(proxy['port']))
+        return True, "", time.perf_counter() - start
+        
+class ConnectProbe(ProxyProbe):
+    """隧道检测: 只建立到目标端口的隧道(HTTP CONNECT / SOCKS CONNECT), 不发送请求"""
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        
+    def _probe(self, proxy: Dict, timeout: float) -> ProbeResult:
+        sock, latency = open_tunnel(proxy, self.host, self.port, timeout)
+        sock.close()
+        return True, "", latency
+
+class EchoProbe(ProxyProbe):
+    """回显检测: 通过代理向指定地址发送 HEAD 请求, 状态码小于400视为成功
+
+    延迟为整个请求的往返时间, 适合配合 LocalProbeServer 或自建的回显服务使用
+    """
+    
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"无效的检测地址: {url}")
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+            
+    def _probe(self, proxy: Dict, timeout: float) -> ProbeResult:
+        start = time.perf_counter()
+        proxy_type = str(proxy.get('type', 'http')).lower()
+        host_header = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+        
+        if proxy_type in ('http', 'https') and self.scheme == 'http':
+            # HTTP代理直接转发绝对形式的请求
+            sock = socket.create_connection((proxy['host'], int(proxy['port'])), timeout=timeout)
+            target, extra = self.url, _proxy_authorization(proxy)
+        else:
+            sock, _ = open_tunnel(proxy, self.host, self.port, timeout)
+            target, extra = self.path, ''
+            if self.scheme == 'https':
+                context = ssl._create_unverified_context()
+                sock = context.wrap_socket(sock, server_hostname=self.host)
+                
+        with sock:
+            sock.sendall((
+                f"HEAD {target} HTTP/1.1\r\n"
+                f"Host: {host_header}\r\n"
+                f"{extra}"
+                "Connection: close\r\n\r\n"
+            ).encode())
+            status = _status_code(_recv_head(sock))
+        if status >= 400:
+            return False, f"检测地址返回 HTTP {status}", 0
+        return True, "", time.perf_counter() - start
+
+def create_probe(spec: str) -> ProxyProbe:
+    """根据配置创建检测方式: 留空为代理握手检测, http(s)://... 为回显检测, host:port 为隧道检测"""
+    spec = spec.strip()
+    if not spec:
+        return HandshakeProbe()
+    if spec.startswith(('http://', 'https://')):
+        return EchoProbe(spec)
+    host, _, port = spec.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"无效的检测目标: {spec}")
+    return ConnectProbe(host.strip('[]'), int(port))
+
+class _ProbeHandler(BaseHTTPRequestHandler):
+    """本地检测服务的请求处理: HEAD/GET 返回 204, CONNECT 建立一个空隧道"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_HEAD(self):
+        self.send_response(204)
+        self.send_header('X-Probe-Echo', self.headers.get('X-Probe-Token', ''))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        
+    do_GET = do_HEAD
+    
+    def do_CONNECT(self):
+        # 作为最简单的HTTP代理, 用于离线验证检测流程
+        self.send_response(200, 'Connection established')
+        self.end_headers()
+        self.close_connection = True
+        
+    def log_message(self, format, *args):
+        pass
+
+class LocalProbeServer:
+    """本地检测服务
+
+    绑定在 127.0.0.1 的随机端口, 既可作为 EchoProbe 的回显地址,
+    也可作为 CONNECT 目标或被测HTTP代理, 在隔离网络中验证检测流程:
+
+        with LocalProbeServer() as server:
+            ProxyTester.configure(EchoProbe(server.url))
+    """
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _ProbeHandler)
+        self.server.daemon_threads = True
+        self.thread = None
+        
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+        
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}/"
+        
+    def start(self) -> 'LocalProbeServer':
+        if not self.thread:
+            self.thread = threading.Thread(
+                target=self.server.serve_forever,
+                daemon=True,
+                name="LocalProbeServer"
+            )
+            self.thread.start()
+        return self
+        
+    def stop(self):
+        if self.thread:
+            self.server.shutdown()
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.server.server_close()
+        
+    def __enter__(self) -> 'LocalProbeServer':
+        return self.start()
+        
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,56 +1,40 @@
-import requests
-import socket
-import socks
 from typing import Dict, Tuple
 import time
+from src.utils.proxy_probe import ProxyProbe, HandshakeProbe
 
 class ProxyTester:
-    @staticmethod
-    def test_proxy(proxy_config: Dict, timeout: int = 5, retries: int = 3) -> Tuple[bool, str, float]:
+    # 检测方式, 默认只与代理本身完成握手, 不访问第三方地址; 可通过 configure() 替换
+    probe: ProxyProbe = HandshakeProbe()
+    
+    @classmethod
+    def configure(cls, probe: ProxyProbe):
+        """设置全局检测方式(HandshakeProbe / ConnectProbe / EchoProbe 等)"""
+        cls.probe = probe
+        
+    @classmethod
+    def test_proxy(cls, proxy_config: Dict, timeout: int = 5, retries: int = 3,
+                   probe: ProxyProbe = None) -> Tuple[bool, str, float]:
         """测试代理连接
         Args:
             proxy_config: 代理配置
             timeout: 超时时间(秒)
             retries: 重试次数
+            probe: 本次使用的检测方式, 默认使用全局配置
         Returns:
             (成功与否, 错误信息, 延迟时间)
         """
+        probe = probe or cls.probe
+        error = "重试次数已用完"
         for i in range(retries):
-            try:
-                start_time = time.time()
-                
-                # 构建代理URL
-                proxy_url = ProxyTester._build_proxy_url(proxy_config)
-                
-                # 发送测试请求
-                response = requests.get(
-                    'http://www.baidu.com',
-                    proxies={'http': proxy_url, 'https': proxy_url},
-                    timeout=timeout,
-                    verify=False
-                )
-                response.raise_for_status()
-                
-                latency = time.time() - start_time
+            success, error, latency = probe.probe(proxy_config, timeout)
+            if success:
                 return True, "", latency
                 
-            except requests.exceptions.ProxyError:
-                if i == retries - 1:
-                    return False, "代理服务器连接失败", 0
-            except requests.exceptions.ConnectTimeout:
-                if i == retries - 1:
-                    return False, "连接超时", 0
-            except requests.exceptions.RequestException as e:
-                if i == retries - 1:
-                    return False, str(e), 0
-            except Exception as e:
-                if i == retries - 1:
-                    return False, f"未知错误: {str(e)}", 0
-                
             # 重试前等待
-            time.sleep(1)
-            
-        return False, "重试次数已用完", 0
+            if i < retries - 1:
+                time.sleep(1)
+                
+        return False, error, 0
 
     @staticmethod
     def _build_proxy_url(proxy_config: Dict) -> str:
@@ -63,4 +47,4 @@ class ProxyTester:
             proxy_url += f"{auth['username']}:{auth['password']}@"
             
         proxy_url += f"{proxy_config['host']}:{proxy_config['port']}"
-        return proxy_url 
\ No newline at end of file
+        return proxy_url 
@@ -0,0 +1,86 @@
+import io
+import os
+import re
+import csv
+import json
+from typing import Dict, Iterator, List, Tuple
+
+# 与 urlparse 判断一致: 需要协议和主机部分
+URL_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9+.\-]*://[^/?#\s]+')
+
+def is_valid_url(url: str) -> bool:
+    """验证URL格式"""
+    return bool(url) and URL_PATTERN.match(url) is not None
+
+def _iter_txt(raw) -> Iterator[Tuple[Dict, int]]:
+    """文本文件: 每行一个URL"""
+    done = 0
+    for line in raw:
+        done += len(line)
+        url = line.decode('utf-8', errors='replace').strip().lstrip('\ufeff')
+        if is_valid_url(url):
+            yield {'url': url, 'method': 'GET'}, done
+
+def _iter_csv(raw) -> Iterator[Tuple[Dict, int]]:
+    """CSV文件: 需要包含url列"""
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+    for row in csv.DictReader(text):
+        url = (row.get('url') or '').strip()
+        if is_valid_url(url):
+            row['url'] = url
+            row.pop(None, None)  # 多出表头的列
+            yield row, raw.tell()
+
+def _iter_json(raw, size: int) -> Iterator[Tuple[Dict, int]]:
+    """JSON数组或JSON Lines文件"""
+    head = raw.read(4096).lstrip(b'\xef\xbb\xbf \t\r\n')
+    raw.seek(0)
+    
+    if not head.startswith(b'['):
+        # JSON Lines: 每行一个目标对象, 可以逐行处理
+        done = 0
+        for line in raw:
+            done += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                target = json.loads(line)
+            except ValueError:
+                continue  # 与无效URL一样跳过格式错误的行
+            if isinstance(target, dict) and is_valid_url(target.get('url', '')):
+                yield target, done
+        return
+        
+    # 标准JSON数组需要整体解析, 进度按元素位置估算
+    targets = json.load(io.TextIOWrapper(raw, encoding='utf-8-sig'))
+    if not isinstance(targets, list):
+        return
+    total = len(targets) or 1
+    for i, target in enumerate(targets):
+        if isinstance(target, dict) and is_valid_url(target.get('url', '')):
+            yield target, size * (i + 1) // total
+
+def iter_target_chunks(filename: str, chunk_size: int = 1000) -> Iterator[Tuple[List[Dict], int]]:
+    """流式读取目标文件
+
+    按 chunk_size 个目标一批产出 (目标列表, 已读取字节数), 支持 .txt/.csv/.json,
+    无效的URL在读取时直接丢弃
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as raw:
+        lower = filename.lower()
+        if lower.endswith('.csv'):
+            targets = _iter_csv(raw)
+        elif lower.endswith('.json') or lower.endswith('.jsonl'):
+            targets = _iter_json(raw, size)
+        else:
+            targets = _iter_txt(raw)
+            
+        chunk = []
+        for target, done in targets:
+            chunk.append(target)
+            if len(chunk) >= chunk_size:
+                yield chunk, done
+                chunk = []
+        yield chunk, size
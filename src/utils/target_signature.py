@@ -0,0 +1,75 @@
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 目标签名: (方法, 协议, 主机, 路径, 排序后的参数名)
+Signature = Tuple[str, str, str, str, Tuple[str, ...]]
+
+def target_signature(target: Dict) -> Signature:
+    """计算目标签名
+
+    只保留决定注入面的部分: 规范化的主机和路径、参数名集合以及请求方法,
+    参数值不同的目标得到相同的签名
+    """
+    parts = urlsplit(target['url'].strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+        
+    path = unquote(parts.path) or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+        
+    method = (target.get('method') or 'GET').upper()
+    names = {name for name, _ in parse_qsl(parts.query, keep_blank_values=True)}
+    if target.get('data'):
+        names.update(name for name, _ in parse_qsl(target['data'], keep_blank_values=True))
+        
+    return (method, scheme, host, path, tuple(sorted(names)))
+
+class TargetIndex:
+    """按签名去重的目标索引
+
+    签名相同的目标只保留第一个, 后续目标被合并并记录合并次数
+    """
+    
+    def __init__(self):
+        self._entries: Dict[Signature, Dict] = {}
+        self.collapsed = 0
+        
+    def add(self, target: Dict) -> bool:
+        """加入目标, 返回是否为新目标(False表示已被合并)"""
+        signature = target_signature(target)
+        entry = self._entries.get(signature)
+        
+        if entry is None:
+            self._entries[signature] = {'url': target['url'], 'merged': 0}
+            return True
+            
+        entry['merged'] += 1
+        self.collapsed += 1
+        return False
+        
+    def get(self, target: Dict) -> Optional[Dict]:
+        """获取与目标签名相同的索引项"""
+        return self._entries.get(target_signature(target))
+        
+    def discard(self, target: Dict):
+        """移除目标对应的签名"""
+        self._entries.pop(target_signature(target), None)
+        
+    def clear(self):
+        self._entries.clear()
+        self.collapsed = 0
+        
+    def __contains__(self, target: Dict) -> bool:
+        return target_signature(target) in self._entries
+        
+    def __len__(self) -> int:
+        return len(self._entries)
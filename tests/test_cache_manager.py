@@ -0,0 +1,57 @@
+import pytest
+from src.utils.cache_manager import CacheManager
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+    
+    def make(**kwargs):
+        # 关闭后台刷新, 待写项只在测试显式 flush 时落盘
+        kwargs.setdefault('flush_interval', 3600)
+        cache = CacheManager(str(tmp_path / f'cache{len(caches)}'), **kwargs)
+        caches.append(cache)
+        return cache
+        
+    yield make
+    for cache in caches:
+        cache.close()
+
+def test_set_many_get_many_round_trip(make_cache):
+    cache = make_cache()
+    items = {f'key{i}': {'value': i, 'name': '目标'} for i in range(10)}
+    cache.set_many(items)
+    assert cache.get_many(list(items) + ['missing']) == items
+
+def test_get_many_reads_disk_after_eviction(make_cache):
+    cache = make_cache(memory_budget=64)
+    items = {f'key{i}': 'x' * 20 for i in range(10)}
+    cache.set_many(items)
+    assert cache.get_stats()['memory_bytes'] <= 64
+    assert cache.get_many(items) == items
+
+def test_get_many_returns_oversized_pending_entry(make_cache):
+    """超过内存预算且尚未落盘的项不能打断后续键的读取"""
+    cache = make_cache(memory_budget=64, write_behind=True)
+    cache.set_many({'small1': 1, 'big': 'x' * 200, 'small2': 2})
+    assert cache.get_many(['small1', 'big', 'small2']) == {
+        'small1': 1, 'big': 'x' * 200, 'small2': 2
+    }
+    assert cache.get('big') == 'x' * 200
+
+def test_write_behind_close_persists(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cache = CacheManager(cache_dir, write_behind=True, flush_interval=3600)
+    cache.set_many({'a': 1, 'b': 2})
+    cache.delete('b')
+    cache.close()
+    
+    reopened = CacheManager(cache_dir)
+    try:
+        assert reopened.get_many(['a', 'b']) == {'a': 1}
+    finally:
+        reopened.close()
+
+def test_memory_budget_counts_utf8_bytes(make_cache):
+    cache = make_cache(memory_budget=100)
+    cache.set('key', '中' * 20)
+    assert cache.get_stats()['memory_bytes'] == len(('"' + '中' * 20 + '"').encode('utf-8'))
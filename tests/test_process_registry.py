@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import time
+import pytest
+
+pytest.importorskip('psutil')
+from src.core.process_registry import ProcessRegistry
+
+def spawn(code: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, '-c', code])
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="需要POSIX僵尸进程语义")
+def test_unregister_keeps_other_exit_codes():
+    """注销任务时不回收其他代码创建的子进程"""
+    registry = ProcessRegistry()
+    other = spawn('import sys; sys.exit(3)')
+    process = spawn('pass')
+    registry.register(1, process)
+    process.wait()
+    time.sleep(0.2)  # 确保 other 已经退出成为僵尸进程
+    registry.unregister(1)
+    assert other.wait() == 3
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="需要POSIX信号")
+def test_stop_tasks_waits_once():
+    registry = ProcessRegistry(kill_timeout=1.0)
+    ignore_term = ('import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); '
+                   'time.sleep(30)')
+    processes = [spawn(ignore_term) for _ in range(3)]
+    time.sleep(0.3)  # 等待子进程设置好信号处理
+    for task_id, process in enumerate(processes):
+        registry.register(task_id, process)
+        
+    start = time.monotonic()
+    assert registry.stop_tasks([0, 1, 2, 9], wait=True) == [0, 1, 2]
+    assert time.monotonic() - start < 2.5
+    assert all(process.wait(timeout=2) is not None for process in processes)
+
+def test_stop_flag_kept_until_cleared():
+    registry = ProcessRegistry()
+    process = spawn('import time; time.sleep(30)')
+    registry.register(1, process)
+    registry.stop(1, kill=True)
+    process.wait()
+    registry.unregister(1)
+    assert registry.was_stopped(1)
+    registry.clear_stopped(1)
+    assert not registry.was_stopped(1)
+
+def test_stop_requested_before_register():
+    """进程启动前到达的停止请求不会因登记而丢失"""
+    registry = ProcessRegistry(kill_timeout=1.0)
+    registry.request_stop(1)
+    process = spawn('import time; time.sleep(30)')
+    registry.register(1, process)
+    assert process.wait(timeout=3) is not None
+    assert registry.was_stopped(1)
@@ -0,0 +1,60 @@
+import threading
+import time
+from src.utils.proxy_pool import ProxyPool, ProxyRecord
+
+def make_pool(count: int = 1, max_in_flight: int = 0) -> ProxyPool:
+    """创建已通过检测的代理池"""
+    pool = ProxyPool(max_in_flight=max_in_flight)
+    records = [ProxyRecord('HTTP', f'10.0.0.{i}', 8080) for i in range(count)]
+    pool.import_proxies(records)
+    for record in records:
+        pool._apply_result(record, True, 0.1)
+    return pool
+
+def test_acquire_counts_in_flight():
+    pool = make_pool(1)
+    proxy = pool.acquire()
+    assert proxy.in_flight == 1
+    pool.release(proxy)
+    assert proxy.in_flight == 0
+
+def test_acquire_empty_pool_returns_immediately():
+    pool = ProxyPool()
+    start = time.monotonic()
+    assert pool.acquire(timeout=5) is None
+    assert time.monotonic() - start < 1
+
+def test_acquire_waits_for_release():
+    pool = make_pool(1, max_in_flight=1)
+    proxy = pool.acquire()
+    assert pool.acquire() is None
+    
+    threading.Timer(0.1, pool.release, (proxy,)).start()
+    assert pool.acquire(timeout=2) is proxy
+
+def test_acquire_times_out_when_saturated():
+    pool = make_pool(1, max_in_flight=1)
+    pool.acquire()
+    assert pool.acquire(timeout=0.2) is None
+
+def test_failed_release_keeps_proxy_until_max_failures():
+    pool = make_pool(1)
+    proxy = pool.acquire()
+    for attempt in range(1, ProxyPool.MAX_FAILURES):
+        pool.release(proxy, success=False)
+        assert pool.is_working(proxy)
+        assert proxy.fail_count == attempt
+        proxy = pool.acquire()
+        
+    pool.release(proxy, success=False)
+    assert not pool.is_working(proxy)
+    assert proxy in pool.failed_proxies
+
+def test_successful_release_resets_failures():
+    pool = make_pool(1)
+    proxy = pool.acquire()
+    pool.release(proxy, success=False)
+    proxy = pool.acquire()
+    pool.release(proxy, success=True, latency=0.2)
+    assert proxy.fail_count == 0
+    assert pool.is_working(proxy)
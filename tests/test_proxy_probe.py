@@ -0,0 +1,47 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.utils.proxy_probe import HandshakeProbe, LocalProbeServer
+
+class _WebHandler(BaseHTTPRequestHandler):
+    """普通Web服务器: 所有请求都返回 status"""
+    status = 200
+    
+    def _reply(self):
+        self.send_response(self.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        
+    do_GET = do_HEAD = do_OPTIONS = _reply
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def web_server():
+    servers = []
+    
+    def start(status: int):
+        handler = type('Handler', (_WebHandler,), {'status': status})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[:2]
+        
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def http_proxy(address):
+    return {'type': 'HTTP', 'host': address[0], 'port': address[1]}
+
+def test_handshake_accepts_http_proxy():
+    with LocalProbeServer() as server:
+        success, error, _ = HandshakeProbe().probe(http_proxy(server.address), 2)
+    assert success, error
+
+@pytest.mark.parametrize('status', [200, 404, 500])
+def test_handshake_rejects_web_server(web_server, status):
+    success, _, _ = HandshakeProbe().probe(http_proxy(web_server(status)), 2)
+    assert not success
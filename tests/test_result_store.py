@@ -0,0 +1,89 @@
+import os
+import threading
+import pytest
+from src.core.task_manager import TaskManager, TaskStatus
+
+RESULT_A = {'vulnerable': True, 'injection_points': [{'parameter': 'id'}]}
+RESULT_B = {'vulnerable': False, 'injection_points': []}
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TaskManager(str(tmp_path / 'tasks.db'), str(tmp_path / 'results'))
+    yield manager
+    manager.storage.close()
+
+def blob_count(manager: TaskManager) -> int:
+    return sum(len(files) for _, _, files in os.walk(manager.results.root_dir))
+
+def create(manager: TaskManager, url: str) -> int:
+    return manager.create_task(f"扫描 {url}", {'url': url}).id
+
+def test_identical_results_share_one_blob(manager):
+    first = create(manager, 'http://a.example/?id=1')
+    second = create(manager, 'http://b.example/?id=1')
+    manager.update_task_status(first, TaskStatus.COMPLETED, result=RESULT_A, wait=True)
+    manager.update_task_status(second, TaskStatus.COMPLETED, result=RESULT_A, wait=True)
+    
+    assert manager.get_task(first).result_hash == manager.get_task(second).result_hash
+    assert blob_count(manager) == 1
+
+def test_superseded_result_is_deleted(manager):
+    task_id = create(manager, 'http://a.example/?id=1')
+    manager.update_task_result(task_id, RESULT_A)
+    manager.update_task_result(task_id, RESULT_B)
+    manager.flush()
+    
+    assert blob_count(manager) == 1
+    assert manager.get_task_result(task_id) == RESULT_B
+
+def test_shared_result_survives_delete(manager):
+    first = create(manager, 'http://a.example/?id=1')
+    second = create(manager, 'http://b.example/?id=1')
+    manager.update_task_result(first, RESULT_A)
+    manager.update_task_result(second, RESULT_A)
+    manager.flush()
+    
+    manager.delete_task(first)
+    assert manager.get_task_result(second) == RESULT_A
+    manager.delete_task(second)
+    assert blob_count(manager) == 0
+
+def test_identical_result_in_same_batch_is_kept(manager):
+    """A 释放最后一个引用与 B 引用相同内容在同一写事务中提交"""
+    first = create(manager, 'http://a.example/?id=1')
+    second = create(manager, 'http://b.example/?id=1')
+    manager.update_task_result(first, RESULT_A)
+    manager.flush()
+    
+    gate = threading.Event()
+    manager.storage.write(lambda conn: gate.wait(5))
+    manager.update_task_result(first, RESULT_B)
+    manager.update_task_result(second, RESULT_A)
+    gate.set()
+    manager.flush()
+    
+    assert manager.get_task_result(second) == RESULT_A
+
+def test_identical_result_put_before_release_is_kept(manager, monkeypatch):
+    """B 已写入结果文件但尚未提交引用时, A 释放了该结果的最后一个引用"""
+    first = create(manager, 'http://a.example/?id=1')
+    second = create(manager, 'http://b.example/?id=1')
+    manager.update_task_result(first, RESULT_A)
+    manager.flush()
+    
+    put = manager.results.put
+    
+    def put_then_release(result, pin=False):
+        digest = put(result, pin)
+        if result == RESULT_A:
+            monkeypatch.setattr(manager.results, 'put', put)
+            manager.update_task_result(first, RESULT_B)
+            manager.flush()
+        return digest
+        
+    monkeypatch.setattr(manager.results, 'put', put_then_release)
+    manager.update_task_result(second, RESULT_A)
+    manager.flush()
+    
+    assert manager.get_task_result(second) == RESULT_A
+    assert blob_count(manager) == 2
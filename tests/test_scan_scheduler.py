@@ -0,0 +1,177 @@
+import threading
+import time
+import pytest
+from src.core.task_manager import TaskManager, TaskStatus
+from src.core.scan_scheduler import ScanScheduler
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TaskManager(str(tmp_path / 'tasks.db'), str(tmp_path / 'results'))
+    yield manager
+    manager.storage.close()
+
+def wait_until(predicate, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > end:
+            raise AssertionError("等待超时")
+        time.sleep(0.01)
+
+def create(manager: TaskManager, url: str, priority: int = 0) -> int:
+    return manager.create_task(f"扫描 {url}", {'url': url}, priority=priority).id
+
+def test_start_task_does_not_override_stop(manager):
+    task_id = create(manager, 'http://a.example/?id=1')
+    manager.mark_stopped([task_id])
+    manager.flush()
+    
+    assert not manager.start_task(task_id)
+    assert manager.get_task(task_id).status == TaskStatus.STOPPED
+
+def test_stopped_task_is_not_run(manager):
+    ran = []
+    scheduler = ScanScheduler(manager, lambda task, log: ran.append(task.id) or {})
+    task_id = create(manager, 'http://a.example/?id=1')
+    manager.mark_stopped([task_id])
+    manager.flush()
+    
+    scheduler.enqueue(task_id)
+    scheduler.start()
+    try:
+        wait_until(lambda: not scheduler.active_ids())
+    finally:
+        scheduler.stop(wait=True)
+    assert ran == []
+    assert manager.get_task(task_id).status == TaskStatus.STOPPED
+
+def test_entry_requeued_when_executor_closed(manager):
+    scheduler = ScanScheduler(manager, lambda task, log: {})
+    scheduler.start()
+    scheduler.executor.shutdown(wait=True)  # 模拟 stop() 在取出任务后关闭执行器
+    task_id = create(manager, 'http://a.example/?id=1')
+    scheduler.enqueue(task_id)
+    
+    scheduler.dispatch_thread.join(timeout=2)
+    assert not scheduler.dispatch_thread.is_alive()
+    assert scheduler.pending_count() == 1
+    assert scheduler.running_count() == 0
+    assert manager.get_task(task_id).status == TaskStatus.PENDING
+    scheduler.stop()
+
+def run_all(scheduler: ScanScheduler):
+    scheduler.start()
+    try:
+        wait_until(lambda: not scheduler.active_ids())
+    finally:
+        scheduler.stop(wait=True)
+
+def test_priority_then_submission_order(manager):
+    order = []
+    scheduler = ScanScheduler(manager, lambda task, log: order.append(task.id) or {}, max_slots=1)
+    low = scheduler.submit("低", {'url': 'http://a.example/?id=1'}, priority=0)
+    high = scheduler.submit("高", {'url': 'http://a.example/?id=2'}, priority=5)
+    low2 = scheduler.submit("低2", {'url': 'http://a.example/?id=3'}, priority=0)
+    high2 = scheduler.submit("高2", {'url': 'http://a.example/?id=4'}, priority=5)
+    
+    run_all(scheduler)
+    assert order == [high, high2, low, low2]
+    manager.flush()
+    assert all(manager.get_task(i).status == TaskStatus.COMPLETED for i in order)
+
+def test_per_host_limit(manager):
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+    
+    def runner(task, log):
+        with lock:
+            running[task.host] = running.get(task.host, 0) + 1
+            peak[task.host] = max(peak.get(task.host, 0), running[task.host])
+        time.sleep(0.05)
+        with lock:
+            running[task.host] -= 1
+        return {}
+        
+    scheduler = ScanScheduler(manager, runner, max_slots=4, per_host_limit=2)
+    for i in range(6):
+        scheduler.submit(f"a{i}", {'url': f'http://a.example/?id={i}'})
+    for i in range(2):
+        scheduler.submit(f"b{i}", {'url': f'http://b.example/?id={i}'})
+        
+    run_all(scheduler)
+    assert peak == {'a.example': 2, 'b.example': 2}
+
+def test_blocked_host_does_not_starve_others(manager):
+    """主机达到上限时, 后提交的其他主机任务先执行"""
+    order = []
+    gate = threading.Event()
+    
+    def runner(task, log):
+        order.append(task.host)
+        if task.host == 'a.example':
+            gate.wait(5)
+        return {}
+        
+    scheduler = ScanScheduler(manager, runner, max_slots=2, per_host_limit=1)
+    for i in range(3):
+        scheduler.submit(f"a{i}", {'url': f'http://a.example/?id={i}'})
+    scheduler.submit("b", {'url': 'http://b.example/?id=1'})
+    
+    scheduler.start()
+    try:
+        wait_until(lambda: 'b.example' in order)
+        assert order == ['a.example', 'b.example']
+        gate.set()
+        wait_until(lambda: not scheduler.active_ids())
+    finally:
+        gate.set()
+        scheduler.stop(wait=True)
+    assert order.count('a.example') == 3
+
+def test_failure_recorded_and_callbacks_called(manager):
+    errors = []
+    
+    def runner(task, log):
+        raise RuntimeError("扫描失败")
+        
+    scheduler = ScanScheduler(manager, runner, max_slots=1)
+    task_id = scheduler.submit("失败", {'url': 'http://a.example/?id=1'},
+                               callbacks=(None, None, errors.append))
+    run_all(scheduler)
+    manager.flush()
+    assert errors == ["扫描失败"]
+    assert manager.get_task(task_id).status == TaskStatus.FAILED
+
+def test_cancel_queued_task(manager):
+    ran = []
+    scheduler = ScanScheduler(manager, lambda task, log: ran.append(task.id) or {}, max_slots=1)
+    keep = scheduler.submit("保留", {'url': 'http://a.example/?id=1'})
+    cancelled = scheduler.submit("取消", {'url': 'http://a.example/?id=2'})
+    assert scheduler.cancel(cancelled)
+    
+    run_all(scheduler)
+    manager.flush()
+    assert ran == [keep]
+    assert manager.get_task(cancelled).status == TaskStatus.STOPPED
+
+def test_batch_resume_skips_finished_children(manager):
+    ran = []
+    scheduler = ScanScheduler(manager, lambda task, log: ran.append(task.id) or {}, max_slots=1)
+    parent_id, children = manager.create_batch("批量", [
+        {'url': f'http://a.example/?id={i}'} for i in range(3)
+    ])
+    first, second, third = [task_id for task_id, _ in children]
+    manager.update_task_status(first, TaskStatus.COMPLETED)
+    manager.update_task_status(second, TaskStatus.STOPPED)
+    manager.flush()
+    
+    assert scheduler.resume_batch(parent_id) == 2
+    run_all(scheduler)
+    manager.flush()
+    assert ran == [second, third]
+    assert manager.get_task(parent_id).status == TaskStatus.COMPLETED
+
+def test_empty_batch_is_completed(manager):
+    parent_id, children = manager.create_batch("空批量", [])
+    assert children == []
+    assert manager.get_task(parent_id).status == TaskStatus.COMPLETED